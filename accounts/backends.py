@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from . import throttling
+
+UserModel = get_user_model()
+
+
+def find_user(identifier):
+    """
+    The active or inactive user whose username or email is ``identifier``,
+    ignoring case, found with one query on the case-insensitive unique
+    indexes. A username match wins over another account's email.
+    """
+    value = identifier.strip().lower()
+    candidates = list(
+        UserModel._default_manager.alias(
+            username_lower=Lower("username"), email_lower=Lower("email")
+        ).filter(Q(username_lower=value) | Q(email_lower=value) & ~Q(email=""))[:2]
+    )
+    for user in candidates:
+        if user.username.lower() == value:
+            return user
+    return candidates[0] if candidates else None
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    """Sign in with a username or an email address, subject to login throttling"""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        if throttling.is_throttled(request, username):
+            # Stops authenticate() before any lookup or hashing.
+            raise PermissionDenied
+
+        user = find_user(username)
+        if user is None:
+            # Hash anyway so unknown accounts take as long as wrong passwords.
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
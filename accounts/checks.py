@@ -0,0 +1,19 @@
+from django.core.checks import Error, Tags, register
+
+from elearning import caching
+
+
+@register(Tags.caches, deploy=True)
+def check_throttling_cache(app_configs, **kwargs):
+    """Throttling counters in a per-process cache multiply the limits by workers"""
+    if caching.is_shared():
+        return []
+    return [
+        Error(
+            "Sign-in throttling counts failures in the default cache, which is "
+            "private to each process.",
+            hint="Set CACHE_URL to a Redis or Memcached server shared by every "
+            "process.",
+            id="accounts.E001",
+        )
+    ]
@@ -2,10 +2,14 @@ from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.db.models.functions import Lower
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Submit, Layout, Field
 from django.contrib.auth import authenticate
 
+from . import throttling
+
 
 User = get_user_model()
 
@@ -29,6 +33,11 @@ class CustomLoginForm(AuthenticationForm):
         password = self.cleaned_data.get("password")
 
         if username and password:
+            if throttling.is_throttled(self.request, username):
+                raise ValidationError(
+                    "Too many failed sign-in attempts. Please try again later.",
+                    code="throttled",
+                )
             self.user_cache = authenticate(
                 self.request, username=username, password=password
             )
@@ -42,6 +51,9 @@ class CustomLoginForm(AuthenticationForm):
 class CustomUserCreationForm(UserCreationForm):
     email = forms.EmailField(
         required=True,
+        # Model validation skips email (see _get_validation_exclusions), so
+        # the column length is enforced here.
+        max_length=User._meta.get_field("email").max_length,
         widget=forms.EmailInput(
             attrs={"class": "form-control", "placeholder": "Email Address"}
         ),
@@ -115,17 +127,48 @@ class CustomUserCreationForm(UserCreationForm):
         )
 
     def clean_email(self):
-        email = self.cleaned_data.get("email")
-        if User.objects.filter(email=email).exclude(pk=self.instance.pk).exists():
-            raise ValidationError("A user with this email already exists.")
-        return email
+        return User.objects.normalize_email(self.cleaned_data.get("email"))
 
     def clean_username(self):
         username = self.cleaned_data.get("username")
-        if User.objects.filter(username=username).exclude(pk=self.instance.pk).exists():
-            raise ValidationError("A user with this username already exists.")
+        # Model validation skips username (see _get_validation_exclusions).
+        User.username_validator(username)
         return username
 
+    def clean(self):
+        """Check username and email uniqueness (ignoring case) in one query"""
+        cleaned_data = super().clean()
+        username = cleaned_data.get("username")
+        email = cleaned_data.get("email")
+        lookups = Q()
+        if username:
+            lookups |= Q(username_lower=username.lower())
+        if email:
+            lookups |= Q(email_lower=email.lower()) & ~Q(email="")
+        if not lookups:
+            return cleaned_data
+
+        # Filtering on Lower(...) uses the case-insensitive unique indexes.
+        taken = (
+            User.objects.alias(
+                username_lower=Lower("username"), email_lower=Lower("email")
+            )
+            .filter(lookups)
+            .exclude(pk=self.instance.pk)
+            .values_list("username", "email")
+        )
+        for other_username, other_email in taken:
+            if username and other_username.lower() == username.lower():
+                self.add_error("username", "A user with this username already exists.")
+            if email and other_email.lower() == email.lower():
+                self.add_error("email", "A user with this email already exists.")
+        return cleaned_data
+
+    def _get_validation_exclusions(self):
+        # clean() has already checked the username and email constraints;
+        # don't let model validation query them one by one again.
+        return super()._get_validation_exclusions() | {"username", "email"}
+
     def save(self, commit=True):
         user = super().save(commit=False)
         user.email = self.cleaned_data["email"]
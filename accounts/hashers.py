@@ -0,0 +1,46 @@
+"""
+Password hashers with costs taken from settings.
+
+PASSWORD_HASHER picks the profile new passwords are hashed with (see
+PASSWORD_HASHER_PROFILES in settings); the other hashers stay configured so
+existing hashes still verify, and Django rehashes them with the preferred
+one on the next successful login. Raising a cost setting likewise rehashes
+each password at its next login.
+"""
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return settings.SCRYPT_WORK_FACTOR
+
+    @property
+    def maxmem(self):
+        # OpenSSL's default 32 MiB cap is too small from work factor 2**15.
+        return 256 * self.work_factor * self.block_size
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id; needs the argon2-cffi package"""
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
+
+
+def preferring(profile):
+    """PASSWORD_HASHERS with the hasher of ``profile`` first"""
+    profiles = settings.PASSWORD_HASHER_PROFILES
+    preferred = profiles[profile]
+    return [preferred] + [path for path in profiles.values() if path != preferred]
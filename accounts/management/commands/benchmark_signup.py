@@ -0,0 +1,99 @@
+import importlib.util
+import statistics
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from accounts.forms import CustomUserCreationForm
+from accounts.hashers import preferring
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure signup throughput (form validation, password hashing and the "
+        "INSERT) for each password hasher profile. Users are created in a "
+        "transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--signups",
+            type=int,
+            default=20,
+            help="Signups per profile (default: 20)",
+        )
+        parser.add_argument(
+            "--profile",
+            action="append",
+            choices=sorted(settings.PASSWORD_HASHER_PROFILES),
+            help="Profile to measure; repeat for several (default: all available)",
+        )
+
+    def handle(self, *args, **options):
+        if options["signups"] < 1:
+            raise CommandError("--signups must be at least 1")
+        profiles = options["profile"] or [
+            name for name in settings.PASSWORD_HASHER_PROFILES if _available(name)
+        ]
+
+        self.stdout.write(
+            f"{'profile':<14}{'signups/s':>10}{'median ms':>11}"
+            f"{'hash ms':>9}{'queries':>9}"
+        )
+        for profile in profiles:
+            with override_settings(PASSWORD_HASHERS=preferring(profile)):
+                samples, hash_ms, queries = self._measure(options["signups"])
+            self.stdout.write(
+                f"{profile:<14}{len(samples) / sum(samples) * 1000:>10.1f}"
+                f"{statistics.median(samples):>11.2f}{hash_ms:>9.2f}{queries:>9}"
+            )
+
+    def _measure(self, count):
+        from django.contrib.auth.hashers import get_hasher
+
+        hasher = get_hasher()
+        started = time.perf_counter()
+        hasher.encode("benchmark-password", hasher.salt())
+        hash_ms = (time.perf_counter() - started) * 1000
+
+        samples = []
+        try:
+            with transaction.atomic():
+                for _ in range(count):
+                    name = uuid.uuid4().hex[:12]
+                    form = CustomUserCreationForm(
+                        data={
+                            "username": f"bench_{name}",
+                            "email": f"bench_{name}@example.com",
+                            "first_name": "Bench",
+                            "last_name": "Mark",
+                            "password1": "correct-horse-battery",
+                            "password2": "correct-horse-battery",
+                            "user_type": "student",
+                        }
+                    )
+                    started = time.perf_counter()
+                    with CaptureQueriesContext(connection) as validation:
+                        valid = form.is_valid()
+                    if not valid:
+                        raise CommandError(f"Signup form rejected: {form.errors}")
+                    form.save()
+                    samples.append((time.perf_counter() - started) * 1000)
+                raise Rollback
+        except Rollback:
+            pass
+        return samples, hash_ms, len(validation)
+
+
+def _available(profile):
+    if profile != "argon2":
+        return True
+    return importlib.util.find_spec("argon2") is not None
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import metrics
+
+
+class Command(BaseCommand):
+    help = "Summarize sign-in attempts and their latency over recent minutes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--minutes",
+            type=int,
+            default=60,
+            help="How far back to look (default: 60)",
+        )
+
+    def handle(self, *args, **options):
+        if options["minutes"] < 1:
+            raise CommandError("--minutes must be at least 1")
+        summary = metrics.summary(options["minutes"])
+
+        self.stdout.write(
+            f"{'outcome':<12}{'count':>8}{'avg ms':>10}{'p50 ms':>10}{'p95 ms':>10}"
+        )
+        for outcome, stats in summary.items():
+            avg = f"{stats['avg_ms']:.1f}" if stats["count"] else "-"
+            p50 = f"<={stats['p50_ms']}" if stats["count"] else "-"
+            p95 = f"<={stats['p95_ms']}" if stats["count"] else "-"
+            self.stdout.write(
+                f"{outcome:<12}{stats['count']:>8}{avg:>10}{p50:>10}{p95:>10}"
+            )
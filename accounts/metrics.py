@@ -0,0 +1,87 @@
+"""
+Login latency metrics.
+
+Each sign-in attempt through the login page is counted in a per-minute
+cache bucket by outcome (success, failure, throttled), with its total time
+and a latency histogram, so every worker process reports into the same
+numbers. ``manage.py login_stats`` summarizes recent minutes.
+"""
+
+import time
+
+from django.core.cache import cache
+
+OUTCOMES = ("success", "failure", "throttled")
+# Histogram upper bounds in milliseconds; slower attempts go in "inf".
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+RETENTION = 60 * 60 * 24
+
+
+def _incr(key, delta=1):
+    if not cache.add(key, delta, RETENTION):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.add(key, delta, RETENTION)
+
+
+def _bucket(ms):
+    return next((bound for bound in BUCKETS_MS if ms <= bound), "inf")
+
+
+def record_login(outcome, seconds):
+    ms = seconds * 1000
+    prefix = f"login-metrics:{int(time.time() // 60)}:{outcome}"
+    _incr(f"{prefix}:count")
+    _incr(f"{prefix}:ms", round(ms))
+    _incr(f"{prefix}:le:{_bucket(ms)}")
+
+
+def summary(minutes=60):
+    """
+    ``{outcome: {"count", "avg_ms", "p50_ms", "p95_ms"}}`` over the last
+    ``minutes``; percentiles are histogram bucket upper bounds.
+    """
+    now = int(time.time() // 60)
+    bounds = [*BUCKETS_MS, "inf"]
+    keys = [
+        f"login-metrics:{minute}:{outcome}:{field}"
+        for minute in range(now - minutes + 1, now + 1)
+        for outcome in OUTCOMES
+        for field in ("count", "ms", *(f"le:{bound}" for bound in bounds))
+    ]
+    values = cache.get_many(keys)
+
+    totals = {
+        outcome: {"count": 0, "ms": 0, "buckets": dict.fromkeys(bounds, 0)}
+        for outcome in OUTCOMES
+    }
+    for key, value in values.items():
+        _, _, outcome, field = key.split(":", 3)
+        if field.startswith("le:"):
+            bound = field[3:]
+            totals[outcome]["buckets"][bound if bound == "inf" else int(bound)] += value
+        else:
+            totals[outcome][field] += value
+
+    result = {}
+    for outcome, total in totals.items():
+        count = total["count"]
+        result[outcome] = {
+            "count": count,
+            "avg_ms": total["ms"] / count if count else None,
+            "p50_ms": _percentile(total["buckets"], count, 0.5),
+            "p95_ms": _percentile(total["buckets"], count, 0.95),
+        }
+    return result
+
+
+def _percentile(buckets, count, fraction):
+    if not count:
+        return None
+    seen = 0
+    for bound, n in buckets.items():
+        seen += n
+        if seen >= count * fraction:
+            return bound
+    return "inf"
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.16 on 2026-10-19 09:10
+
+from django.core.management.base import CommandError
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+def check_case_duplicates(apps, schema_editor):
+    """Refuse to add the constraints while users differ only in case"""
+    User = apps.get_model("accounts", "User")
+    problems = []
+    for field in ("username", "email"):
+        users = User.objects.exclude(**{field: ""})
+        clashes = (
+            users.values(folded=django.db.models.functions.text.Lower(field))
+            .annotate(count=models.Count("pk"))
+            .filter(count__gt=1)
+            .order_by("folded")
+        )
+        for row in clashes:
+            matches = users.filter(**{f"{field}__iexact": row["folded"]})
+            values = ", ".join(
+                f"{value!r} (id {pk})"
+                for pk, value in matches.order_by("pk").values_list("pk", field)
+            )
+            problems.append(f"  {field}: {values}")
+    if problems:
+        raise CommandError(
+            "These users have a username or email that differs only in case. "
+            "Rename or merge them, then run migrate again:\n" + "\n".join(problems)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_case_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="user",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.text.Lower("username"),
+                name="accounts_user_username_ci_unique",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="user",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.text.Lower("email"),
+                condition=models.Q(("email", ""), _negated=True),
+                name="accounts_user_email_ci_unique",
+            ),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Lower
 from django.utils.translation import gettext_lazy as _
 
 
@@ -26,3 +28,16 @@ class User(AbstractUser):
 
     class Meta:
         ordering = ["-date_joined"]
+        # Usernames and email addresses are unique regardless of case. Lookups
+        # must filter on Lower(...) to use these indexes; see
+        # CustomUserCreationForm.clean().
+        constraints = [
+            models.UniqueConstraint(
+                Lower("username"), name="accounts_user_username_ci_unique"
+            ),
+            models.UniqueConstraint(
+                Lower("email"),
+                condition=~Q(email=""),
+                name="accounts_user_email_ci_unique",
+            ),
+        ]
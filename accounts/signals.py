@@ -0,0 +1,17 @@
+from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.dispatch import receiver
+
+from . import throttling
+
+
+@receiver(user_login_failed)
+def count_login_failure(sender, credentials, request=None, **kwargs):
+    throttling.record_failure(request, credentials.get("username"))
+
+
+@receiver(user_logged_in)
+def clear_login_failures(sender, request, user, **kwargs):
+    # The account may have been typed as either its username or its email.
+    throttling.reset_account(user.username)
+    if user.email:
+        throttling.reset_account(user.email)
@@ -1,3 +1,118 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import checks, metrics
+from .forms import CustomUserCreationForm
+from .models import User
+
+
+class SignupUniquenessTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user("Taken", email="Taken@example.com", password="x")
+
+    def _form(self, username, email):
+        return CustomUserCreationForm(
+            data={
+                "username": username,
+                "email": email,
+                "first_name": "New",
+                "last_name": "User",
+                "password1": "correct-horse-battery",
+                "password2": "correct-horse-battery",
+                "user_type": "student",
+            }
+        )
+
+    def test_validation_is_one_query(self):
+        form = self._form("fresh", "fresh@example.com")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(form.is_valid())
+        self.assertEqual(len(queries), 1)
+
+    def test_duplicates_differing_in_case_are_rejected(self):
+        form = self._form("taken", "TAKEN@example.com")
+        with CaptureQueriesContext(connection) as queries:
+            self.assertFalse(form.is_valid())
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(set(form.errors), {"username", "email"})
+
+    def test_invalid_username_characters_are_still_rejected(self):
+        form = self._form("no spaces", "spaces@example.com")
+        self.assertFalse(form.is_valid())
+        self.assertIn("username", form.errors)
+
+    def test_over_long_emails_are_rejected(self):
+        form = self._form("long", "a" * 250 + "@example.com")
+        self.assertFalse(form.is_valid())
+        self.assertIn("email", form.errors)
+
+    def test_database_enforces_case_insensitive_uniqueness(self):
+        with self.assertRaises(IntegrityError):
+            User.objects.create_user("other", email="taken@EXAMPLE.com")
+
+    def test_blank_emails_may_repeat(self):
+        User.objects.create_user("first", email="")
+        User.objects.create_user("second", email="")
+
+
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+    LOGIN_FAILURES_PER_ACCOUNT=3,
+)
+class LoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user(
+            "learner", email="Learner@example.com", password="right-password"
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def _login(self, username, password):
+        return self.client.post(
+            reverse("login"), {"username": username, "password": password}
+        )
+
+    def test_sign_in_with_email_ignoring_case(self):
+        self.assertRedirects(
+            self._login("learner@EXAMPLE.com", "right-password"),
+            "/",
+            fetch_redirect_response=False,
+        )
+
+    def test_throttled_attempts_skip_password_hashing(self):
+        for _ in range(3):
+            self._login("learner", "wrong")
+        with mock.patch.object(User, "check_password") as check_password:
+            response = self._login("learner", "right-password")
+        check_password.assert_not_called()
+        self.assertContains(response, "Too many failed sign-in attempts")
+        self.assertNotIn("_auth_user_id", self.client.session)
+
+        stats = metrics.summary(minutes=2)
+        self.assertEqual(stats["failure"]["count"], 3)
+        self.assertEqual(stats["throttled"]["count"], 1)
+
+
+class ThrottlingCacheCheckTests(TestCase):
+    def test_a_process_local_cache_is_reported(self):
+        errors = checks.check_throttling_cache(None)
+        self.assertEqual([error.id for error in errors], ["accounts.E001"])
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                "LOCATION": "redis://127.0.0.1:6379/0",
+            }
+        }
+    )
+    def test_a_shared_cache_passes(self):
+        self.assertEqual(checks.check_throttling_cache(None), [])
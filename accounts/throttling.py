@@ -0,0 +1,74 @@
+"""
+Cache-backed throttling of failed sign-ins.
+
+Failures are counted per client IP and per account identifier (the
+username or email as typed) in fixed windows of LOGIN_FAILURE_WINDOW
+seconds. Once either count reaches its limit, further attempts are
+rejected before any user lookup or password hashing, so a credential
+stuffing burst costs a cache read per attempt instead of a hash. A
+successful sign-in clears its account's count.
+
+The counters are only effective in a cache shared by every process; in a
+per-process cache each worker counts on its own and restarts reset them.
+Production settings and the gunicorn profile refuse to run without one,
+and ``manage.py check --deploy`` reports it (accounts.E001).
+"""
+
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def client_ip(request):
+    """Client address, taken from X-Forwarded-For behind TRUSTED_PROXY_HOPS proxies"""
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops:
+        forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+        if len(forwarded) >= hops:
+            return forwarded[-hops].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _keys(request, identifier):
+    """``{cache key: limit}`` of the counters an attempt is checked against"""
+    keys = {}
+    if request is not None:
+        keys[f"login-failures:ip:{client_ip(request)}"] = settings.LOGIN_FAILURES_PER_IP
+    if identifier:
+        digest = sha1(identifier.strip().lower().encode()).hexdigest()
+        keys[f"login-failures:account:{digest}"] = settings.LOGIN_FAILURES_PER_ACCOUNT
+    return keys
+
+
+def is_throttled(request, identifier):
+    """Whether sign-in attempts from this client or for this account are blocked"""
+    # Memoized on the request: the login form and the backend both ask.
+    memo = getattr(request, "_login_throttled", None)
+    if memo is None:
+        memo = {}
+        if request is not None:
+            request._login_throttled = memo
+    if identifier not in memo:
+        keys = _keys(request, identifier)
+        counts = cache.get_many(keys)
+        memo[identifier] = any(counts.get(key, 0) >= keys[key] for key in keys)
+    return memo[identifier]
+
+
+def record_failure(request, identifier):
+    if request is not None and getattr(request, "_login_throttled", {}).get(identifier):
+        # Already blocked; don't spend cache writes on a flood.
+        return
+    for key in _keys(request, identifier):
+        # add() starts the window; incr() keeps the key's expiry.
+        if not cache.add(key, 1, settings.LOGIN_FAILURE_WINDOW):
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Expired between add() and incr().
+                cache.add(key, 1, settings.LOGIN_FAILURE_WINDOW)
+
+
+def reset_account(identifier):
+    cache.delete_many(list(_keys(None, identifier)))
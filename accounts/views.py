@@ -1,8 +1,13 @@
+import time
+
 from django.shortcuts import render, redirect
 from django.contrib.auth import login, authenticate, logout
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import NON_FIELD_ERRORS
+from django.db import IntegrityError, transaction
 from django.views.decorators.http import require_http_methods
+from . import metrics
 from .forms import CustomLoginForm, CustomUserCreationForm
 
 
@@ -13,12 +18,25 @@ def custom_login(request):
 
     if request.method == "POST":
         form = CustomLoginForm(request, data=request.POST)
-        if form.is_valid():
+        started = time.perf_counter()
+        valid = form.is_valid()
+        if valid:
+            outcome = "success"
+        elif form.has_error(NON_FIELD_ERRORS, "throttled"):
+            outcome = "throttled"
+        else:
+            outcome = "failure"
+        metrics.record_login(outcome, time.perf_counter() - started)
+        if valid:
             user = form.get_user()
             login(request, user)
             messages.success(request, f"Welcome back, {user.first_name}!")
             next_url = request.POST.get("next", request.GET.get("next", "/"))
             return redirect(next_url)
+        elif outcome == "throttled":
+            messages.error(
+                request, "Too many failed sign-in attempts. Please try again later."
+            )
         else:
             messages.error(request, "Invalid credentials. Please try again.")
     else:
@@ -35,7 +53,15 @@ def custom_register(request):
     if request.method == "POST":
         form = CustomUserCreationForm(request.POST)
         if form.is_valid():
-            user = form.save()
+            try:
+                with transaction.atomic():
+                    user = form.save()
+            except IntegrityError:
+                # Lost a race with a concurrent signup for the same name.
+                messages.error(
+                    request, "A user with this username or email already exists."
+                )
+                return render(request, "registration/register.html", {"form": form})
             login(request, user)
             user_type = form.cleaned_data.get("user_type")
             messages.success(
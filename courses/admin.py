@@ -1,4 +1,10 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Max
+from django.utils.functional import cached_property
+from . import publishing
+from .exports import enrollments_csv, quiz_results_csv
 from .models import (
     Category,
     Course,
@@ -10,9 +16,120 @@ from .models import (
     QuizAttempt,
     QuizAnswer,
     Certificate,
+    Announcement,
 )
 
 
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for very large tables. An unfiltered changelist uses the
+    database's row estimate instead of COUNT(*); filtered querysets, and
+    tables small enough for an exact count to be cheap, still count exactly.
+    """
+
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, "query", None)
+        if query is None or query.where:
+            return super().count
+        estimate = self._estimate(self.object_list.model)
+        if estimate < self.exact_count_threshold:
+            return super().count
+        return estimate
+
+    @staticmethod
+    def _estimate(model):
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [table],
+                )
+                row = cursor.fetchone()
+                return max(row[0], 0) if row else 0
+            if connection.vendor == "mysql":
+                cursor.execute(
+                    "SELECT table_rows FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE() AND table_name = %s",
+                    [table],
+                )
+                row = cursor.fetchone()
+                return (row[0] or 0) if row else 0
+        # Other backends keep no statistics; the highest primary key is an
+        # index-only upper bound.
+        return model.objects.aggregate(top=Max("pk"))["top"] or 0
+
+
+def related_id_filter(field_path, title):
+    """
+    List filter that takes a related object's id in a text box instead of
+    rendering every row of the related table as a choice.
+    """
+
+    class RelatedIdFilter(admin.SimpleListFilter):
+        template = "admin/related_id_filter.html"
+        parameter_name = f"{field_path}__id__exact"
+
+        def lookups(self, request, model_admin):
+            return [(None, "")]
+
+        def queryset(self, request, queryset):
+            value = self.value()
+            if value and value.isdigit():
+                return queryset.filter(**{f"{field_path}_id": value})
+            return queryset
+
+        def choices(self, changelist):
+            yield {
+                "value": self.value() or "",
+                "reset_query_string": changelist.get_query_string(
+                    remove=[self.parameter_name]
+                ),
+                "query_parts": [
+                    (key, value)
+                    for key, value in changelist.params.items()
+                    if key not in (self.parameter_name, "p")
+                ],
+            }
+
+    RelatedIdFilter.title = title
+    return RelatedIdFilter
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables expected to grow to millions of rows"""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.action(description="Export selected as CSV")
+def export_enrollments_csv(modeladmin, request, queryset):
+    return enrollments_csv(queryset)
+
+
+@admin.action(description="Export selected as CSV")
+def export_quiz_results_csv(modeladmin, request, queryset):
+    return quiz_results_csv(queryset)
+
+
+@admin.action(description="Publish current drafts of selected courses")
+def publish_courses(modeladmin, request, queryset):
+    for course in queryset:
+        publishing.publish(course, request.user)
+    modeladmin.message_user(request, f"Published {len(queryset)} course(s).")
+
+
+@admin.action(description="Unpublish selected courses")
+def unpublish_courses(modeladmin, request, queryset):
+    for course in queryset:
+        publishing.unpublish(course)
+    modeladmin.message_user(request, f"Unpublished {len(queryset)} course(s).")
+
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ("name", "slug", "created_at")
@@ -31,19 +148,38 @@ class CourseAdmin(admin.ModelAdmin):
         "price",
         "level",
         "is_published",
+        "published_version",
         "created_at",
     )
     list_filter = ("category", "level", "is_published", "created_at")
+    list_select_related = ("category", "instructor", "publication")
     search_fields = ("title", "description", "instructor__username")
+    autocomplete_fields = ("instructor",)
     prepopulated_fields = {"slug": ("title",)}
     list_editable = ("is_published",)
     date_hierarchy = "created_at"
     ordering = ("-created_at",)
     list_per_page = 20
+    actions = (publish_courses, unpublish_courses)
+
+    @admin.display(description="Live version")
+    def published_version(self, obj):
+        publication = getattr(obj, "publication", None)
+        return publication.version if publication else "-"
+
+    def save_related(self, request, form, formsets, change):
+        """Turning is_published on or off publishes or withdraws the course"""
+        super().save_related(request, form, formsets, change)
+        if "is_published" in form.changed_data or not change:
+            course = form.instance
+            if course.is_published:
+                publishing.publish(course, request.user)
+            elif change:
+                publishing.unpublish(course)
 
 
 @admin.register(Lesson)
-class LessonAdmin(admin.ModelAdmin):
+class LessonAdmin(LargeTableAdmin):
     list_display = (
         "title",
         "course",
@@ -53,15 +189,22 @@ class LessonAdmin(admin.ModelAdmin):
         "is_preview",
         "is_completed",
     )
-    list_filter = ("lesson_type", "is_preview", "is_completed", "course")
+    list_filter = (
+        "lesson_type",
+        "is_preview",
+        "is_completed",
+        related_id_filter("course", "course"),
+    )
+    list_select_related = ("course",)
+    autocomplete_fields = ("course",)
     search_fields = ("title", "course__title")
-    ordering = ("course", "order")
+    ordering = ("course_id", "order")
     list_editable = ("is_preview", "is_completed")
     list_per_page = 20
 
 
 @admin.register(Enrollment)
-class EnrollmentAdmin(admin.ModelAdmin):
+class EnrollmentAdmin(LargeTableAdmin):
     list_display = (
         "student",
         "course",
@@ -70,7 +213,14 @@ class EnrollmentAdmin(admin.ModelAdmin):
         "enrolled_at",
         "completed_at",
     )
-    list_filter = ("is_completed", "enrolled_at")
+    list_filter = (
+        "is_completed",
+        "enrolled_at",
+        related_id_filter("course", "course"),
+    )
+    list_select_related = ("student", "course")
+    actions = (export_enrollments_csv,)
+    autocomplete_fields = ("student", "course")
     search_fields = ("student__username", "course__title")
     list_editable = ("is_completed",)
     ordering = ("-enrolled_at",)
@@ -87,7 +237,9 @@ class QuizAdmin(admin.ModelAdmin):
         "is_published",
         "created_at",
     )
-    list_filter = ("is_published", "course")
+    list_filter = ("is_published", related_id_filter("course", "course"))
+    list_select_related = ("course",)
+    autocomplete_fields = ("course", "lesson")
     search_fields = ("title", "course__title")
     list_editable = ("is_published",)
     date_hierarchy = "created_at"
@@ -96,36 +248,46 @@ class QuizAdmin(admin.ModelAdmin):
 
 
 @admin.register(Question)
-class QuestionAdmin(admin.ModelAdmin):
+class QuestionAdmin(LargeTableAdmin):
     list_display = ("text", "quiz", "question_type", "marks", "order")
-    list_filter = ("question_type", "quiz")
+    list_filter = ("question_type", related_id_filter("quiz", "quiz"))
+    list_select_related = ("quiz",)
+    autocomplete_fields = ("quiz",)
     search_fields = ("text", "quiz__title")
-    ordering = ("quiz", "order")
+    ordering = ("quiz_id", "order")
     list_per_page = 20
 
 
 @admin.register(Answer)
-class AnswerAdmin(admin.ModelAdmin):
+class AnswerAdmin(LargeTableAdmin):
     list_display = ("text", "question", "is_correct", "order")
-    list_filter = ("is_correct", "question")
+    list_filter = ("is_correct", related_id_filter("question", "question"))
+    list_select_related = ("question",)
+    autocomplete_fields = ("question",)
     search_fields = ("text", "question__text")
     list_editable = ("is_correct",)
-    ordering = ("question", "order")
+    ordering = ("question_id", "order")
     list_per_page = 20
 
 
 @admin.register(QuizAttempt)
-class QuizAttemptAdmin(admin.ModelAdmin):
+class QuizAttemptAdmin(LargeTableAdmin):
     list_display = (
         "enrollment",
         "quiz",
+        "status",
         "score",
         "total_marks",
         "is_passed",
         "started_at",
+        "deadline",
         "completed_at",
     )
-    list_filter = ("is_passed", "quiz")
+    list_filter = ("status", "is_passed", related_id_filter("quiz", "quiz"))
+    list_select_related = ("enrollment__student", "enrollment__course", "quiz")
+    actions = (export_quiz_results_csv,)
+    raw_id_fields = ("enrollment",)
+    autocomplete_fields = ("quiz",)
     search_fields = ("enrollment__student__username", "quiz__title")
     list_editable = ("is_passed",)
     ordering = ("-started_at",)
@@ -133,18 +295,38 @@ class QuizAttemptAdmin(admin.ModelAdmin):
 
 
 @admin.register(QuizAnswer)
-class QuizAnswerAdmin(admin.ModelAdmin):
+class QuizAnswerAdmin(LargeTableAdmin):
     list_display = ("attempt", "question", "selected_answer", "is_correct")
-    list_filter = ("is_correct",)
+    list_filter = ("is_correct", related_id_filter("attempt", "attempt"))
+    list_select_related = (
+        "attempt__enrollment__student",
+        "attempt__quiz",
+        "question",
+        "selected_answer",
+    )
+    raw_id_fields = ("attempt", "question", "selected_answer")
     search_fields = ("attempt__quiz__title", "question__text")
-    ordering = ("attempt",)
+    ordering = ("-attempt_id",)
     list_per_page = 20
 
 
 @admin.register(Certificate)
-class CertificateAdmin(admin.ModelAdmin):
+class CertificateAdmin(LargeTableAdmin):
     list_display = ("enrollment", "certificate_file", "issued_at")
+    list_select_related = ("enrollment__student", "enrollment__course")
+    raw_id_fields = ("enrollment",)
     search_fields = ("enrollment__student__username", "enrollment__course__title")
     date_hierarchy = "issued_at"
     ordering = ("-issued_at",)
     list_per_page = 20
+
+
+@admin.register(Announcement)
+class AnnouncementAdmin(admin.ModelAdmin):
+    list_display = ("title", "course", "author", "created_at")
+    list_select_related = ("course", "author")
+    raw_id_fields = ("course", "author")
+    search_fields = ("title", "course__title")
+    date_hierarchy = "created_at"
+    ordering = ("-created_at",)
+    list_per_page = 20
@@ -0,0 +1,132 @@
+"""
+Incremental maintenance of the materialized reporting tables.
+
+CourseStats, CourseDailyStats and InstructorStats are never computed with
+aggregate queries at read time. Instead every enrollment / quiz attempt event
+bumps the affected counters with F() expressions, so each event costs a few
+single-row UPDATEs no matter how large Enrollment and QuizAttempt grow.
+
+Bulk writes (``bulk_create``, ``QuerySet.update``) bypass the model signals
+that feed this module; run ``manage.py rebuild_analytics`` after those.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Course, CourseDailyStats, CourseStats, InstructorStats
+
+
+def _increment(model, lookup, **deltas):
+    """Add ``deltas`` to the row matching ``lookup``, creating it if needed"""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    changes = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(
+                **lookup, **{field: max(value, 0) for field, value in deltas.items()}
+            )
+    except IntegrityError:
+        # Another writer created the row between our UPDATE and INSERT.
+        model.objects.filter(**lookup).update(**changes)
+
+
+def _instructor_id(course_id):
+    return (
+        Course.objects.filter(pk=course_id)
+        .values_list("instructor_id", flat=True)
+        .first()
+    )
+
+
+def _apply(course_id, daily=None, **deltas):
+    """Apply running-total ``deltas`` to the course and instructor rollups"""
+    with transaction.atomic():
+        _increment(CourseStats, {"course_id": course_id}, **deltas)
+        instructor_id = _instructor_id(course_id)
+        if instructor_id:
+            _increment(InstructorStats, {"instructor_id": instructor_id}, **deltas)
+        if daily is None:
+            return
+
+        today = {"course_id": course_id, "date": timezone.localdate()}
+        _increment(CourseDailyStats, today, **daily)
+        totals = (
+            CourseStats.objects.filter(course_id=course_id)
+            .values_list("progress_sum", "enrollments")
+            .first()
+        )
+        if totals and totals[1]:
+            CourseDailyStats.objects.filter(**today).update(
+                course_average_progress=round(totals[0] / totals[1], 1)
+            )
+
+
+def record_enrollment(enrollment):
+    """A student enrolled in a course"""
+    completed = int(enrollment.is_completed)
+    _apply(
+        enrollment.course_id,
+        daily={"new_enrollments": 1, "completions": completed},
+        enrollments=1,
+        completions=completed,
+        progress_sum=enrollment.progress,
+    )
+
+
+def record_progress(enrollment, old_progress, old_completed):
+    """An existing enrollment's progress or completion flag changed"""
+    completed_delta = int(enrollment.is_completed) - int(old_completed)
+    progress_delta = enrollment.progress - old_progress
+    if not (completed_delta or progress_delta):
+        return
+    _apply(
+        enrollment.course_id,
+        # The daily table counts completion events, so un-completing an
+        # enrollment only adjusts the running totals.
+        daily={"completions": max(completed_delta, 0)},
+        completions=completed_delta,
+        progress_sum=progress_delta,
+    )
+
+
+def record_unenrollment(enrollment, progress, completed):
+    """An enrollment was deleted"""
+    _apply(
+        enrollment.course_id,
+        enrollments=-1,
+        completions=-int(completed),
+        progress_sum=-progress,
+    )
+
+
+def record_quiz_attempt(attempt, course_id, passed_delta=None):
+    """A quiz attempt was submitted, or its pass flag was changed afterwards"""
+    if passed_delta is None:
+        passed = int(attempt.is_passed)
+        _apply(
+            course_id,
+            daily={"quiz_attempts": 1, "quiz_passes": passed},
+            quiz_attempts=1,
+            quiz_passes=passed,
+        )
+    elif passed_delta:
+        _apply(
+            course_id,
+            daily={"quiz_passes": max(passed_delta, 0)},
+            quiz_passes=passed_delta,
+        )
+
+
+def record_quiz_results(course_id, attempts, passes):
+    """``attempts`` attempts in a course, ``passes`` of them passed, were graded"""
+    _apply(
+        course_id,
+        daily={"quiz_attempts": attempts, "quiz_passes": passes},
+        quiz_attempts=attempts,
+        quiz_passes=passes,
+    )
@@ -6,4 +6,4 @@ class CoursesConfig(AppConfig):
     name = "courses"
 
     def ready(self):
-        import courses.management.commands.seed_data
+        import courses.signals
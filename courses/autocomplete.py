@@ -0,0 +1,260 @@
+"""
+In-process prefix index for search-as-you-type.
+
+Every word of a published course title, category name and instructor name is
+stored as a normalized key in one sorted list, so a query is a bisect to the
+first key with the typed prefix followed by a short scan. Popularity weights
+come from the materialized analytics rollups. The index is built lazily on
+first use, patched in place when a course is saved in this process, and
+rebuilt when another process bumps the shared catalog generation.
+"""
+
+import bisect
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from django.db.models import Count, Q
+from django.urls import reverse
+
+from . import catalog
+from .models import Category, Course, CourseStats, InstructorStats
+
+MAX_RESULTS = 8
+SHORT_PREFIX = 3
+GENERATION_CHECK_INTERVAL = 30
+MEMO_SIZE = 512
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = text.encode("ascii", "ignore").decode("ascii").lower()
+    return re.sub(r"[^a-z0-9]+", " ", text).strip()
+
+
+class PrefixIndex:
+    """
+    Sorted (word, entry_id) keys searched with bisect. Prefixes of up to
+    SHORT_PREFIX characters match too much of the index to scan per
+    keystroke, so their best entries are kept precomputed in ``short``.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.entries = {}  # entry_id -> (weight, result dict, words)
+        self.short = {}
+        self.memo = OrderedDict()
+
+    def load(self, items):
+        """Bulk-load (entry_id, label, weight, result) items with a single sort"""
+        for entry_id, label, weight, result in items:
+            words = set(normalize(label).split())
+            self.keys.extend((word, entry_id) for word in words)
+            self.entries[entry_id] = (weight, result, words)
+        self.keys.sort()
+
+        buckets = {}
+        for word, entry_id in self.keys:
+            for size in range(1, SHORT_PREFIX + 1):
+                if len(word) >= size:
+                    buckets.setdefault(word[:size], set()).add(entry_id)
+        self.short = {prefix: self._best(ids) for prefix, ids in buckets.items()}
+        self.memo.clear()
+
+    def add(self, entry_id, label, weight, result):
+        self.remove(entry_id)
+        words = set(normalize(label).split())
+        for word in words:
+            bisect.insort(self.keys, (word, entry_id))
+        self.entries[entry_id] = (weight, result, words)
+        self._refresh_short(words)
+
+    def remove(self, entry_id):
+        entry = self.entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for word in entry[2]:
+            position = bisect.bisect_left(self.keys, (word, entry_id))
+            if position < len(self.keys) and self.keys[position] == (word, entry_id):
+                del self.keys[position]
+        self._refresh_short(entry[2])
+
+    def _refresh_short(self, words):
+        prefixes = {
+            word[:size] for word in words for size in range(1, SHORT_PREFIX + 1)
+        }
+        for prefix in prefixes:
+            self.short[prefix] = self._best(self._prefix_matches(prefix))
+        self.memo.clear()
+
+    def _best(self, entry_ids, limit=MAX_RESULTS):
+        return heapq.nlargest(
+            limit, entry_ids, key=lambda entry_id: self.entries[entry_id][0]
+        )
+
+    def _prefix_matches(self, prefix):
+        keys = self.keys
+        matches = set()
+        position = bisect.bisect_left(keys, (prefix,))
+        while position < len(keys) and keys[position][0].startswith(prefix):
+            matches.add(keys[position][1])
+            position += 1
+        return matches
+
+    def search(self, query, limit=MAX_RESULTS):
+        terms = normalize(query).split()
+        if not terms:
+            return []
+        memo_key = (" ".join(terms), limit)
+        cached = self.memo.get(memo_key)
+        if cached is not None:
+            return cached
+
+        if len(terms) == 1 and len(terms[0]) <= SHORT_PREFIX and limit <= MAX_RESULTS:
+            best = self.short.get(terms[0], [])[:limit]
+        else:
+            # Every term must prefix-match some word of the same entry; start
+            # from the longest (most selective) term.
+            terms.sort(key=len, reverse=True)
+            candidates = self._prefix_matches(terms[0])
+            for term in terms[1:]:
+                if not candidates:
+                    break
+                candidates = {
+                    entry_id
+                    for entry_id in candidates
+                    if any(word.startswith(term) for word in self.entries[entry_id][2])
+                }
+            best = self._best(candidates, limit)
+        results = [self.entries[entry_id][1] for entry_id in best]
+
+        self.memo[memo_key] = results
+        while len(self.memo) > MEMO_SIZE:
+            try:
+                self.memo.popitem(last=False)
+            except KeyError:  # emptied by a concurrent writer
+                break
+        return results
+
+
+def _course_entry(course, enrollments):
+    return (
+        ("course", course.pk),
+        course.title,
+        enrollments,
+        {"type": "course", "label": course.title, "url": course.get_absolute_url()},
+    )
+
+
+def _build():
+    items = []
+    course_list = reverse("course_list")
+    enrollments = dict(CourseStats.objects.values_list("course_id", "enrollments"))
+
+    published = Course.objects.filter(is_published=True).only("id", "title", "slug")
+    for course in published.iterator(chunk_size=2000):
+        items.append(_course_entry(course, enrollments.get(course.pk, 0)))
+
+    categories = Category.objects.annotate(
+        published=Count("course", filter=Q(course__is_published=True))
+    ).filter(published__gt=0)
+    for category in categories:
+        items.append(
+            (
+                ("category", category.pk),
+                category.name,
+                category.published,
+                {
+                    "type": "category",
+                    "label": category.name,
+                    "url": f"{course_list}?category={category.pk}",
+                },
+            )
+        )
+
+    teaching = dict(InstructorStats.objects.values_list("instructor_id", "enrollments"))
+    instructors = (
+        Course.objects.filter(is_published=True)
+        .values_list(
+            "instructor_id",
+            "instructor__username",
+            "instructor__first_name",
+            "instructor__last_name",
+        )
+        .distinct()
+    )
+    for instructor_id, username, first_name, last_name in instructors:
+        name = f"{first_name} {last_name}".strip() or username
+        items.append(
+            (
+                ("instructor", instructor_id),
+                f"{name} {username}",
+                teaching.get(instructor_id, 0),
+                {
+                    "type": "instructor",
+                    "label": name,
+                    "url": f"{course_list}?{urlencode({'search': username})}",
+                },
+            )
+        )
+
+    index = PrefixIndex()
+    index.load(items)
+    return index
+
+
+_lock = threading.Lock()
+_index = None
+_generation = None
+_checked_at = 0.0
+
+
+def get_index():
+    """Return the process-wide index, (re)building it when missing or stale"""
+    global _index, _generation, _checked_at
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < GENERATION_CHECK_INTERVAL:
+        return _index
+    with _lock:
+        generation = catalog.current_generation()
+        if _index is None or generation != _generation:
+            _index = _build()
+            _generation = generation
+        _checked_at = now
+    return _index
+
+
+def search(query, limit=MAX_RESULTS):
+    return get_index().search(query, limit)
+
+
+def course_changed(course):
+    """Patch a saved course into the index of this process, if it is built"""
+    global _generation
+    with _lock:
+        if _index is None:
+            return
+        if course.is_published:
+            enrollments = (
+                CourseStats.objects.filter(course_id=course.pk)
+                .values_list("enrollments", flat=True)
+                .first()
+            )
+            _index.add(*_course_entry(course, enrollments or 0))
+        else:
+            _index.remove(("course", course.pk))
+        # The save also started a new catalog generation; this process is
+        # already current, so don't rebuild for it.
+        _generation = catalog.current_generation()
+
+
+def course_removed(course_id):
+    global _generation
+    with _lock:
+        if _index is not None:
+            _index.remove(("course", course_id))
+            _generation = catalog.current_generation()
@@ -0,0 +1,40 @@
+"""
+Pre-rendered course card fragments for listing pages.
+
+A card's HTML only depends on the course row, so it is rendered once and
+cached under a key that includes ``Course.updated_at``; any edit to the
+course produces a new key and the stale fragment simply ages out. Listing
+pages fetch all of their cards with one ``get_many`` and only render the
+misses.
+"""
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+CARD_TEMPLATES = {
+    "catalog": "courses/cards/catalog.html",
+    "home": "courses/cards/home.html",
+}
+CARD_TIMEOUT = 60 * 60 * 24
+
+
+def card_key(course, variant):
+    return f"course-card:{variant}:{course.pk}:{course.updated_at.timestamp()}"
+
+
+def render_cards(courses, variant="catalog"):
+    """Return the card HTML for each course, in order"""
+    courses = list(courses)
+    keys = [card_key(course, variant) for course in courses]
+    cached = cache.get_many(keys)
+
+    missing = {}
+    for key, course in zip(keys, courses):
+        if key not in cached:
+            missing[key] = render_to_string(CARD_TEMPLATES[variant], {"course": course})
+    if missing:
+        cache.set_many(missing, CARD_TIMEOUT)
+        cached.update(missing)
+
+    return [mark_safe(cached[key]) for key in keys]
@@ -0,0 +1,206 @@
+"""
+Faceted filtering for the public course catalog.
+
+Facet counts come from one grouped aggregate: published courses matching the
+search term are counted per (category, level, price band, duration band)
+cell, and every facet's counts are then summed from those cells in Python,
+applying the selections of all *other* facets so multi-select behaves as
+expected. Results are cached per filter signature under a catalog
+generation number that ``invalidate()`` bumps whenever catalog content
+changes.
+
+The generation only reaches every process through a cache they all share
+(CACHE_URL; see elearning/caching.py). With a per-process cache an edit
+handled by one worker leaves other workers on their old counts until
+CACHE_TIMEOUT, which is why production refuses to run on one.
+"""
+
+import hashlib
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import Case, CharField, Count, Q, Value, When
+
+from .models import Category, Course
+
+CACHE_TIMEOUT = 60 * 10
+GENERATION_KEY = "catalog:generation"
+
+LEVELS = dict(Course._meta.get_field("level").choices)
+PRICE_BANDS = {
+    "0-50": "Under ₹50",
+    "50-100": "₹50 – ₹100",
+    "100-200": "₹100 – ₹200",
+    "200+": "₹200+",
+}
+DURATION_BANDS = {
+    "short": "Up to 4 weeks",
+    "medium": "5 – 12 weeks",
+    "long": "Over 12 weeks",
+}
+PRICING = {"free": "Free", "paid": "Paid"}
+
+FACETS = ["category", "level", "price", "duration", "pricing"]
+FACET_TITLES = {
+    "category": "Category",
+    "level": "Level",
+    "price": "Price",
+    "duration": "Duration",
+    "pricing": "Free / Paid",
+}
+
+
+def _price_band():
+    return Case(
+        When(price__lte=0, then=Value("free")),
+        When(price__lt=50, then=Value("0-50")),
+        When(price__lt=100, then=Value("50-100")),
+        When(price__lt=200, then=Value("100-200")),
+        default=Value("200+"),
+        output_field=CharField(),
+    )
+
+
+def _duration_band():
+    return Case(
+        When(duration_weeks__isnull=True, then=Value("")),
+        When(duration_weeks__lte=4, then=Value("short")),
+        When(duration_weeks__lte=12, then=Value("medium")),
+        default=Value("long"),
+        output_field=CharField(),
+    )
+
+
+def parse_filters(params):
+    """Read the multi-valued facet selections and search term from a QueryDict"""
+    filters = {facet: sorted(set(params.getlist(facet)) - {""}) for facet in FACETS}
+    filters["category"] = [value for value in filters["category"] if value.isdigit()]
+    filters["level"] = [value for value in filters["level"] if value in LEVELS]
+    filters["price"] = [value for value in filters["price"] if value in PRICE_BANDS]
+    filters["duration"] = [
+        value for value in filters["duration"] if value in DURATION_BANDS
+    ]
+    filters["pricing"] = [value for value in filters["pricing"] if value in PRICING]
+    return filters, (params.get("search") or "").strip()
+
+
+def _search_q(search):
+    if not search:
+        return Q()
+    return (
+        Q(title__icontains=search)
+        | Q(description__icontains=search)
+        | Q(instructor__username__iexact=search)
+    )
+
+
+def _selection_q(filters):
+    q = Q()
+    if filters["category"]:
+        q &= Q(category_id__in=filters["category"])
+    if filters["level"]:
+        q &= Q(level__in=filters["level"])
+    if filters["price"]:
+        q &= Q(price_band__in=filters["price"])
+    if filters["duration"]:
+        q &= Q(duration_band__in=filters["duration"])
+    if filters["pricing"] == ["free"]:
+        q &= Q(price__lte=0)
+    elif filters["pricing"] == ["paid"]:
+        q &= Q(price__gt=0)
+    return q
+
+
+def filter_courses(queryset, filters, search):
+    """Apply the search term and facet selections to a Course queryset"""
+    queryset = queryset.filter(_search_q(search))
+    if filters["price"]:
+        queryset = queryset.annotate(price_band=_price_band())
+    if filters["duration"]:
+        queryset = queryset.annotate(duration_band=_duration_band())
+    return queryset.filter(_selection_q(filters))
+
+
+def _cell_values(cell):
+    """Facet values a cube cell belongs to"""
+    price_band = cell["price_band"]
+    return {
+        "category": str(cell["category_id"]),
+        "level": cell["level"],
+        "price": price_band,
+        "duration": cell["duration_band"],
+        "pricing": "free" if price_band == "free" else "paid",
+    }
+
+
+def _compute_facets(filters, search):
+    cells = (
+        Course.objects.filter(is_published=True)
+        .filter(_search_q(search))
+        .annotate(price_band=_price_band(), duration_band=_duration_band())
+        .values("category_id", "level", "price_band", "duration_band")
+        .annotate(total=Count("pk"))
+        .order_by()
+    )
+
+    counts = {facet: Counter() for facet in FACETS}
+    for cell in cells:
+        values = _cell_values(cell)
+        for facet in FACETS:
+            others_match = all(
+                not filters[other] or values[other] in filters[other]
+                for other in FACETS
+                if other != facet
+            )
+            if others_match:
+                counts[facet][values[facet]] += cell["total"]
+
+    labels = {
+        "category": {
+            str(pk): name for pk, name in Category.objects.values_list("id", "name")
+        },
+        "level": LEVELS,
+        "price": PRICE_BANDS,
+        "duration": DURATION_BANDS,
+        "pricing": PRICING,
+    }
+    return [
+        {
+            "name": facet,
+            "title": FACET_TITLES[facet],
+            "options": [
+                {
+                    "value": value,
+                    "label": label,
+                    "count": counts[facet][value],
+                    "selected": value in filters[facet],
+                }
+                for value, label in labels[facet].items()
+                if counts[facet][value] or value in filters[facet]
+            ],
+        }
+        for facet in FACETS
+    ]
+
+
+def current_generation():
+    return cache.get_or_set(GENERATION_KEY, time.time_ns, None)
+
+
+def facet_counts(filters, search):
+    """Per-facet option lists with counts for the current selection, cached"""
+    signature = repr(
+        (sorted(filters.items()), search.lower(), current_generation())
+    ).encode()
+    key = "catalog:facets:" + hashlib.md5(signature).hexdigest()
+    facets = cache.get(key)
+    if facets is None:
+        facets = _compute_facets(filters, search)
+        cache.set(key, facets, CACHE_TIMEOUT)
+    return facets
+
+
+def invalidate():
+    """Start a new catalog generation so every cached facet entry is stale"""
+    cache.set(GENERATION_KEY, time.time_ns(), None)
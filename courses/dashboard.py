@@ -0,0 +1,153 @@
+"""
+Data for the student dashboard (my_courses).
+
+One query returns every enrollment of a student with its course card
+fields, progress, the lesson to resume, the next incomplete lesson, the
+minutes left in the incomplete lessons and the time of the last activity.
+The result is cached per student as plain values, with the version of each
+course in it. The entry is dropped when one of the student's enrollments
+changes; saving a lesson or course bumps that course's version, which makes
+the entry of every student enrolled in it stale without touching them.
+
+Dropping an entry or bumping a version only reaches every process through a cache they all share
+(CACHE_URL; see elearning/caching.py). With a per-process cache other
+workers would serve their copy until CACHE_TIMEOUT, which is why production
+refuses to run on one.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+
+from . import resume
+from .models import Course, Enrollment, Lesson
+
+CACHE_TIMEOUT = 60 * 60
+
+COURSE_FIELDS = ["id", "title", "slug", "short_description", "level", "thumbnail"]
+
+
+def cache_key(student_id):
+    return f"dashboard:{student_id}"
+
+
+def course_version_key(course_id):
+    return f"dashboard:course:{course_id}"
+
+
+def _course_versions(course_ids):
+    """Current version of each course, starting one where there is none"""
+    keys = {course_version_key(course_id): course_id for course_id in course_ids}
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        versions.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def _lesson_minutes():
+    """A lesson's expected minutes: reading time for text, else its duration"""
+    return Case(
+        When(lesson_type="text", reading_minutes__gt=0, then=F("reading_minutes")),
+        default=F("duration"),
+    )
+
+
+def _query(student_id):
+    incomplete = Lesson.objects.filter(course=OuterRef("course_id"), is_completed=False)
+    next_lesson = incomplete.order_by("order", "pk")
+    remaining = (
+        incomplete.order_by()
+        .values("course")
+        .annotate(minutes=Sum(_lesson_minutes()))
+        .values("minutes")
+    )
+    return (
+        Enrollment.objects.filter(student_id=student_id)
+        .annotate(
+            next_lesson_id=Subquery(next_lesson.values("pk")[:1]),
+            next_lesson_title=Subquery(next_lesson.values("title")[:1]),
+            remaining_minutes=Coalesce(Subquery(remaining), 0),
+            last_activity=Coalesce("last_activity_at", "enrolled_at"),
+        )
+        .order_by("-last_activity", "-pk")
+        .values(
+            "progress",
+            "is_completed",
+            "completed_at",
+            "last_activity",
+            "next_lesson_id",
+            "next_lesson_title",
+            "remaining_minutes",
+            "last_lesson_id",
+            "last_lesson__title",
+            "last_position",
+            *(f"course__{field}" for field in COURSE_FIELDS),
+        )
+    )
+
+
+def _entry(row):
+    course = {field: row.pop(f"course__{field}") for field in COURSE_FIELDS}
+    thumbnail = course.pop("thumbnail")
+    storage = Course._meta.get_field("thumbnail").storage
+    course["thumbnail_url"] = storage.url(thumbnail) if thumbnail else ""
+    next_lesson_id = row.pop("next_lesson_id")
+    title = row.pop("next_lesson_title")
+    row["next_lesson"] = (
+        {"id": next_lesson_id, "title": title} if next_lesson_id else None
+    )
+    last_lesson_id = row.pop("last_lesson_id")
+    title = row.pop("last_lesson__title")
+    position = row.pop("last_position")
+    row["resume"] = (
+        {
+            "id": last_lesson_id,
+            "title": title,
+            "position": position,
+            "timestamp": resume.timestamp(position),
+        }
+        if last_lesson_id
+        else None
+    )
+    return {"course": course, **row}
+
+
+def student_dashboard(student):
+    """The student's enrollments, most recently active first"""
+    key = cache_key(student.pk)
+    cached = cache.get(key)
+    if cached is not None:
+        versions, entries = cached
+        if _course_versions(versions) == versions:
+            return entries
+    # Versions are read before the rows, so a save that lands during the
+    # query still invalidates the entry stored below.
+    course_ids = Enrollment.objects.filter(student_id=student.pk).values_list(
+        "course_id", flat=True
+    )
+    versions = _course_versions(course_ids)
+    entries = [_entry(row) for row in _query(student.pk)]
+    cache.set(key, (versions, entries), CACHE_TIMEOUT)
+    return entries
+
+
+def invalidate_student(student_id):
+    # After commit, so a concurrent request can't cache the old rows again.
+    transaction.on_commit(lambda: cache.delete(cache_key(student_id)))
+
+
+def invalidate_courses(course_ids):
+    """Make the dashboard of every student enrolled in ``course_ids`` stale"""
+    course_ids = list(course_ids)
+    if not course_ids:
+        return
+    versions = {
+        course_version_key(course_id): time.time_ns() for course_id in course_ids
+    }
+    transaction.on_commit(lambda: cache.set_many(versions, None))
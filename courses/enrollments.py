@@ -0,0 +1,83 @@
+"""
+Race-free course enrollment.
+
+``enroll`` inserts the (student, course) row with a single conflict-ignoring
+INSERT instead of ``get_or_create``'s SELECT-then-INSERT, so a surge of
+concurrent requests for one course never raises IntegrityError and exactly
+one of any set of duplicate requests reports a new enrollment. The course's
+enrollment counters are bumped with F() updates in the same transaction.
+"""
+
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from . import analytics
+from .models import Enrollment
+
+# The unique pair the conflict-ignoring INSERT is keyed on
+CONFLICT_FIELDS = ["student", "course"]
+
+
+def _insert_ignore(enrollment):
+    """Insert the unsaved ``enrollment``; return its id, or None if it existed"""
+    opts = Enrollment._meta
+    qn = connection.ops.quote_name
+    # Every column, so fields added to the model later get their defaults.
+    fields = [field for field in opts.concrete_fields if not field.primary_key]
+    params = [
+        field.get_db_prep_save(getattr(enrollment, field.attname), connection)
+        for field in fields
+    ]
+    columns = ", ".join(qn(field.column) for field in fields)
+    placeholders = ", ".join(["%s"] * len(fields))
+    insert = f"INTO {qn(opts.db_table)} ({columns}) VALUES ({placeholders})"
+
+    with connection.cursor() as cursor:
+        if connection.vendor in ("postgresql", "sqlite"):
+            conflict = ", ".join(
+                qn(opts.get_field(name).column) for name in CONFLICT_FIELDS
+            )
+            cursor.execute(
+                f"INSERT {insert} ON CONFLICT ({conflict}) DO NOTHING "
+                f"RETURNING {qn(opts.pk.column)}",
+                params,
+            )
+            row = cursor.fetchone()
+            return row[0] if row else None
+        if connection.vendor == "mysql":
+            cursor.execute(f"INSERT IGNORE {insert}", params)
+            return cursor.lastrowid if cursor.rowcount == 1 else None
+
+    # Other backends: a savepointed INSERT that fails on the unique constraint.
+    try:
+        with transaction.atomic():
+            Enrollment.objects.bulk_create([enrollment])
+    except IntegrityError:
+        return None
+    return (
+        Enrollment.objects.filter(
+            student_id=enrollment.student_id, course_id=enrollment.course_id
+        )
+        .values_list("pk", flat=True)
+        .get()
+    )
+
+
+def enroll(student, course):
+    """
+    Enroll ``student`` in ``course``. Returns ``(enrollment, created)``;
+    safe to call concurrently for the same pair.
+    """
+    with transaction.atomic():
+        enrollment = Enrollment(
+            student=student, course=course, enrolled_at=timezone.now()
+        )
+        enrollment_id = _insert_ignore(enrollment)
+        if enrollment_id is None:
+            return Enrollment.objects.get(student=student, course=course), False
+
+        enrollment.id = enrollment_id
+        enrollment._state.adding = False
+        # The raw INSERT bypassed post_save, so count the enrollment here.
+        analytics.record_enrollment(enrollment)
+    return enrollment, True
@@ -0,0 +1,316 @@
+"""
+Live updates pushed to browsers over server-sent events.
+
+Code anywhere calls ``publish(channel, event, data)`` (after commit) on one
+of two kinds of channels: ``student:<id>`` for a student's enrollment
+progress and ``course:<id>`` for a course's announcements. ``stream`` is a
+plain ASGI application, mounted by elearning/asgi.py in front of Django,
+that holds one event stream per connected browser: each connection is a
+coroutine waiting on a small queue, so a process keeps thousands of idle
+streams open without a thread apiece.
+
+Without EVENTS_BROKER, delivery is in-process: only streams held by the
+publishing process see an event, which is enough for a single ASGI
+process. With EVENTS_BROKER set to "host:port" or "unix:/path", events go
+through ``manage.py event_broker``, a small line-based relay standing in
+for a real message broker, so WSGI workers, job workers and every ASGI
+process share the same streams.
+"""
+
+import asyncio
+import json
+import logging
+import socket
+from collections import defaultdict
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import close_old_connections, transaction
+from django.http.cookie import parse_cookie
+
+from .models import Course, Enrollment
+
+logger = logging.getLogger(__name__)
+
+# Events waiting for a slow client before its stream is dropped
+QUEUE_SIZE = 100
+# Bytes the broker buffers for a slow subscriber before dropping it
+BROKER_BUFFER_LIMIT = 1024 * 1024
+SUBSCRIBE = b"SUBSCRIBE\n"
+
+
+def student_channel(student_id):
+    return f"student:{student_id}"
+
+
+def course_channel(course_id):
+    return f"course:{course_id}"
+
+
+def broker_address():
+    """``(family, address)`` of EVENTS_BROKER, or None when it is unset"""
+    value = settings.EVENTS_BROKER
+    if not value:
+        return None
+    if value.startswith("unix:"):
+        return socket.AF_UNIX, value[len("unix:") :]
+    host, _, port = value.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+class Subscription:
+    def __init__(self, channels):
+        self.channels = channels
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Never let one stalled client hold memory; it reconnects.
+            self.overflowed = True
+
+
+class Hub:
+    """Subscriptions of this process, owned by the event loop serving ASGI"""
+
+    def __init__(self):
+        self.subscriptions = defaultdict(set)
+        self.loop = None
+        self._listener = None
+
+    def subscribe(self, channels):
+        self.loop = asyncio.get_running_loop()
+        subscription = Subscription(channels)
+        for channel in channels:
+            self.subscriptions[channel].add(subscription)
+        if broker_address() and (self._listener is None or self._listener.done()):
+            self._listener = self.loop.create_task(self._listen())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        for channel in subscription.channels:
+            subscribers = self.subscriptions.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscriptions[channel]
+
+    def deliver(self, message):
+        """Queue ``message`` for its channel's streams; event loop thread only"""
+        for subscription in self.subscriptions.get(message["channel"], ()):
+            subscription.put(message)
+
+    def deliver_threadsafe(self, message):
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            # This process holds no streams.
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self.deliver(message)
+        else:
+            loop.call_soon_threadsafe(self.deliver, message)
+
+    async def _listen(self):
+        """Relay the broker's events to this process's streams, reconnecting"""
+        delay = 1
+        while self.subscriptions:
+            family, address = broker_address()
+            try:
+                if family == socket.AF_UNIX:
+                    reader, writer = await asyncio.open_unix_connection(address)
+                else:
+                    reader, writer = await asyncio.open_connection(*address)
+            except OSError as exc:
+                logger.warning("Event broker unreachable (%s); retrying", exc)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+                continue
+            delay = 1
+            writer.write(SUBSCRIBE)
+            try:
+                while line := await reader.readline():
+                    try:
+                        self.deliver(json.loads(line))
+                    except (ValueError, KeyError):
+                        logger.warning("Ignoring malformed event %r", line[:200])
+            finally:
+                writer.close()
+
+
+hub = Hub()
+
+
+def publish(channel, event, data):
+    """Send ``event`` with JSON-able ``data`` to every stream on ``channel``"""
+    message = {"channel": channel, "event": event, "data": data}
+    address = broker_address()
+    if address is not None:
+        family, address = address
+        line = json.dumps(message, separators=(",", ":")).encode() + b"\n"
+        try:
+            with socket.socket(family, socket.SOCK_STREAM) as sock:
+                sock.settimeout(1)
+                sock.connect(address)
+                sock.sendall(line)
+            return
+        except OSError as exc:
+            logger.warning("Event broker unreachable (%s); delivering locally", exc)
+    hub.deliver_threadsafe(message)
+
+
+def publish_on_commit(channel, event, data):
+    transaction.on_commit(lambda: publish(channel, event, data))
+
+
+def _channels(session_key):
+    """The channels the session's user may listen to, or None if signed out"""
+    # Runs outside Django's request cycle, so manage connections as it would.
+    close_old_connections()
+    try:
+        session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+        user = get_user(_SessionRequest(session))
+        if not user.is_authenticated:
+            return None
+        if user.user_type == "student":
+            course_ids = Enrollment.objects.filter(student=user).values_list(
+                "course_id", flat=True
+            )
+            channels = [student_channel(user.pk)]
+        else:
+            course_ids = Course.objects.filter(instructor=user).values_list(
+                "pk", flat=True
+            )
+            channels = []
+        return channels + [course_channel(course_id) for course_id in course_ids]
+    finally:
+        close_old_connections()
+
+
+class _SessionRequest:
+    """The part of a request ``auth.get_user`` reads"""
+
+    def __init__(self, session):
+        self.session = session
+
+
+def _encode(message):
+    data = json.dumps(message["data"], separators=(",", ":"))
+    return f"event: {message['event']}\ndata: {data}\n\n".encode()
+
+
+async def stream(scope, receive, send):
+    """ASGI application serving the signed-in user's event stream"""
+    cookies = {}
+    for name, value in scope.get("headers", ()):
+        if name == b"cookie":
+            cookies.update(parse_cookie(value.decode("latin-1")))
+    session_key = cookies.get(settings.SESSION_COOKIE_NAME)
+    channels = None
+    if session_key:
+        channels = await sync_to_async(_channels)(session_key)
+    if channels is None:
+        # 204 tells EventSource not to reconnect.
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                # Keep nginx-style proxies from buffering the stream.
+                (b"x-accel-buffering", b"no"),
+            ],
+        }
+    )
+    subscription = hub.subscribe(channels)
+    pump = asyncio.ensure_future(_pump(subscription, send))
+    disconnected = asyncio.ensure_future(_disconnected(receive))
+    try:
+        await asyncio.wait({pump, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        hub.unsubscribe(subscription)
+        for task in (pump, disconnected):
+            task.cancel()
+    if pump.done() and not pump.cancelled() and pump.exception() is None:
+        await send({"type": "http.response.body", "body": b""})
+
+
+async def _disconnected(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _pump(subscription, send):
+    """Write events and keepalives until the stream's lifetime is up"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.EVENTS_STREAM_LIFETIME
+    retry = f"retry: {settings.EVENTS_RETRY_MS}\n\n".encode()
+    await send({"type": "http.response.body", "body": retry, "more_body": True})
+    while not subscription.overflowed:
+        timeout = min(settings.EVENTS_KEEPALIVE, deadline - loop.time())
+        if timeout <= 0:
+            # Reconnecting picks up enrollments made since the stream opened.
+            return
+        try:
+            message = await asyncio.wait_for(subscription.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            body = b": keepalive\n\n"
+        else:
+            body = _encode(message)
+        await send({"type": "http.response.body", "body": body, "more_body": True})
+
+
+def serve_broker(address):
+    """Run the relay at ``address`` (see ``broker_address``) until interrupted"""
+    asyncio.run(_serve_broker(address))
+
+
+async def _serve_broker(address):
+    family, address = address
+    subscribers = set()
+
+    async def handle(reader, writer):
+        try:
+            first = await reader.readline()
+            if first == SUBSCRIBE:
+                subscribers.add(writer)
+                # Held open; returns when the subscriber goes away.
+                await reader.read()
+                return
+            line = first
+            while line:
+                for subscriber in list(subscribers):
+                    if (
+                        subscriber.is_closing()
+                        or subscriber.transport.get_write_buffer_size()
+                        > BROKER_BUFFER_LIMIT
+                    ):
+                        subscribers.discard(subscriber)
+                        subscriber.close()
+                    else:
+                        subscriber.write(line)
+                line = await reader.readline()
+        except ConnectionError:
+            pass
+        finally:
+            subscribers.discard(writer)
+            writer.close()
+
+    if family == socket.AF_UNIX:
+        server = await asyncio.start_unix_server(handle, address)
+    else:
+        server = await asyncio.start_server(handle, *address)
+    async with server:
+        await server.serve_forever()
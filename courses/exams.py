@@ -0,0 +1,382 @@
+"""
+Timed quiz attempts.
+
+Starting an attempt inserts that attempt's row, with its deadline
+(``Quiz.time_limit`` minutes on), and writes nothing shared, so a whole
+cohort can start at once. The paper (questions, options and marking key) is
+read once per quiz and cached for every attempt.
+
+While an attempt is open its answers autosave into a cache entry of its
+own. At most every QUIZ_FLUSH_INTERVAL seconds the whole set is written to
+QuizAnswer with one upsert, so losing the cache loses little. Submitting
+grades the latest answers.
+
+All of that needs the cache shared by every process (see
+elearning/caching.py): a submit or the sweeper must see answers saved
+through any worker. With a process-local cache nothing is kept in it:
+every save is written to QuizAnswer before it is acknowledged and grading
+reads only the database.
+
+Attempts nobody submits are graded by ``sweep`` (``manage.py
+sweep_quiz_attempts``) in batches: rows are claimed with SKIP LOCKED so
+sweepers never wait on each other or on students submitting, answers and
+attempts are written with one statement each per batch, and the course
+rollups get one update per course per batch rather than one per attempt.
+"""
+
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from elearning import caching
+
+from . import analytics
+from .models import Answer, Quiz, QuizAnswer, QuizAttempt
+
+# Lifetime of an untimed attempt's entry, and of a cached paper
+CACHE_TIMEOUT = 60 * 60 * 24
+SWEEP_BATCH_SIZE = 200
+
+
+class AttemptClosed(Exception):
+    """The attempt was submitted, or its time is up"""
+
+
+def cache_key(attempt_id):
+    return f"exam:{attempt_id}"
+
+
+def _flush_gate_key(attempt_id):
+    return f"exam-flushed:{attempt_id}"
+
+
+def _paper_key(quiz_id):
+    return f"exam-paper:{quiz_id}"
+
+
+def paper(quiz_id):
+    """
+    The quiz's title, instructions and ordered ``questions`` (each with its
+    ``answers``) plus the server-side ``options``, ``correct`` and ``marks``
+    of each question id.
+    """
+    key = _paper_key(quiz_id)
+    # A private cache would keep an edited marking key in other processes.
+    shared = caching.is_shared()
+    cached = cache.get(key) if shared else None
+    if cached is not None:
+        return cached
+    quiz = Quiz.objects.get(pk=quiz_id)
+    questions = quiz.questions.order_by("order", "pk").prefetch_related(
+        Prefetch("answers", Answer.objects.order_by("order", "pk"))
+    )
+    cached = {
+        "title": quiz.title,
+        "instructions": quiz.instructions,
+        "time_limit": quiz.time_limit,
+        "questions": [],
+        "options": {},
+        "correct": {},
+        "marks": {},
+    }
+    for question in questions:
+        answers = list(question.answers.all())
+        cached["questions"].append(
+            {
+                "id": question.pk,
+                "text": question.text,
+                "question_type": question.question_type,
+                "marks": question.marks,
+                "answers": [
+                    {"id": answer.pk, "text": answer.text} for answer in answers
+                ],
+            }
+        )
+        cached["options"][question.pk] = {answer.pk for answer in answers}
+        cached["correct"][question.pk] = {
+            answer.pk for answer in answers if answer.is_correct
+        }
+        cached["marks"][question.pk] = question.marks
+    if shared:
+        cache.set(key, cached, CACHE_TIMEOUT)
+    return cached
+
+
+def invalidate_paper(quiz_id):
+    cache.delete(_paper_key(quiz_id))
+
+
+def _timeout(deadline):
+    if deadline is None:
+        return CACHE_TIMEOUT
+    # Outlives the deadline long enough for the sweeper to read it.
+    return max(int(deadline - time.time()), 0) + 60 * 60
+
+
+def _store(attempt, student_id, answers):
+    """The open attempt's entry holding ``answers``, cached if the cache is shared"""
+    deadline = attempt.deadline.timestamp() if attempt.deadline else None
+    entry = {
+        "student": student_id,
+        "quiz": attempt.quiz_id,
+        "deadline": deadline,
+        "answers": answers,
+    }
+    if caching.is_shared():
+        cache.set(cache_key(attempt.pk), entry, _timeout(deadline))
+    return entry
+
+
+def entry(attempt_id):
+    """The open attempt's entry, rebuilt if it is not cached; None if closed"""
+    if caching.is_shared():
+        cached = cache.get(cache_key(attempt_id))
+        if cached is not None:
+            return cached
+    attempt = (
+        QuizAttempt.objects.filter(pk=attempt_id, status=QuizAttempt.IN_PROGRESS)
+        .select_related("enrollment")
+        .first()
+    )
+    if attempt is None:
+        return None
+    answers = dict(
+        QuizAnswer.objects.filter(
+            attempt=attempt, selected_answer__isnull=False
+        ).values_list("question_id", "selected_answer_id")
+    )
+    return _store(attempt, attempt.enrollment.student_id, answers)
+
+
+def seconds_left(entry):
+    """Whole seconds until the entry's deadline; None for untimed attempts"""
+    if entry["deadline"] is None:
+        return None
+    return max(int(entry["deadline"] - time.time()), 0)
+
+
+def _timed_out(entry):
+    return (
+        entry["deadline"] is not None
+        and time.time() > entry["deadline"] + settings.QUIZ_GRACE_SECONDS
+    )
+
+
+def start(enrollment, quiz):
+    """The student's open attempt at ``quiz``, starting one if there is none"""
+    attempts = QuizAttempt.objects.filter(
+        enrollment=enrollment, quiz=quiz, status=QuizAttempt.IN_PROGRESS
+    )
+    attempt = attempts.first()
+    if attempt is not None:
+        current = entry(attempt.pk)
+        if current is not None and not _timed_out(current):
+            return attempt
+        # Its time ran out before the sweeper got to it.
+        submit(attempt.pk, enrollment.student_id)
+
+    deadline = None
+    if quiz.time_limit > 0:
+        deadline = timezone.now() + timedelta(minutes=quiz.time_limit)
+    try:
+        with transaction.atomic():
+            attempt = QuizAttempt.objects.create(
+                enrollment=enrollment, quiz=quiz, deadline=deadline
+            )
+    except IntegrityError:
+        # A second request from the same student started it first.
+        return attempts.get()
+    _store(attempt, enrollment.student_id, {})
+    return attempt
+
+
+def autosave(attempt_id, student_id, answers, flush=True):
+    """
+    Merge ``answers`` (``{question_id: answer_id}``) into the open attempt,
+    ignoring options not on its paper, and write them through at most once
+    per QUIZ_FLUSH_INTERVAL (on every call when the cache is process-local).
+    Returns the attempt's entry.
+
+    Raises QuizAttempt.DoesNotExist for another student's or an unknown
+    attempt and AttemptClosed once it no longer accepts answers.
+    """
+    current = entry(attempt_id)
+    if current is None:
+        if not QuizAttempt.objects.filter(
+            pk=attempt_id, enrollment__student_id=student_id
+        ).exists():
+            raise QuizAttempt.DoesNotExist
+        raise AttemptClosed
+    if current["student"] != student_id:
+        raise QuizAttempt.DoesNotExist
+    if _timed_out(current):
+        raise AttemptClosed
+
+    options = paper(current["quiz"])["options"]
+    valid = {
+        question_id: answer_id
+        for question_id, answer_id in answers.items()
+        if answer_id in options.get(question_id, ())
+    }
+    current["answers"].update(valid)
+    if not caching.is_shared():
+        # No other process could see a cached copy; the database is the copy.
+        write_answers(attempt_id, valid)
+        return current
+    cache.set(cache_key(attempt_id), current, _timeout(current["deadline"]))
+    # add() only succeeds once per interval for every process sharing the cache.
+    if flush and cache.add(
+        _flush_gate_key(attempt_id), 1, settings.QUIZ_FLUSH_INTERVAL
+    ):
+        write_answers(attempt_id, current["answers"])
+    return current
+
+
+def _upsert(rows, fields):
+    """Insert QuizAnswer ``rows`` or update ``fields`` of the existing ones"""
+    options = {"update_conflicts": True, "update_fields": fields}
+    if connection.features.supports_update_conflicts_with_target:
+        options["unique_fields"] = ["attempt", "question"]
+    QuizAnswer.objects.bulk_create(rows, batch_size=500, **options)
+
+
+def write_answers(attempt_id, answers):
+    """Write an open attempt's answers to QuizAnswer; False once it is closed"""
+    with transaction.atomic():
+        # Holding the attempt's row keeps this from landing after grading.
+        still_open = list(
+            QuizAttempt.objects.select_for_update()
+            .filter(pk=attempt_id, status=QuizAttempt.IN_PROGRESS)
+            .values_list("pk", flat=True)
+        )
+        if not still_open:
+            return False
+        if answers:
+            _upsert(
+                [
+                    QuizAnswer(
+                        attempt_id=attempt_id,
+                        question_id=question_id,
+                        selected_answer_id=answer_id,
+                    )
+                    for question_id, answer_id in answers.items()
+                ],
+                ["selected_answer"],
+            )
+    return True
+
+
+def _finish(attempts, status, now):
+    """
+    Grade locked open ``attempts`` (with their enrollments) from their
+    latest answers and close them, in a few statements for the whole batch.
+    """
+    keys = [cache_key(attempt.pk) for attempt in attempts]
+    entries = cache.get_many(keys) if caching.is_shared() else {}
+    stored = defaultdict(dict)
+    missing = [
+        attempt.pk for attempt in attempts if cache_key(attempt.pk) not in entries
+    ]
+    if missing:
+        rows = QuizAnswer.objects.filter(
+            attempt_id__in=missing, selected_answer__isnull=False
+        ).values_list("attempt_id", "question_id", "selected_answer_id")
+        for attempt_id, question_id, answer_id in rows:
+            stored[attempt_id][question_id] = answer_id
+
+    papers = {}
+    answer_rows = []
+    results = defaultdict(lambda: [0, 0])
+    for attempt in attempts:
+        if attempt.quiz_id not in papers:
+            papers[attempt.quiz_id] = paper(attempt.quiz_id)
+        sheet = papers[attempt.quiz_id]
+        cached = entries.get(cache_key(attempt.pk))
+        answers = cached["answers"] if cached else stored[attempt.pk]
+        score = 0
+        for question_id, answer_id in answers.items():
+            if question_id not in sheet["marks"]:
+                # Deleted from the quiz after the attempt started
+                continue
+            correct = answer_id in sheet["correct"][question_id]
+            if correct:
+                score += sheet["marks"][question_id]
+            answer_rows.append(
+                QuizAnswer(
+                    attempt_id=attempt.pk,
+                    question_id=question_id,
+                    selected_answer_id=answer_id,
+                    is_correct=correct,
+                )
+            )
+        total = sum(sheet["marks"].values())
+        attempt.status = status
+        attempt.completed_at = now
+        if status == QuizAttempt.EXPIRED and attempt.deadline:
+            attempt.completed_at = min(now, attempt.deadline)
+        attempt.score = score
+        attempt.total_marks = total
+        attempt.is_passed = bool(total) and (
+            score * 100 >= total * settings.QUIZ_PASS_PERCENT
+        )
+        counts = results[attempt.enrollment.course_id]
+        counts[0] += 1
+        counts[1] += attempt.is_passed
+
+    if answer_rows:
+        _upsert(answer_rows, ["selected_answer", "is_correct"])
+    # bulk_update skips the post_save signal, so the rollups are fed here.
+    QuizAttempt.objects.bulk_update(
+        attempts, ["status", "completed_at", "score", "total_marks", "is_passed"]
+    )
+    for course_id, (count, passes) in results.items():
+        analytics.record_quiz_results(course_id, count, passes)
+    transaction.on_commit(
+        lambda: cache.delete_many(
+            keys + [_flush_gate_key(attempt.pk) for attempt in attempts]
+        )
+    )
+
+
+def submit(attempt_id, student_id):
+    """Grade the student's attempt now; returns it, graded already or not"""
+    with transaction.atomic():
+        attempt = (
+            QuizAttempt.objects.select_for_update(of=("self",))
+            .select_related("enrollment")
+            .get(pk=attempt_id, enrollment__student_id=student_id)
+        )
+        if attempt.status == QuizAttempt.IN_PROGRESS:
+            now = timezone.now()
+            status = QuizAttempt.SUBMITTED
+            grace = timedelta(seconds=settings.QUIZ_GRACE_SECONDS)
+            if attempt.deadline and now > attempt.deadline + grace:
+                status = QuizAttempt.EXPIRED
+            _finish([attempt], status, now)
+    return attempt
+
+
+def sweep(batch_size=SWEEP_BATCH_SIZE, now=None):
+    """Grade open attempts whose time and grace are up; returns how many"""
+    now = now or timezone.now()
+    cutoff = now - timedelta(seconds=settings.QUIZ_GRACE_SECONDS)
+    graded = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                QuizAttempt.objects.select_for_update(of=("self",), skip_locked=True)
+                .select_related("enrollment")
+                .filter(status=QuizAttempt.IN_PROGRESS, deadline__lt=cutoff)
+                .order_by("deadline")[:batch_size]
+            )
+            if batch:
+                _finish(batch, QuizAttempt.EXPIRED, now)
+        graded += len(batch)
+        if len(batch) < batch_size:
+            return graded
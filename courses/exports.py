@@ -0,0 +1,74 @@
+"""
+Constant-memory CSV exports of Enrollment and QuizAttempt rows.
+
+Rows are read with ``values_list(...).iterator(chunk_size=...)`` so no model
+instances are built and only one chunk is held at a time, and each CSV line
+is handed to StreamingHttpResponse as soon as it is formatted.
+"""
+
+import csv
+
+from django.http import StreamingHttpResponse
+
+from .models import Enrollment, QuizAttempt
+
+CHUNK_SIZE = 2000
+
+ENROLLMENT_COLUMNS = [
+    ("id", "enrollment_id"),
+    ("student__username", "student"),
+    ("student__email", "email"),
+    ("course_id", "course_id"),
+    ("course__title", "course"),
+    ("enrolled_at", "enrolled_at"),
+    ("progress", "progress"),
+    ("is_completed", "is_completed"),
+    ("completed_at", "completed_at"),
+]
+
+QUIZ_RESULT_COLUMNS = [
+    ("id", "attempt_id"),
+    ("enrollment__student__username", "student"),
+    ("enrollment__course_id", "course_id"),
+    ("enrollment__course__title", "course"),
+    ("quiz__title", "quiz"),
+    ("started_at", "started_at"),
+    ("completed_at", "completed_at"),
+    ("score", "score"),
+    ("total_marks", "total_marks"),
+    ("is_passed", "is_passed"),
+]
+
+
+class Echo:
+    """File-like object whose write() returns the data instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+
+def _rows(queryset, columns):
+    writer = csv.writer(Echo())
+    yield writer.writerow([header for _, header in columns])
+    fields = [field for field, _ in columns]
+    rows = queryset.order_by("pk").values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def csv_response(queryset, columns, filename):
+    response = StreamingHttpResponse(_rows(queryset, columns), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def enrollments_csv(queryset=None):
+    if queryset is None:
+        queryset = Enrollment.objects.all()
+    return csv_response(queryset, ENROLLMENT_COLUMNS, "enrollments.csv")
+
+
+def quiz_results_csv(queryset=None):
+    if queryset is None:
+        queryset = QuizAttempt.objects.all()
+    return csv_response(queryset, QUIZ_RESULT_COLUMNS, "quiz_results.csv")
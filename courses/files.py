@@ -0,0 +1,92 @@
+"""
+Serving stored files with HTTP byte-range support.
+
+Browsers' PDF viewers fetch a linearized PDF in pieces: the first request
+returns the first-page data and the cross-reference hints, later ones the
+ranges needed for the pages being viewed. ``ranged_file_response`` answers
+a single ``Range: bytes=...`` request with 206 Partial Content and honours
+``If-Range`` so a file replaced between requests is sent whole.
+"""
+
+import re
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date, quote_etag
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header, size):
+    """
+    Return ``(start, end)`` (inclusive) for a single byte range, None when
+    the header should be ignored, or False when the range can't be satisfied.
+    """
+    match = RANGE_RE.match((header or "").strip())
+    if not match:
+        # Multiple ranges or another unit: send the whole file.
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        length = int(last)
+        if not length:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read(file, start, length):
+    file.seek(start)
+    try:
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def ranged_file_response(request, storage, name, content_type, filename=None):
+    """Stream the stored file ``name``, or the byte range the request asks for"""
+    size = storage.size(name)
+    etag = quote_etag(f"{name}:{size}".replace('"', ""))
+    try:
+        modified = storage.get_modified_time(name)
+    except NotImplementedError:
+        modified = None
+
+    byte_range = None
+    if request.method == "GET":
+        if_range = request.headers.get("If-Range")
+        if not if_range or if_range == etag:
+            byte_range = parse_range(request.headers.get("Range"), size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+    else:
+        start, end = byte_range or (0, size - 1)
+        length = end - start + 1 if size else 0
+        file = storage.open(name, "rb")
+        response = StreamingHttpResponse(
+            _read(file, start, length), content_type=content_type
+        )
+        response["Content-Length"] = str(length)
+        if byte_range:
+            response.status_code = 206
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    if modified:
+        response["Last-Modified"] = http_date(modified.timestamp())
+    if filename:
+        response["Content-Disposition"] = f'inline; filename="{filename}"'
+    return response
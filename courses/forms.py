@@ -1,5 +1,7 @@
 from django import forms
-from .models import Course, Lesson, Quiz
+from django.core.exceptions import ValidationError
+
+from .models import Announcement, Course, Lesson, Quiz
 
 
 class CourseForm(forms.ModelForm):
@@ -54,6 +56,47 @@ class LessonForm(forms.ModelForm):
         }
 
 
+class BaseLessonOrderFormSet(forms.BaseModelFormSet):
+    ordering_widget = forms.HiddenInput
+
+    def clean(self):
+        super().clean()
+        submitted = {form.instance.pk for form in self.forms}
+        if submitted != {lesson.pk for lesson in self.get_queryset()}:
+            raise ValidationError(
+                "Lessons were added or removed while you were editing. "
+                "Reload the page and try again."
+            )
+
+
+# Every lesson of a course in one submission; see courses/ordering.py
+LessonOrderFormSet = forms.modelformset_factory(
+    Lesson,
+    formset=BaseLessonOrderFormSet,
+    fields=["title", "duration", "is_preview"],
+    extra=0,
+    edit_only=True,
+    can_order=True,
+    widgets={
+        "title": forms.TextInput(attrs={"class": "form-control form-control-sm"}),
+        "duration": forms.NumberInput(
+            attrs={"class": "form-control form-control-sm", "min": 0}
+        ),
+        "is_preview": forms.CheckboxInput(attrs={"class": "form-check-input"}),
+    },
+)
+
+
+class AnnouncementForm(forms.ModelForm):
+    class Meta:
+        model = Announcement
+        fields = ["title", "message"]
+        widgets = {
+            "title": forms.TextInput(attrs={"class": "form-control"}),
+            "message": forms.Textarea(attrs={"class": "form-control", "rows": 3}),
+        }
+
+
 class QuizForm(forms.ModelForm):
     class Meta:
         model = Quiz
@@ -63,3 +106,10 @@ class QuizForm(forms.ModelForm):
             "instructions": forms.Textarea(attrs={"class": "form-control", "rows": 3}),
             "time_limit": forms.NumberInput(attrs={"class": "form-control", "min": 1}),
         }
+
+
+class CoursePackageForm(forms.Form):
+    package = forms.FileField(
+        help_text="A .jsonl course package exported from EduSmart",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control"}),
+    )
@@ -0,0 +1,105 @@
+"""
+Conditional GET for catalog pages.
+
+A page validator runs one aggregate query for the newest ``updated_at`` of
+the content a page shows and derives its ETag and Last-Modified from it, so
+a revalidating browser gets a 304 before the view queries or renders
+anything. ETags also cover the viewer and the template sources, because both
+change the HTML without touching the data.
+"""
+
+import hashlib
+from functools import lru_cache, wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from . import catalog, publishing
+from .models import Course, Enrollment
+
+
+@lru_cache(maxsize=None)
+def _templates_modified():
+    """Newest template mtime, so a deploy that changes markup changes ETags"""
+    newest = 0.0
+    for directory in settings.TEMPLATES[0]["DIRS"]:
+        for path in Path(directory).rglob("*.html"):
+            newest = max(newest, path.stat().st_mtime)
+    return newest
+
+
+def _validators(request, latest, *parts):
+    """Return ``(etag, last_modified)`` for a page, or ``(None, None)``"""
+    if latest is None or len(get_messages(request)):
+        # Missing content 404s in the view; queued flash messages must render.
+        return None, None
+    user = request.user.pk if request.user.is_authenticated else None
+    signature = repr((latest.isoformat(), parts, user, _templates_modified()))
+    etag = hashlib.md5(signature.encode()).hexdigest()
+    # Last-Modified can't tell viewers apart, so only anonymous pages get one.
+    return etag, None if user else latest
+
+
+def conditional_page(validator):
+    """
+    Decorator applying ``condition`` with validators computed once per
+    request by ``validator(request, *args, **kwargs)``. Responses must be
+    revalidated before reuse.
+    """
+
+    def decorator(view):
+        def cached(request, *args, **kwargs):
+            if not hasattr(request, "_page_validators"):
+                request._page_validators = validator(request, *args, **kwargs)
+            return request._page_validators
+
+        conditional_view = condition(
+            etag_func=lambda *args, **kwargs: cached(*args, **kwargs)[0],
+            last_modified_func=lambda *args, **kwargs: cached(*args, **kwargs)[1],
+        )(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.has_header("ETag"):
+                patch_cache_control(response, no_cache=True)
+                if request.user.is_authenticated:
+                    patch_cache_control(response, private=True)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def course_list_validators(request):
+    filters, search = catalog.parse_filters(request.GET)
+    courses = catalog.filter_courses(
+        Course.objects.filter(is_published=True), filters, search
+    )
+    row = courses.aggregate(latest=Max("updated_at"), total=Count("pk"))
+    return _validators(
+        request, row["latest"], row["total"], catalog.current_generation()
+    )
+
+
+def course_detail_validators(request, slug):
+    publication = publishing.for_request(request, slug=slug)
+    if publication is None:
+        return None, None
+    enrolled = None
+    if request.user.is_authenticated and request.user.user_type == "student":
+        enrolled = Enrollment.objects.filter(
+            student=request.user, course_id=publication.pk
+        ).exists()
+    return _validators(
+        request,
+        publication.updated_at,
+        publication.version,
+        publication.students,
+        enrolled,
+    )
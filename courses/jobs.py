@@ -0,0 +1,153 @@
+"""
+Database-backed queue for background processing of lesson files.
+
+Each kind of derived media (HLS renditions, PDF previews) keeps three
+columns on Lesson: ``<kind>_source`` (the content_file name the status
+refers to), ``<kind>_status`` and ``<kind>_error``. Lesson.save() resets the
+status to pending when the stored file changes. Every transition is a
+conditional UPDATE on the source name, so concurrent workers never claim
+the same lesson and results for a file that was replaced meanwhile are
+dropped.
+
+``run`` is the worker loop shared by the ``transcode_videos`` and
+``process_pdfs`` commands: it claims lessons, runs a job for each in a pool
+of spawned processes and records the outcome.
+"""
+
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from hashlib import sha1
+from pathlib import Path
+
+import django
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+from .models import Lesson, get_lesson_upload_path
+
+ERROR_LENGTH = 1000
+
+
+class LessonQueue:
+    def __init__(self, kind):
+        self.kind = kind
+        self.source = f"{kind}_source"
+        self.status = f"{kind}_status"
+        self.error = f"{kind}_error"
+
+    def claim(self, limit):
+        """Move up to ``limit`` pending lessons to processing and return them"""
+        claimed = []
+        candidates = Lesson.objects.filter(**{self.status: Lesson.PENDING})
+        rows = candidates.values_list("pk", "course_id", self.source)
+        for pk, course_id, source in rows[: limit * 2]:
+            won = Lesson.objects.filter(
+                pk=pk, **{self.status: Lesson.PENDING, self.source: source}
+            ).update(**{self.status: Lesson.PROCESSING, self.error: ""})
+            if won:
+                claimed.append((pk, course_id, source))
+                if len(claimed) == limit:
+                    break
+        return claimed
+
+    def complete(self, lesson_id, source, **fields):
+        """Mark a lesson ready with ``fields``; False if its file changed"""
+        return bool(
+            Lesson.objects.filter(pk=lesson_id, **{self.source: source}).update(
+                **{self.status: Lesson.READY}, **fields
+            )
+        )
+
+    def fail(self, lesson_id, source, error):
+        Lesson.objects.filter(pk=lesson_id, **{self.source: source}).update(
+            **{self.status: Lesson.FAILED, self.error: str(error)[:ERROR_LENGTH]}
+        )
+
+    def requeue_interrupted(self):
+        """Return lessons left processing by a worker that died to the queue"""
+        return Lesson.objects.filter(**{self.status: Lesson.PROCESSING}).update(
+            **{self.status: Lesson.PENDING}
+        )
+
+
+def output_prefix(folder, lesson_id, course_id, source):
+    """Storage directory for the files derived from one source file"""
+    version = sha1(source.encode()).hexdigest()[:12]
+    lesson = Lesson(pk=lesson_id, course_id=course_id)
+    return f"{get_lesson_upload_path(lesson, '')}{folder}/{lesson_id}/{version}/"
+
+
+def local_copy(source, workdir):
+    """Filesystem path of a stored file, downloading it into ``workdir`` if needed"""
+    try:
+        return default_storage.path(source)
+    except NotImplementedError:
+        local = os.path.join(workdir, "source" + Path(source).suffix)
+        with default_storage.open(source) as remote, open(local, "wb") as f:
+            shutil.copyfileobj(remote, f, 1024 * 1024)
+        return local
+
+
+def upload_tree(local_dir, prefix):
+    """Replace the storage directory ``prefix`` with the files in ``local_dir``"""
+    delete_tree(prefix)
+    for path in sorted(Path(local_dir).rglob("*")):
+        if path.is_file():
+            with open(path, "rb") as f:
+                default_storage.save(
+                    prefix + path.relative_to(local_dir).as_posix(), File(f)
+                )
+
+
+def delete_tree(prefix):
+    if not default_storage.exists(prefix):
+        return
+    directories, files = default_storage.listdir(prefix)
+    for name in files:
+        default_storage.delete(prefix + name)
+    for directory in directories:
+        delete_tree(f"{prefix}{directory}/")
+
+
+def directory_of(name):
+    return name.rsplit("/", 1)[0] + "/"
+
+
+def run(queue, prepare, job, finish, workers, interval, once=False, log=print):
+    """
+    Worker loop. For every claimed ``(lesson_id, course_id, source)``,
+    ``prepare`` returns the arguments of ``job``, which runs in a worker
+    process; ``finish(lesson_id, source, result)`` records its result.
+    """
+    # Spawned (not forked) workers never share this process's database
+    # connection; they only need settings for file storage.
+    context = multiprocessing.get_context("spawn")
+    running = {}
+    with ProcessPoolExecutor(
+        workers, mp_context=context, initializer=django.setup
+    ) as pool:
+        while True:
+            for lesson_id, course_id, source in queue.claim(workers - len(running)):
+                args = prepare(lesson_id, course_id, source)
+                running[pool.submit(job, *args)] = (lesson_id, source)
+
+            if not running:
+                if once:
+                    return
+                time.sleep(interval)
+                continue
+
+            done, _ = wait(running, timeout=interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                lesson_id, source = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    queue.fail(lesson_id, source, e)
+                    log(f"Lesson {lesson_id}: {queue.kind} processing failed: {e}")
+                else:
+                    if finish(lesson_id, source, result):
+                        log(f"Lesson {lesson_id}: {queue.kind} ready")
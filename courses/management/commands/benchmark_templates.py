@@ -0,0 +1,65 @@
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from courses import views
+
+PRIVATE_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "benchmark-templates",
+    }
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure render time per listing page with cold and warm course card "
+        "caches. Uses the configured database; run seed_data first. Caches go "
+        "to a private local-memory cache, never the configured one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=50,
+            help="Renders per page and mode (default: 50)",
+        )
+
+    def handle(self, *args, **options):
+        # The cold runs clear the cache; the configured one is shared with
+        # the site (autosaves, throttling, dashboards) and must not be.
+        with override_settings(CACHES=PRIVATE_CACHES):
+            self.measure(options["iterations"])
+
+    def measure(self, iterations):
+        factory = RequestFactory()
+        pages = [
+            ("home", views.home, "/"),
+            ("course_list", views.course_list, "/courses/"),
+            ("course_list page 2", views.course_list, "/courses/?page=2"),
+        ]
+
+        self.stdout.write(f"{'page':<22}{'cold ms':>10}{'warm ms':>10}")
+        for name, view, path in pages:
+            timings = {}
+            for mode in ("cold", "warm"):
+                samples = []
+                for _ in range(iterations):
+                    if mode == "cold":
+                        cache.clear()
+                    request = factory.get(path)
+                    request.user = AnonymousUser()
+                    started = time.perf_counter()
+                    view(request)
+                    samples.append((time.perf_counter() - started) * 1000)
+                timings[mode] = statistics.median(samples)
+            self.stdout.write(
+                f"{name:<22}{timings['cold']:>10.2f}{timings['warm']:>10.2f}"
+            )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import events
+
+
+class Command(BaseCommand):
+    help = (
+        "Relay live events between processes at EVENTS_BROKER (host:port or "
+        "unix:/path); see courses/events.py"
+    )
+
+    def handle(self, *args, **options):
+        address = events.broker_address()
+        if address is None:
+            raise CommandError("Set EVENTS_BROKER to the address to listen on")
+        self.stdout.write(f"Relaying events on {address[1]}")
+        try:
+            events.serve_broker(address)
+        except KeyboardInterrupt:
+            pass
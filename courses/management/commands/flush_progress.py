@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from courses import progress
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply buffered lesson progress segments, including those left behind "
+        "by processes that exited without flushing"
+    )
+
+    def handle(self, *args, **options):
+        applied = progress.drain()
+        self.stdout.write(self.style.SUCCESS(f"Applied {applied} progress events"))
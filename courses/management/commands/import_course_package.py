@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.packages import PackageError, import_course
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Import a JSON Lines course package as a draft course"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to the .jsonl package")
+        parser.add_argument(
+            "--instructor",
+            required=True,
+            help="Username of the instructor who will own the course",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            instructor = User.objects.get(
+                username=options["instructor"], user_type="instructor"
+            )
+        except User.DoesNotExist:
+            raise CommandError(f"No instructor named {options['instructor']!r}")
+
+        try:
+            with open(options["path"], "rb") as package:
+                course, counts = import_course(package, instructor)
+        except (OSError, PackageError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Imported "{course.title}" (id {course.id}): '
+                f'{counts["lesson"]} lessons, {counts["quiz"]} quizzes, '
+                f'{counts["question"]} questions, {counts["answer"]} answers'
+            )
+        )
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import jobs, pdfs
+
+
+class Command(BaseCommand):
+    help = (
+        "Extract page counts, text and previews of pending PDF lessons. Runs until "
+        "interrupted unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help="Worker processes (default: 2)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=10,
+            help="Seconds between polls for new work (default: 10)",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no pending lessons are left",
+        )
+        parser.add_argument(
+            "--requeue",
+            action="store_true",
+            help="First requeue lessons left processing by a worker that died",
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        if workers < 1:
+            raise CommandError("--workers must be at least 1")
+        if options["requeue"]:
+            count = pdfs.queue.requeue_interrupted()
+            self.stdout.write(f"Requeued {count} interrupted lessons")
+
+        jobs.run(
+            pdfs.queue,
+            pdfs.prepare,
+            pdfs.process,
+            pdfs.finish,
+            workers,
+            options["interval"],
+            once=options["once"],
+            log=self.stdout.write,
+        )
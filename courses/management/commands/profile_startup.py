@@ -0,0 +1,120 @@
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What each target runs in a fresh interpreter
+TARGETS = {
+    "setup": ["-c", "import django; django.setup()"],
+    "manage": ["manage.py", "check"],
+    "wsgi": ["-c", "import elearning.wsgi"],
+}
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Report cold-start time and the slowest imports (python -X importtime) "
+        "of django.setup(), manage.py and the WSGI application"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "targets",
+            nargs="*",
+            help=f"What to profile: {', '.join(TARGETS)} (default: all)",
+        )
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=5,
+            help="Cold starts per target; the fastest time per module is kept "
+            "(default: 5)",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=15,
+            help="Modules and packages to list (default: 15)",
+        )
+
+    def handle(self, *args, **options):
+        if options["runs"] < 1:
+            raise CommandError("--runs must be at least 1")
+        unknown = set(options["targets"]) - set(TARGETS)
+        if unknown:
+            raise CommandError(f"Unknown target: {', '.join(sorted(unknown))}")
+        for target in options["targets"] or TARGETS:
+            wall, modules = self._profile(target, options["runs"])
+            total = sum(own for own, _ in modules.values())
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{target}: {wall * 1000:.0f} ms cold start, "
+                    f"{total / 1000:.0f} ms importing {len(modules)} modules"
+                )
+            )
+            self._table(
+                "module",
+                sorted(modules.items(), key=lambda item: -item[1][0]),
+                options["top"],
+            )
+            packages = defaultdict(lambda: [0, 0])
+            for name, (own, _) in modules.items():
+                packages[name.partition(".")[0]][0] += own
+            self._table(
+                "package",
+                sorted(packages.items(), key=lambda item: -item[1][0]),
+                options["top"],
+                cumulative=False,
+            )
+            self.stdout.write("")
+
+    def _profile(self, target, runs):
+        """Fastest wall time and ``{module: (self us, cumulative us)}`` over runs"""
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": os.environ.get(
+                "DJANGO_SETTINGS_MODULE", "elearning.settings"
+            ),
+        }
+        walls, modules = [], {}
+        for _ in range(runs):
+            started = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", *TARGETS[target]],
+                cwd=settings.BASE_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            walls.append(time.perf_counter() - started)
+            if result.returncode:
+                raise CommandError(f"{target} failed:\n{result.stderr[-2000:]}")
+            for line in result.stderr.splitlines():
+                match = IMPORT_LINE.match(line)
+                if match:
+                    own, cumulative, name = (
+                        int(match[1]),
+                        int(match[2]),
+                        match[4],
+                    )
+                    best = modules.get(name)
+                    if best is None or own < best[0]:
+                        modules[name] = (own, cumulative)
+        return min(walls), modules
+
+    def _table(self, label, rows, top, cumulative=True):
+        header = f"  {label:<48}{'self ms':>9}"
+        if cumulative:
+            header += f"{'cumul. ms':>11}"
+        self.stdout.write(header)
+        for name, (own, total) in rows[:top]:
+            line = f"  {name:<48}{own / 1000:>9.1f}"
+            if cumulative:
+                line += f"{total / 1000:>11.1f}"
+            self.stdout.write(line)
@@ -0,0 +1,121 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from courses.models import (
+    Course,
+    CourseDailyStats,
+    CourseStats,
+    Enrollment,
+    InstructorStats,
+    QuizAttempt,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the materialized analytics tables from Enrollment and "
+        "QuizAttempt. Normally they are kept up to date incrementally; run this "
+        "after bulk imports or to backfill history."
+    )
+
+    def handle(self, *args, **options):
+        course_rows = {}
+        daily_rows = {}
+
+        def course_row(course_id):
+            return course_rows.setdefault(course_id, CourseStats(course_id=course_id))
+
+        def daily_row(course_id, date):
+            key = (course_id, date)
+            if key not in daily_rows:
+                daily_rows[key] = CourseDailyStats(course_id=course_id, date=date)
+            return daily_rows[key]
+
+        enrollment_totals = Enrollment.objects.values("course_id").annotate(
+            total=Count("id"),
+            done=Count("id", filter=Q(is_completed=True)),
+            progress=Sum("progress"),
+        )
+        for row in enrollment_totals:
+            stats = course_row(row["course_id"])
+            stats.enrollments = row["total"]
+            stats.completions = row["done"]
+            stats.progress_sum = row["progress"] or 0
+
+        attempts = QuizAttempt.objects.filter(completed_at__isnull=False)
+        attempt_totals = attempts.values("enrollment__course_id").annotate(
+            total=Count("id"), passed=Count("id", filter=Q(is_passed=True))
+        )
+        for row in attempt_totals:
+            stats = course_row(row["enrollment__course_id"])
+            stats.quiz_attempts = row["total"]
+            stats.quiz_passes = row["passed"]
+
+        by_day = (
+            Enrollment.objects.annotate(day=TruncDate("enrolled_at"))
+            .values("course_id", "day")
+            .annotate(total=Count("id"))
+        )
+        for row in by_day:
+            daily_row(row["course_id"], row["day"]).new_enrollments = row["total"]
+
+        by_day = (
+            Enrollment.objects.filter(completed_at__isnull=False)
+            .annotate(day=TruncDate("completed_at"))
+            .values("course_id", "day")
+            .annotate(total=Count("id"))
+        )
+        for row in by_day:
+            daily_row(row["course_id"], row["day"]).completions = row["total"]
+
+        by_day = (
+            attempts.annotate(day=TruncDate("completed_at"))
+            .values("enrollment__course_id", "day")
+            .annotate(total=Count("id"), passed=Count("id", filter=Q(is_passed=True)))
+        )
+        for row in by_day:
+            daily = daily_row(row["enrollment__course_id"], row["day"])
+            daily.quiz_attempts = row["total"]
+            daily.quiz_passes = row["passed"]
+
+        # Historical averages are not recoverable; only today's snapshot is.
+        today = timezone.localdate()
+        for stats in course_rows.values():
+            daily = daily_row(stats.course_id, today)
+            daily.course_average_progress = stats.average_progress
+
+        instructors = dict(Course.objects.values_list("id", "instructor_id"))
+        instructor_rows = {}
+        for stats in course_rows.values():
+            instructor_id = instructors[stats.course_id]
+            rollup = instructor_rows.setdefault(
+                instructor_id, InstructorStats(instructor_id=instructor_id)
+            )
+            for field in (
+                "enrollments",
+                "completions",
+                "progress_sum",
+                "quiz_attempts",
+                "quiz_passes",
+            ):
+                setattr(rollup, field, getattr(rollup, field) + getattr(stats, field))
+
+        with transaction.atomic():
+            CourseDailyStats.objects.all().delete()
+            CourseStats.objects.all().delete()
+            InstructorStats.objects.all().delete()
+            CourseStats.objects.bulk_create(course_rows.values(), batch_size=1000)
+            CourseDailyStats.objects.bulk_create(daily_rows.values(), batch_size=1000)
+            InstructorStats.objects.bulk_create(
+                instructor_rows.values(), batch_size=1000
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt analytics for {len(course_rows)} courses, "
+                f"{len(daily_rows)} course-days and {len(instructor_rows)} instructors"
+            )
+        )
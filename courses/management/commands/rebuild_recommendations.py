@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import recommendations
+
+
+class Command(BaseCommand):
+    help = "Recompute co-enrollment course recommendations (requires numpy and scipy)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top-k",
+            type=int,
+            default=20,
+            help="Neighbours to keep per course (default: 20)",
+        )
+
+    def handle(self, *args, **options):
+        if options["top_k"] < 1:
+            raise CommandError("--top-k must be at least 1")
+
+        started = time.monotonic()
+        try:
+            count = recommendations.rebuild(top_k=options["top_k"])
+        except ImportError as e:
+            raise CommandError(
+                f"{e}. Install numpy and scipy to build recommendations."
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Stored {count} recommendations in {time.monotonic() - started:.1f}s"
+            )
+        )
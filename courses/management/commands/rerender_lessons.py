@@ -0,0 +1,76 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import rendering
+from courses.models import Lesson
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-render stale lesson content (after a renderer upgrade or an import "
+        "that bypassed Lesson.save) in a pool of worker processes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes (default: one per CPU)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Lessons rendered and written per batch (default: 500)",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-render every lesson, not only stale ones",
+        )
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--workers and --batch-size must be at least 1")
+
+        started = time.monotonic()
+        rendered = 0
+        with ProcessPoolExecutor(options["workers"]) as pool:
+            for batch in self._stale_batches(options["batch_size"], options["all"]):
+                texts = [lesson.content_text for lesson in batch]
+                results = pool.map(rendering.render, texts, chunksize=25)
+                for lesson, result in zip(batch, results):
+                    lesson.content_html, lesson.word_count, lesson.reading_minutes = (
+                        result
+                    )
+                    lesson.content_hash = rendering.content_hash(lesson.content_text)
+                Lesson.objects.bulk_update(batch, rendering.RENDERED_FIELDS)
+                rendered += len(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Re-rendered {rendered} lessons in {time.monotonic() - started:.1f}s"
+            )
+        )
+
+    def _stale_batches(self, size, everything):
+        """Walk lessons in primary key order, yielding the stale ones in batches"""
+        lessons = Lesson.objects.only("id", "content_text", "content_hash")
+        last_pk = 0
+        while True:
+            chunk = list(lessons.filter(pk__gt=last_pk).order_by("pk")[:size])
+            if not chunk:
+                return
+            last_pk = chunk[-1].pk
+            stale = [
+                lesson
+                for lesson in chunk
+                if everything
+                or lesson.content_hash != rendering.content_hash(lesson.content_text)
+            ]
+            if stale:
+                yield stale
@@ -3,8 +3,10 @@ import random
 from datetime import datetime, timedelta
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.utils import timezone
 from django.db import transaction
+from courses import publishing
 from courses.models import Category, Course, Lesson, Enrollment, Quiz, Question, Answer
 from accounts.models import User
 import logging
@@ -13,6 +15,8 @@ User = get_user_model()
 
 logger = logging.getLogger(__name__)
 
+DEMO_PASSWORD = "demo123"
+
 
 class Command(BaseCommand):
     help = "Create demo data for courses, categories, users, lessons, and enrollments"
@@ -60,6 +64,10 @@ class Command(BaseCommand):
         if clean:
             self._clean_demo_data()
 
+        # Demo accounts share one password, hashed once with the fast hasher;
+        # Django rehashes it with the configured hasher at each first login.
+        self.demo_password = make_password(DEMO_PASSWORD, hasher="md5")
+
         try:
             with transaction.atomic():
                 # Create categories
@@ -87,6 +95,10 @@ class Command(BaseCommand):
                     self.style.SUCCESS(f"Created {lessons_count} lessons")
                 )
 
+                # Publish the courses with their lessons
+                for course in courses:
+                    publishing.publish(course)
+
                 # Create quizzes (FIXED VERSION)
                 quizzes_count = self._create_quizzes_fixed(courses)
                 self.stdout.write(
@@ -176,12 +188,12 @@ class Command(BaseCommand):
         """Create demo instructors"""
         instructors = []
         for i in range(count):
-            instructor = User.objects.create_user(
+            instructor = User(
                 username=f"demo_instructor_{i+1}",
                 email=f"demo_instructor_{i+1}@edusmart.com",
                 first_name=f"Instructor",
                 last_name=f"User {i+1}",
-                password="demo123",
+                password=self.demo_password,
                 user_type="instructor",
             )
             instructor.bio = f"Experienced instructor with {random.randint(5, 15)} years in teaching {random.choice(['Python', 'Web Development', 'Data Science', 'Design'])}"
@@ -208,12 +220,12 @@ class Command(BaseCommand):
         """Create demo students"""
         students = []
         for i in range(count):
-            student = User.objects.create_user(
+            student = User.objects.create(
                 username=f"demo_student_{i+1}",
                 email=f"demo_student_{i+1}@edusmart.com",
                 first_name=f"Student",
                 last_name=f"User {i+1}",
-                password="demo123",
+                password=self.demo_password,
                 user_type="student",
             )
             students.append(student)
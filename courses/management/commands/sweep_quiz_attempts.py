@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses import exams
+
+
+class Command(BaseCommand):
+    help = (
+        "Submit and grade quiz attempts whose time limit is up. Runs until "
+        "interrupted unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=10,
+            help="Seconds between sweeps (default: 10)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=exams.SWEEP_BATCH_SIZE,
+            help="Attempts graded per transaction "
+            f"(default: {exams.SWEEP_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Sweep once and exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        while True:
+            graded = exams.sweep(options["batch_size"])
+            if graded or options["once"]:
+                self.stdout.write(f"Graded {graded} expired attempts")
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
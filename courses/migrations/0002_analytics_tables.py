@@ -0,0 +1,97 @@
+# Generated by Django 4.2.16 on 2026-10-19 08:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("courses", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CourseStats",
+            fields=[
+                (
+                    "course",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="courses.course",
+                    ),
+                ),
+                ("enrollments", models.PositiveIntegerField(default=0)),
+                ("completions", models.PositiveIntegerField(default=0)),
+                ("progress_sum", models.BigIntegerField(default=0)),
+                ("quiz_attempts", models.PositiveIntegerField(default=0)),
+                ("quiz_passes", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "Course stats",
+            },
+        ),
+        migrations.CreateModel(
+            name="InstructorStats",
+            fields=[
+                (
+                    "instructor",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="teaching_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("enrollments", models.PositiveIntegerField(default=0)),
+                ("completions", models.PositiveIntegerField(default=0)),
+                ("progress_sum", models.BigIntegerField(default=0)),
+                ("quiz_attempts", models.PositiveIntegerField(default=0)),
+                ("quiz_passes", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "Instructor stats",
+            },
+        ),
+        migrations.CreateModel(
+            name="CourseDailyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("new_enrollments", models.PositiveIntegerField(default=0)),
+                ("completions", models.PositiveIntegerField(default=0)),
+                ("average_progress", models.FloatField(default=0)),
+                ("quiz_attempts", models.PositiveIntegerField(default=0)),
+                ("quiz_passes", models.PositiveIntegerField(default=0)),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="courses.course",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Course daily stats",
+                "ordering": ["-date"],
+                "unique_together": {("course", "date")},
+            },
+        ),
+    ]
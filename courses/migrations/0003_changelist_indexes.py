@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-19 08:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0002_analytics_tables"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(
+                fields=["-enrolled_at"], name="courses_enr_enrolle_fe4f7d_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="quizattempt",
+            index=models.Index(
+                fields=["-started_at"], name="courses_qui_started_0376c9_idx"
+            ),
+        ),
+    ]
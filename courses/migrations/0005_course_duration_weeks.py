@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-19 08:48
+
+from django.db import migrations, models
+
+import courses.models
+
+
+def fill_duration_weeks(apps, schema_editor):
+    Course = apps.get_model("courses", "Course")
+    batch = []
+    for course in Course.objects.only("duration").iterator(chunk_size=2000):
+        course.duration_weeks = courses.models.parse_duration_weeks(course.duration)
+        batch.append(course)
+        if len(batch) >= 2000:
+            Course.objects.bulk_update(batch, ["duration_weeks"])
+            batch = []
+    Course.objects.bulk_update(batch, ["duration_weeks"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0004_course_recommendations"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="duration_weeks",
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_duration_weeks, migrations.RunPython.noop),
+    ]
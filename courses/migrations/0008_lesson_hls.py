@@ -0,0 +1,49 @@
+# Generated by Django 4.2.16 on 2026-10-19 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0007_lesson_rendered_content"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="lesson",
+            name="hls_playlist",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="lesson",
+            name="video_error",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="lesson",
+            name="video_source",
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="lesson",
+            name="video_status",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("pending", "Pending"),
+                    ("processing", "Processing"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                editable=False,
+                max_length=20,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lesson",
+            index=models.Index(
+                fields=["video_status"], name="courses_les_video_s_3806bd_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 09:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0009_lesson_pdf_metadata"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="enrollment",
+            name="last_activity_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.16 on 2026-10-19 09:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0010_enrollment_last_activity_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="enrollment",
+            name="last_lesson",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="courses.lesson",
+            ),
+        ),
+        migrations.AddField(
+            model_name="enrollment",
+            name="last_position",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Seconds into the last lesson"
+            ),
+        ),
+    ]
@@ -0,0 +1,157 @@
+# Generated by Django 4.2.16 on 2026-10-19 09:29
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+# A frozen copy of courses.publishing as of this migration (document format
+# 1), so later changes to the live module don't change what it writes.
+def _url(field):
+    return field.url if field else ""
+
+
+def _storage_url(name):
+    return default_storage.url(name) if name else ""
+
+
+def lesson_entry(lesson):
+    minutes = lesson.duration
+    if lesson.lesson_type == "text" and lesson.reading_minutes:
+        minutes = lesson.reading_minutes
+    return {
+        "id": lesson.pk,
+        "title": lesson.title,
+        "slug": lesson.slug,
+        "lesson_type": lesson.lesson_type,
+        "order": lesson.order,
+        "duration": lesson.duration,
+        "minutes": minutes,
+        "reading_minutes": lesson.reading_minutes,
+        "word_count": lesson.word_count,
+        "is_preview": lesson.is_preview,
+        "content_html": lesson.content_html,
+        "file_url": _url(lesson.content_file),
+        "hls_url": _storage_url(
+            lesson.hls_playlist if lesson.video_status == "ready" else ""
+        ),
+        "pdf_preview_url": _storage_url(
+            lesson.pdf_preview if lesson.pdf_status == "ready" else ""
+        ),
+        "page_count": lesson.page_count,
+    }
+
+
+def build_document(course, lessons):
+    instructor = course.instructor
+    entries = [lesson_entry(lesson) for lesson in lessons]
+    by_type = {}
+    for entry in entries:
+        by_type[entry["lesson_type"]] = by_type.get(entry["lesson_type"], 0) + 1
+    return {
+        "format": 1,
+        "course": {
+            "id": course.pk,
+            "title": course.title,
+            "slug": course.slug,
+            "description": course.description,
+            "short_description": course.short_description,
+            "level": course.level,
+            "duration": course.duration,
+            "price": str(course.price),
+            "is_free": not course.price,
+            "thumbnail_url": _url(course.thumbnail),
+            "category": {"name": course.category.name, "slug": course.category.slug},
+            "instructor": {
+                "id": instructor.pk,
+                "first_name": instructor.first_name,
+                "last_name": instructor.last_name,
+                "user_type": instructor.user_type,
+                "bio": instructor.bio,
+                "profile_picture_url": _url(instructor.profile_picture),
+            },
+        },
+        "lessons": entries,
+        "counts": {
+            "lessons": len(entries),
+            "previews": sum(entry["is_preview"] for entry in entries),
+            "minutes": sum(entry["minutes"] for entry in entries),
+            "by_type": by_type,
+        },
+    }
+
+
+def publish_existing(apps, schema_editor):
+    """Courses live before drafts existed are published as they stand"""
+    Course = apps.get_model("courses", "Course")
+    Lesson = apps.get_model("courses", "Lesson")
+    CoursePublication = apps.get_model("courses", "CoursePublication")
+    now = timezone.now()
+    published = (
+        Course.objects.filter(is_published=True)
+        .select_related("category", "instructor")
+        .prefetch_related(
+            models.Prefetch("lessons", Lesson.objects.order_by("order", "pk"))
+        )
+    )
+    batch = []
+    for course in published.iterator(chunk_size=500):
+        document = build_document(course, course.lessons.all())
+        batch.append(
+            CoursePublication(
+                course=course,
+                slug=course.slug,
+                version=1,
+                document=document,
+                published_at=now,
+                updated_at=now,
+            )
+        )
+        if len(batch) >= 500:
+            CoursePublication.objects.bulk_create(batch)
+            batch = []
+    CoursePublication.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("courses", "0012_announcement"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CoursePublication",
+            fields=[
+                (
+                    "course",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="publication",
+                        serialize=False,
+                        to="courses.course",
+                    ),
+                ),
+                ("slug", models.SlugField(unique=True)),
+                ("version", models.PositiveIntegerField()),
+                ("document", models.JSONField()),
+                ("published_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                (
+                    "published_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(publish_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.16 on 2026-10-19 09:35
+
+from django.db import migrations, models
+
+
+def drop_duplicate_answers(apps, schema_editor):
+    """Keep the latest answer per attempt and question"""
+    QuizAnswer = apps.get_model("courses", "QuizAnswer")
+    latest = (
+        QuizAnswer.objects.values("attempt", "question")
+        .annotate(keep=models.Max("pk"), count=models.Count("pk"))
+        .filter(count__gt=1)
+    )
+    for row in latest.iterator():
+        QuizAnswer.objects.filter(
+            attempt=row["attempt"], question=row["question"], pk__lt=row["keep"]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0013_course_publication"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quizattempt",
+            name="deadline",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="quizattempt",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("in_progress", "In progress"),
+                    ("submitted", "Submitted"),
+                    ("expired", "Submitted automatically"),
+                ],
+                # Attempts from before drafts existed count as submitted.
+                default="submitted",
+                max_length=20,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="quizattempt",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("in_progress", "In progress"),
+                    ("submitted", "Submitted"),
+                    ("expired", "Submitted automatically"),
+                ],
+                default="in_progress",
+                max_length=20,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="quizattempt",
+            index=models.Index(
+                fields=["status", "deadline"], name="courses_qui_status_89d80a_idx"
+            ),
+        ),
+        migrations.RunPython(drop_duplicate_answers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="quizanswer",
+            constraint=models.UniqueConstraint(
+                fields=("attempt", "question"), name="one_answer_per_question"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="quizattempt",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", "in_progress")),
+                fields=("enrollment", "quiz"),
+                name="one_open_attempt_per_quiz",
+            ),
+        ),
+    ]
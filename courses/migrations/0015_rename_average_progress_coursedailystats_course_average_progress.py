@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-19 10:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0014_quiz_attempt_exam_mode"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="coursedailystats",
+            old_name="average_progress",
+            new_name="course_average_progress",
+        ),
+    ]
@@ -1,9 +1,11 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from django.core.files.storage import FileSystemStorage
+from django.core.files.storage import default_storage
 from django.utils import timezone
-import os
+import re
+
+from . import rendering
 
 User = get_user_model()
 
@@ -12,6 +14,16 @@ def get_lesson_upload_path(instance, filename):
     return f"lessons/{instance.course.id}/{filename}"
 
 
+def parse_duration_weeks(duration):
+    """Best-effort conversion of a free-text duration like "12 weeks" to weeks"""
+    match = re.search(r"(\d+(?:\.\d+)?)\s*(day|week|month|year)", duration or "", re.I)
+    if not match:
+        return None
+    weeks_per_unit = {"day": 1 / 7, "week": 1, "month": 52 / 12, "year": 52}
+    weeks = float(match.group(1)) * weeks_per_unit[match.group(2).lower()]
+    return max(1, round(weeks))
+
+
 def get_certificate_upload_path(instance, filename):
     return f"certificates/{instance.enrollment.id}_{instance.enrollment.student.username}.pdf"
 
@@ -52,6 +64,7 @@ class Course(models.Model):
     duration = models.CharField(
         max_length=50, blank=True, help_text="e.g., 12 weeks, 2 months"
     )
+    duration_weeks = models.PositiveIntegerField(null=True, blank=True, editable=False)
     level = models.CharField(
         max_length=20,
         choices=[
@@ -71,6 +84,10 @@ class Course(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = self.title.lower().replace(" ", "-").replace("/", "-")
+        self.duration_weeks = parse_duration_weeks(self.duration)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "duration" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "duration_weeks"}
         super().save(*args, **kwargs)
 
     def get_absolute_url(self):
@@ -92,6 +109,17 @@ class Lesson(models.Model):
         ("text", "Text Content"),
         ("quiz", "Quiz"),
     ]
+    # Processing status of files derived from content_file; see courses/jobs.py
+    PENDING = "pending"
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
+    PROCESSING_STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (PROCESSING, "Processing"),
+        (READY, "Ready"),
+        (FAILED, "Failed"),
+    ]
 
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="lessons")
     title = models.CharField(max_length=200)
@@ -101,14 +129,41 @@ class Lesson(models.Model):
         upload_to=get_lesson_upload_path, blank=True, null=True
     )
     content_text = models.TextField(blank=True, null=True)
+    # Rendered from content_text on save; see courses/rendering.py
+    content_html = models.TextField(blank=True, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_minutes = models.PositiveIntegerField(default=0, editable=False)
+    # HLS renditions of a video content_file; see courses/video.py
+    video_source = models.CharField(max_length=255, blank=True, editable=False)
+    video_status = models.CharField(
+        max_length=20, choices=PROCESSING_STATUS_CHOICES, blank=True, editable=False
+    )
+    video_error = models.TextField(blank=True, editable=False)
+    hls_playlist = models.CharField(max_length=255, blank=True, editable=False)
+    # Metadata and derived files of a PDF content_file; see courses/pdfs.py
+    pdf_source = models.CharField(max_length=255, blank=True, editable=False)
+    pdf_status = models.CharField(
+        max_length=20, choices=PROCESSING_STATUS_CHOICES, blank=True, editable=False
+    )
+    pdf_error = models.TextField(blank=True, editable=False)
+    page_count = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    pdf_text = models.TextField(blank=True, editable=False)
+    pdf_preview = models.CharField(max_length=255, blank=True, editable=False)
+    pdf_linearized = models.CharField(max_length=255, blank=True, editable=False)
     order = models.PositiveIntegerField(default=0)
     duration = models.IntegerField(default=0, help_text="Duration in minutes")
     is_preview = models.BooleanField(default=False)
     is_completed = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["order"]
+        indexes = [
+            models.Index(fields=["video_status"]),
+            models.Index(fields=["pdf_status"]),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - {self.title}"
@@ -116,8 +171,45 @@ class Lesson(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = self.title.lower().replace(" ", "-")
+        update_fields = kwargs.get("update_fields")
+        if rendering.apply(self) and update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, *rendering.RENDERED_FIELDS}
         super().save(*args, **kwargs)
 
+        # The stored file name is only final after the field's pre_save, so
+        # queue processing of a new file with a follow-up UPDATE.
+        changes = self.queue_processing()
+        if changes:
+            Lesson.objects.filter(pk=self.pk).update(**changes)
+
+    def queue_processing(self):
+        """
+        Point ``<kind>_source`` at the current content_file and make the
+        status pending when it changed, for the video and PDF queues (see
+        courses/jobs.py). Sets the fields without saving; returns them.
+        """
+        changes = {}
+        for kind in ("video", "pdf"):
+            source = self.content_file.name if self.lesson_type == kind else ""
+            if (source or "") != getattr(self, f"{kind}_source"):
+                changes[f"{kind}_source"] = source or ""
+                changes[f"{kind}_status"] = self.PENDING if source else ""
+        for field, value in changes.items():
+            setattr(self, field, value)
+        return changes
+
+    @property
+    def hls_url(self):
+        if self.video_status == self.READY and self.hls_playlist:
+            return default_storage.url(self.hls_playlist)
+        return ""
+
+    @property
+    def pdf_preview_url(self):
+        if self.pdf_status == self.READY and self.pdf_preview:
+            return default_storage.url(self.pdf_preview)
+        return ""
+
 
 class Enrollment(models.Model):
     student = models.ForeignKey(
@@ -133,10 +225,19 @@ class Enrollment(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     progress = models.IntegerField(default=0, help_text="Percentage completed")
     is_completed = models.BooleanField(default=False)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+    # Where to resume; maintained by courses/resume.py
+    last_lesson = models.ForeignKey(
+        Lesson, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    last_position = models.PositiveIntegerField(
+        default=0, help_text="Seconds into the last lesson"
+    )
 
     class Meta:
         unique_together = ["student", "course"]
         ordering = ["-enrolled_at"]
+        indexes = [models.Index(fields=["-enrolled_at"])]
 
     def __str__(self):
         return f"{self.student.username} - {self.course.title}"
@@ -147,11 +248,18 @@ class Enrollment(models.Model):
             return
 
         completed_lessons = self.course.lessons.filter(is_completed=True).count()
+        self.set_progress(total_lessons, completed_lessons)
+        self.save()
+
+    def set_progress(self, total_lessons, completed_lessons, now=None):
+        """Set progress fields from lesson counts without saving"""
+        now = now or timezone.now()
         self.progress = int((completed_lessons / total_lessons) * 100)
         self.is_completed = self.progress >= 100
         if self.is_completed and not self.completed_at:
-            self.completed_at = timezone.now()
-        self.save()
+            self.completed_at = now
+        if not self.last_activity_at or now > self.last_activity_at:
+            self.last_activity_at = now
 
 
 class Quiz(models.Model):
@@ -226,16 +334,44 @@ class Answer(models.Model):
 
 
 class QuizAttempt(models.Model):
+    IN_PROGRESS = "in_progress"
+    SUBMITTED = "submitted"
+    EXPIRED = "expired"
+    STATUS_CHOICES = [
+        (IN_PROGRESS, "In progress"),
+        (SUBMITTED, "Submitted"),
+        (EXPIRED, "Submitted automatically"),
+    ]
+
     enrollment = models.ForeignKey(
         Enrollment, on_delete=models.CASCADE, related_name="quiz_attempts"
     )
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE)
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=IN_PROGRESS
+    )
     started_at = models.DateTimeField(auto_now_add=True)
+    # Null for quizzes without a time limit
+    deadline = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     score = models.FloatField(null=True, blank=True)
     total_marks = models.FloatField(null=True, blank=True)
     is_passed = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-started_at"]),
+            # The sweeper's scan for expired attempts
+            models.Index(fields=["status", "deadline"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["enrollment", "quiz"],
+                condition=models.Q(status="in_progress"),
+                name="one_open_attempt_per_quiz",
+            )
+        ]
+
     def __str__(self):
         return f"{self.enrollment.student.username} - {self.quiz.title}"
 
@@ -248,6 +384,50 @@ class QuizAnswer(models.Model):
     selected_answer = models.ForeignKey(Answer, on_delete=models.CASCADE, null=True)
     is_correct = models.BooleanField(null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["attempt", "question"], name="one_answer_per_question"
+            )
+        ]
+
+
+class CoursePublication(models.Model):
+    """The published version of a course; see courses/publishing.py"""
+
+    course = models.OneToOneField(
+        Course, on_delete=models.CASCADE, primary_key=True, related_name="publication"
+    )
+    slug = models.SlugField(unique=True)
+    version = models.PositiveIntegerField()
+    document = models.JSONField()
+    published_at = models.DateTimeField()
+    # Also moved by media refreshes, which keep published_at
+    updated_at = models.DateTimeField()
+    published_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+
+    def __str__(self):
+        return f"{self.slug} v{self.version}"
+
+
+class Announcement(models.Model):
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="announcements"
+    )
+    author = models.ForeignKey(User, on_delete=models.CASCADE)
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["course", "-created_at"])]
+
+    def __str__(self):
+        return self.title
+
 
 class Certificate(models.Model):
     enrollment = models.OneToOneField(Enrollment, on_delete=models.CASCADE)
@@ -256,3 +436,111 @@ class Certificate(models.Model):
 
     def __str__(self):
         return f"Certificate for {self.enrollment.student.username} - {self.enrollment.course.title}"
+
+
+class PassRateMixin:
+    """``pass_rate`` of a row with quiz_attempts and quiz_passes counters"""
+
+    @property
+    def pass_rate(self):
+        return (
+            round(self.quiz_passes * 100 / self.quiz_attempts, 1)
+            if self.quiz_attempts
+            else 0
+        )
+
+
+class RunningStats(PassRateMixin, models.Model):
+    """Running totals over a set of enrollments, kept by courses.analytics"""
+
+    enrollments = models.PositiveIntegerField(default=0)
+    completions = models.PositiveIntegerField(default=0)
+    progress_sum = models.BigIntegerField(default=0)
+    quiz_attempts = models.PositiveIntegerField(default=0)
+    quiz_passes = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def average_progress(self):
+        return round(self.progress_sum / self.enrollments, 1) if self.enrollments else 0
+
+    @property
+    def completion_rate(self):
+        return (
+            round(self.completions * 100 / self.enrollments, 1)
+            if self.enrollments
+            else 0
+        )
+
+
+class CourseStats(RunningStats):
+    """Running per-course totals, maintained incrementally by courses.analytics"""
+
+    course = models.OneToOneField(
+        Course, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+
+    class Meta:
+        verbose_name_plural = "Course stats"
+
+    def __str__(self):
+        return f"Stats for {self.course_id}"
+
+
+class CourseDailyStats(PassRateMixin, models.Model):
+    """Per course per day counters, maintained incrementally by courses.analytics"""
+
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="daily_stats"
+    )
+    date = models.DateField()
+    new_enrollments = models.PositiveIntegerField(default=0)
+    completions = models.PositiveIntegerField(default=0)
+    # The course's running average progress as of the last update that day,
+    # not an average over that day's activity
+    course_average_progress = models.FloatField(default=0)
+    quiz_attempts = models.PositiveIntegerField(default=0)
+    quiz_passes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Course daily stats"
+        unique_together = ["course", "date"]
+        ordering = ["-date"]
+
+    def __str__(self):
+        return f"{self.course_id} @ {self.date}"
+
+
+class InstructorStats(RunningStats):
+    """Running per-instructor rollup across all of their courses"""
+
+    instructor = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="teaching_stats"
+    )
+
+    class Meta:
+        verbose_name_plural = "Instructor stats"
+
+    def __str__(self):
+        return f"Stats for instructor {self.instructor_id}"
+
+
+class CourseRecommendation(models.Model):
+    """Precomputed top-K co-enrollment neighbours of a course"""
+
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="recommendations"
+    )
+    recommended = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = ["course", "rank"]
+        ordering = ["course", "rank"]
+
+    def __str__(self):
+        return f"{self.course_id} -> {self.recommended_id} ({self.score:.3f})"
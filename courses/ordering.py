@@ -0,0 +1,106 @@
+"""
+Gap-based ordering keys for lessons.
+
+``Lesson.order`` only has to sort, so keys are spaced GAP apart and a moved
+lesson takes a key between its new neighbours. ``plan`` keeps the longest
+run of lessons that are already in relative order where they are and
+assigns keys only to the rest, so moving one lesson writes one row. Only
+when a gap is used up are all keys spread out again, after which moves
+are single-row once more.
+"""
+
+from bisect import bisect_left
+
+from django.utils import timezone
+
+from .models import Lesson
+
+GAP = 1024
+
+
+def _kept(keys):
+    """Indexes of a longest strictly increasing subsequence of ``keys``"""
+    tails, tail_index, previous = [], [], [None] * len(keys)
+    for i, key in enumerate(keys):
+        position = bisect_left(tails, key)
+        if position == len(tails):
+            tails.append(key)
+            tail_index.append(i)
+        else:
+            tails[position] = key
+            tail_index[position] = i
+        previous[i] = tail_index[position - 1] if position else None
+    kept = set()
+    i = tail_index[-1] if tail_index else None
+    while i is not None:
+        kept.add(i)
+        i = previous[i]
+    return kept
+
+
+def plan(current, ids):
+    """
+    New keys for lessons ``ids`` (in their new order) whose current keys are
+    ``current`` (``{id: order}``); returns ``{id: order}`` of rows to change.
+    """
+    keys = [current[lesson_id] for lesson_id in ids]
+    kept = _kept(keys)
+    changes = {}
+    i = 0
+    while i < len(ids):
+        if i in kept:
+            i += 1
+            continue
+        end = i
+        while end < len(ids) and end not in kept:
+            end += 1
+        low = keys[i - 1] if i else -1
+        count = end - i
+        if end < len(ids):
+            step = (keys[end] - low) // (count + 1)
+            if step < 1:
+                return respace(current, ids)
+        else:
+            step = GAP
+        for offset in range(count):
+            keys[i + offset] = low + step * (offset + 1)
+            changes[ids[i + offset]] = keys[i + offset]
+        i = end
+    return changes
+
+
+def respace(current, ids):
+    """Keys GAP apart for ``ids`` in order, as ``{id: order}`` of changed rows"""
+    return {
+        lesson_id: GAP * position
+        for position, lesson_id in enumerate(ids, 1)
+        if current[lesson_id] != GAP * position
+    }
+
+
+def save_formset(formset):
+    """
+    Apply a valid LessonOrderFormSet with one ``bulk_update`` of only the
+    lessons whose fields or keys changed; returns those lessons.
+    """
+    forms = formset.ordered_forms
+    lessons = [form.instance for form in forms]
+    keys = plan(
+        {lesson.pk: lesson.order for lesson in lessons},
+        [lesson.pk for lesson in lessons],
+    )
+    fields = {"updated_at"}
+    if keys:
+        fields.add("order")
+    changed = []
+    now = timezone.now()
+    for form, lesson in zip(forms, lessons):
+        edited = [name for name in form.changed_data if name in form._meta.fields]
+        if edited or lesson.pk in keys:
+            fields.update(edited)
+            lesson.order = keys.get(lesson.pk, lesson.order)
+            lesson.updated_at = now
+            changed.append(lesson)
+    if changed:
+        Lesson.objects.bulk_update(changed, sorted(fields))
+    return changed
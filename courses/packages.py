@@ -0,0 +1,323 @@
+"""
+Course packages: a JSON Lines stream holding one course with its lessons,
+lesson files, quizzes, questions and answers.
+
+Every line is a JSON object with a ``type`` key. The course line comes first
+and parents always precede their children, so both directions can work one
+row at a time:
+
+    {"type": "course", "version": 1, "title": ..., "category": ...}
+    {"type": "lesson", "ref": 7, "title": ..., "content_file": "intro.mp4"}
+    {"type": "file", "lesson": 7, "data": "<base64>", "last": false}
+    {"type": "quiz", "ref": 3, "lesson": 7, ...}
+    {"type": "question", "ref": 12, "quiz": 3, ...}
+    {"type": "answer", "question": 12, ...}
+
+``ref`` values are the ids in the exporting database; they only link rows
+within the package.
+"""
+
+import base64
+import binascii
+import json
+import os
+import tempfile
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from . import rendering
+from .models import (
+    Answer,
+    Category,
+    Course,
+    Lesson,
+    Question,
+    Quiz,
+    get_lesson_upload_path,
+)
+
+FORMAT_VERSION = 1
+BATCH_SIZE = 500
+FILE_CHUNK_SIZE = 256 * 1024
+
+COURSE_FIELDS = [
+    "title",
+    "slug",
+    "description",
+    "short_description",
+    "price",
+    "duration",
+    "level",
+]
+LESSON_FIELDS = [
+    "title",
+    "slug",
+    "lesson_type",
+    "content_text",
+    "order",
+    "duration",
+    "is_preview",
+]
+QUIZ_FIELDS = ["title", "instructions", "time_limit", "total_marks", "is_published"]
+QUESTION_FIELDS = ["text", "question_type", "marks", "order"]
+ANSWER_FIELDS = ["text", "is_correct", "order"]
+
+
+class PackageError(Exception):
+    pass
+
+
+def _line(record):
+    return json.dumps(record, default=str) + "\n"
+
+
+def export_course(course):
+    """Yield the package for ``course`` line by line"""
+    record = {field: getattr(course, field) for field in COURSE_FIELDS}
+    record.update(type="course", version=FORMAT_VERSION, category=course.category.name)
+    yield _line(record)
+
+    lessons = course.lessons.order_by("order", "id").iterator(chunk_size=BATCH_SIZE)
+    for lesson in lessons:
+        record = {field: getattr(lesson, field) for field in LESSON_FIELDS}
+        record.update(type="lesson", ref=lesson.id, content_file=None)
+        if lesson.content_file:
+            record["content_file"] = os.path.basename(lesson.content_file.name)
+        yield _line(record)
+        if lesson.content_file:
+            yield from _export_file(lesson)
+
+    quizzes = Quiz.objects.filter(course=course).order_by("id")
+    for quiz in quizzes.iterator(chunk_size=BATCH_SIZE):
+        record = {field: getattr(quiz, field) for field in QUIZ_FIELDS}
+        record.update(type="quiz", ref=quiz.id, lesson=quiz.lesson_id)
+        yield _line(record)
+
+    questions = Question.objects.filter(quiz__course=course).order_by("quiz", "order")
+    for question in questions.iterator(chunk_size=BATCH_SIZE):
+        record = {field: getattr(question, field) for field in QUESTION_FIELDS}
+        record.update(type="question", ref=question.id, quiz=question.quiz_id)
+        yield _line(record)
+
+    answers = Answer.objects.filter(question__quiz__course=course).order_by(
+        "question", "order"
+    )
+    for answer in answers.iterator(chunk_size=BATCH_SIZE):
+        record = {field: getattr(answer, field) for field in ANSWER_FIELDS}
+        record.update(type="answer", question=answer.question_id)
+        yield _line(record)
+
+
+def _export_file(lesson):
+    with lesson.content_file.open("rb") as handle:
+        chunk = handle.read(FILE_CHUNK_SIZE)
+        while chunk:
+            following = handle.read(FILE_CHUNK_SIZE)
+            yield _line(
+                {
+                    "type": "file",
+                    "lesson": lesson.id,
+                    "data": base64.b64encode(chunk).decode("ascii"),
+                    "last": not following,
+                }
+            )
+            chunk = following
+
+
+class _Importer:
+    """Consumes package records, writing each type with batched bulk_create"""
+
+    def __init__(self, instructor):
+        self.instructor = instructor
+        self.course = None
+        self.ids = {"lesson": {}, "quiz": {}, "question": {}}
+        self.pending = []
+        self.pending_refs = []
+        self.pending_type = None
+        self.counts = {"lesson": 0, "quiz": 0, "question": 0, "answer": 0}
+        self.saved_files = []
+        self.upload = None
+        self.upload_name = None
+        self.upload_lesson = None
+
+    def feed(self, record):
+        kind = record.get("type")
+        if self.course is None:
+            if kind != "course":
+                raise PackageError("Package must start with a course record.")
+            self._create_course(record)
+            return
+        if kind == "file":
+            self._add_file_chunk(record)
+            return
+        if self.upload is not None:
+            raise PackageError("Lesson file ended before its last chunk.")
+        if kind != self.pending_type or len(self.pending) >= BATCH_SIZE:
+            self.flush()
+        self.pending_type = kind
+        self.pending_refs.append(record.get("ref"))
+        self.pending.append(self._build(kind, record))
+
+    def _create_course(self, record):
+        if record.get("version") != FORMAT_VERSION:
+            raise PackageError(f"Unsupported package version {record.get('version')}.")
+        if not isinstance(record["category"], str) or not record["category"]:
+            raise PackageError("The course record needs a category name.")
+        fields = self._fields(record, COURSE_FIELDS)
+        course = Course(instructor=self.instructor, is_published=False, **fields)
+        self._validate(course, fields)
+        category, _ = Category.objects.get_or_create(name=record["category"])
+        slug = course.slug or ""
+        if slug and Course.objects.filter(slug=slug).exists():
+            suffix = 2
+            while Course.objects.filter(slug=f"{slug}-{suffix}").exists():
+                suffix += 1
+            slug = f"{slug}-{suffix}"
+        course.category = category
+        course.slug = slug
+        course.save()
+        self.course = course
+
+    def _build(self, kind, record):
+        if kind == "lesson":
+            fields = self._fields(record, LESSON_FIELDS)
+            lesson = self._validate(Lesson(course=self.course, **fields), fields)
+            rendering.apply(lesson)  # bulk_create skips Lesson.save()
+            self.upload_name = record.get("content_file")
+            self.upload_lesson = lesson if self.upload_name else None
+            return lesson
+        if kind == "quiz":
+            fields = self._fields(record, QUIZ_FIELDS)
+            quiz = Quiz(
+                course=self.course,
+                lesson_id=self._resolve("lesson", record.get("lesson"), required=False),
+                **fields,
+            )
+            return self._validate(quiz, fields)
+        if kind == "question":
+            fields = self._fields(record, QUESTION_FIELDS)
+            question = Question(
+                quiz_id=self._resolve("quiz", record.get("quiz")), **fields
+            )
+            return self._validate(question, fields)
+        if kind == "answer":
+            fields = self._fields(record, ANSWER_FIELDS)
+            answer = Answer(
+                question_id=self._resolve("question", record.get("question")),
+                **fields,
+            )
+            return self._validate(answer, fields)
+        raise PackageError(f"Unknown record type {kind!r}.")
+
+    @staticmethod
+    def _fields(record, names):
+        return {name: record[name] for name in names if name in record}
+
+    @staticmethod
+    def _validate(obj, fields):
+        """
+        Check and convert the imported ``fields`` of ``obj`` (choices, lengths,
+        types) as a model form would, since bulk_create checks nothing.
+        """
+        exclude = [f.name for f in obj._meta.fields if f.name not in fields]
+        try:
+            obj.clean_fields(exclude=exclude)
+        except ValidationError as e:
+            problems = "; ".join(
+                f"{field}: {' '.join(messages)}"
+                for field, messages in e.message_dict.items()
+            )
+            raise PackageError(f"Invalid {obj._meta.model_name}: {problems}")
+        return obj
+
+    def _resolve(self, kind, ref, required=True):
+        if ref is None and not required:
+            return None
+        try:
+            return self.ids[kind][ref]
+        except KeyError:
+            raise PackageError(f"{kind} {ref!r} is referenced before it is defined.")
+
+    def _add_file_chunk(self, record):
+        lesson = self.upload_lesson
+        if lesson is None or self.pending_type != "lesson":
+            raise PackageError("File data must directly follow its lesson.")
+        if self.upload is None:
+            self.upload = tempfile.TemporaryFile()
+        self.upload.write(base64.b64decode(record["data"], validate=True))
+        if record.get("last"):
+            self.upload.seek(0)
+            name = default_storage.save(
+                get_lesson_upload_path(lesson, self.upload_name), File(self.upload)
+            )
+            self.saved_files.append(name)
+            lesson.content_file.name = name
+            # bulk_create skips Lesson.save(), which queues new files.
+            lesson.queue_processing()
+            self.upload.close()
+            self.upload = None
+            self.upload_lesson = None
+
+    def flush(self):
+        if not self.pending:
+            return
+        kind = self.pending_type
+        model = type(self.pending[0])
+        created = model.objects.bulk_create(self.pending)
+        if kind in self.ids:
+            for ref, obj in zip(self.pending_refs, created):
+                if obj.pk is None:
+                    raise PackageError(
+                        "The database backend does not return ids from bulk inserts."
+                    )
+                self.ids[kind][ref] = obj.pk
+        self.counts[kind] += len(created)
+        self.pending = []
+        self.pending_refs = []
+
+    def finish(self):
+        if self.upload is not None:
+            raise PackageError("Package ended in the middle of a lesson file.")
+        self.flush()
+        if self.course is None:
+            raise PackageError("Package is empty.")
+
+    def discard_files(self):
+        if self.upload is not None:
+            self.upload.close()
+        for name in self.saved_files:
+            default_storage.delete(name)
+
+
+def import_course(lines, instructor):
+    """
+    Create a course from an iterable of package lines (str or bytes) inside a
+    single transaction. The new course is left unpublished. Returns the
+    course and a dict of row counts per record type.
+    """
+    importer = _Importer(instructor)
+    try:
+        with transaction.atomic():
+            for number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    raise PackageError(f"Line {number} is not valid JSON.")
+                if not isinstance(record, dict):
+                    raise PackageError(f"Line {number} is not a JSON object.")
+                try:
+                    importer.feed(record)
+                except KeyError as e:
+                    raise PackageError(f"Line {number} is missing {e.args[0]!r}.")
+                except (TypeError, ValueError, binascii.Error) as e:
+                    raise PackageError(f"Line {number} has an invalid value: {e}")
+            importer.finish()
+    except Exception:
+        importer.discard_files()
+        raise
+    return importer.course, importer.counts
@@ -0,0 +1,122 @@
+"""
+Background processing of PDF lessons.
+
+Saving a PDF lesson with a new ``content_file`` marks it ``pending``.
+``manage.py process_pdfs`` claims pending lessons and, in a pool of worker
+processes, extracts the page count and the text (kept on the lesson for
+search indexing), renders the first page to a PNG preview, and writes a
+linearized ("fast web view") copy so a browser reading the file with range
+requests can show the first page before the rest has downloaded. Derived
+files go to default storage under ``lessons/<course>/pdf/<lesson>/``.
+
+Reading PDFs needs ``pypdfium2``; linearizing needs ``pikepdf`` and is
+skipped (the original file is served) when it isn't installed.
+"""
+
+import os
+import tempfile
+
+from django.utils import timezone
+
+from . import jobs, publishing
+from .models import Lesson
+
+PREVIEW_WIDTH = 800
+PREVIEW_NAME = "preview.png"
+LINEARIZED_NAME = "document.pdf"
+MAX_TEXT_LENGTH = 1024 * 1024
+
+
+class PdfError(Exception):
+    pass
+
+
+def extract(path, preview_path):
+    """Return ``(page_count, text)`` of a PDF, rendering page one to ``preview_path``"""
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        raise PdfError("pypdfium2 is required to process PDF lessons")
+
+    try:
+        document = pdfium.PdfDocument(path)
+    except pdfium.PdfiumError as e:
+        raise PdfError(f"Unreadable PDF: {e}")
+    try:
+        page_count = len(document)
+        texts, length = [], 0
+        for index in range(page_count):
+            page = document[index]
+            if index == 0:
+                scale = PREVIEW_WIDTH / page.get_width()
+                page.render(scale=scale).to_pil().save(preview_path, "PNG")
+            if length < MAX_TEXT_LENGTH:
+                text = page.get_textpage().get_text_range()
+                texts.append(text)
+                length += len(text)
+        return page_count, "\n".join(texts)[:MAX_TEXT_LENGTH]
+    finally:
+        document.close()
+
+
+def linearize(path, output_path):
+    """Write a linearized copy of a PDF; False when pikepdf isn't installed"""
+    try:
+        import pikepdf
+    except ImportError:
+        return False
+    with pikepdf.open(path) as pdf:
+        pdf.save(output_path, linearize=True)
+    return True
+
+
+def process(source, prefix):
+    """
+    Process the stored PDF ``source`` into the storage directory ``prefix``.
+    Runs in a worker process and doesn't touch the database; returns the
+    lesson fields to store.
+    """
+    with tempfile.TemporaryDirectory(prefix="pdf-") as workdir:
+        local_source = jobs.local_copy(source, workdir)
+        output_dir = os.path.join(workdir, "out")
+        os.mkdir(output_dir)
+        page_count, text = extract(local_source, os.path.join(output_dir, PREVIEW_NAME))
+        linearized = linearize(local_source, os.path.join(output_dir, LINEARIZED_NAME))
+        jobs.upload_tree(output_dir, prefix)
+    return {
+        "page_count": page_count,
+        "pdf_text": text,
+        "pdf_preview": prefix + PREVIEW_NAME,
+        "pdf_linearized": prefix + LINEARIZED_NAME if linearized else "",
+    }
+
+
+queue = jobs.LessonQueue("pdf")
+
+
+def prepare(lesson_id, course_id, source):
+    return source, jobs.output_prefix("pdf", lesson_id, course_id, source)
+
+
+def finish(lesson_id, source, fields):
+    """Store the extracted metadata unless the lesson's file changed meanwhile"""
+    previous = (
+        Lesson.objects.filter(pk=lesson_id)
+        .values_list("pdf_preview", flat=True)
+        .first()
+    )
+    updated = queue.complete(lesson_id, source, updated_at=timezone.now(), **fields)
+    if not updated:
+        jobs.delete_tree(jobs.directory_of(fields["pdf_preview"]))
+    else:
+        publishing.refresh_media(lesson_id)
+        if previous and previous != fields["pdf_preview"]:
+            jobs.delete_tree(jobs.directory_of(previous))
+    return updated
+
+
+def served_file(lesson):
+    """Storage name of the file to serve for a PDF lesson"""
+    if lesson.pdf_status == Lesson.READY and lesson.pdf_linearized:
+        return lesson.pdf_linearized
+    return lesson.content_file.name
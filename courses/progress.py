@@ -0,0 +1,259 @@
+"""
+Write-behind buffering of lesson progress events.
+
+With ``PROGRESS_WRITE_BEHIND`` enabled, marking a lesson complete appends one
+JSON line to an append-only log segment owned by the current process instead
+of writing to the database. A background thread seals the segment every
+``PROGRESS_FLUSH_INTERVAL`` seconds and applies sealed segments in batches:
+one UPDATE for the lessons and one save per enrollment whose progress
+actually changed. Segments are also flushed at interpreter exit.
+
+Delivery is at-least-once. A segment is claimed by renaming it and only
+deleted after every batch in it has committed, and segments left behind by
+dead processes are picked up by the next flush (or ``manage.py
+flush_progress``). Replaying an event is harmless because application only
+sets flags and recomputes progress from lesson counts.
+
+Segments live on the local disk, so one directory serves one host.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import dashboard
+from .models import Enrollment, Lesson
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_FIELDS = ["progress", "is_completed", "completed_at", "last_activity_at"]
+ACTIVE_SUFFIX = ".log"
+SEALED_SUFFIX = ".sealed"
+CLAIMED_SUFFIX = ".applying"
+BATCH_SIZE = 1000
+
+
+def write_behind_enabled():
+    return getattr(settings, "PROGRESS_WRITE_BEHIND", False)
+
+
+def _log_dir():
+    return Path(settings.PROGRESS_LOG_DIR)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _owner(path):
+    """Pid of the process that wrote (or claimed) a segment file"""
+    if path.suffix.startswith(CLAIMED_SUFFIX):
+        return int(path.suffix[len(CLAIMED_SUFFIX) + 1 :])
+    return int(path.name.split("-")[1])
+
+
+def apply_events(events):
+    """Apply completion events; repeating a batch leaves the same state"""
+    if not events:
+        return
+    lesson_ids = {event["lesson"] for event in events}
+    completed_at = {}
+    for event in events:
+        at = parse_datetime(event["at"])
+        completed_at[event["enrollment"]] = max(
+            at, completed_at.get(event["enrollment"], at)
+        )
+
+    with transaction.atomic():
+        Lesson.objects.filter(pk__in=lesson_ids, is_completed=False).update(
+            is_completed=True, updated_at=timezone.now()
+        )
+        enrollments = list(
+            Enrollment.objects.select_for_update().filter(pk__in=completed_at)
+        )
+        counts = {
+            row["course_id"]: (row["total"], row["completed"])
+            for row in Lesson.objects.filter(
+                course_id__in={enrollment.course_id for enrollment in enrollments}
+            )
+            .values("course_id")
+            .annotate(
+                total=Count("pk"), completed=Count("pk", filter=Q(is_completed=True))
+            )
+            .order_by()
+        }
+        for enrollment in enrollments:
+            total, completed = counts.get(enrollment.course_id, (0, 0))
+            if not total:
+                continue
+            before = (
+                enrollment.progress,
+                enrollment.is_completed,
+                enrollment.last_activity_at,
+            )
+            enrollment.set_progress(total, completed, completed_at[enrollment.pk])
+            if (
+                enrollment.progress,
+                enrollment.is_completed,
+                enrollment.last_activity_at,
+            ) != before:
+                enrollment.save(update_fields=PROGRESS_FIELDS)
+        # Completing a lesson changes the next lesson of every enrolled student.
+        dashboard.invalidate_courses(
+            {enrollment.course_id for enrollment in enrollments}
+        )
+
+
+def _apply_segment(path):
+    applied, batch = 0, []
+    with open(path, encoding="utf-8") as segment:
+        for line in segment:
+            try:
+                batch.append(json.loads(line))
+            except ValueError:  # torn final line from a crashed writer
+                continue
+            if len(batch) >= BATCH_SIZE:
+                apply_events(batch)
+                applied += len(batch)
+                batch = []
+    apply_events(batch)
+    return applied + len(batch)
+
+
+def drain(directory=None):
+    """
+    Claim and apply every sealed segment, plus active or half-applied
+    segments whose process has died. Returns the number of events applied.
+    """
+    directory = Path(directory or _log_dir())
+    if not directory.is_dir():
+        return 0
+    applied = 0
+    for path in sorted(directory.glob("progress-*")):
+        if path.suffix != SEALED_SUFFIX and _pid_alive(_owner(path)):
+            continue
+        base = path.name.split(".")[0]
+        claimed = path.with_name(f"{base}{CLAIMED_SUFFIX}-{os.getpid()}")
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:  # another process claimed it first
+            continue
+        try:
+            applied += _apply_segment(claimed)
+        except Exception:
+            os.rename(claimed, path.with_name(f"{base}{SEALED_SUFFIX}"))
+            raise
+        claimed.unlink()
+    return applied
+
+
+class ProgressLog:
+    """The current process's active segment and its flusher thread"""
+
+    def __init__(self, directory, interval):
+        self.directory = Path(directory)
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.file = None
+        self.path = None
+        self.pid = None
+        self.flusher_pid = None
+        # Lessons buffered by this process but not yet applied, so responses
+        # can project progress as if they were.
+        self.pending_lessons = set()
+
+    def append(self, event):
+        line = json.dumps(event, separators=(",", ":")) + "\n"
+        with self.lock:
+            self.pending_lessons.add(event["lesson"])
+            if self.file is None or self.pid != os.getpid():
+                # Never keep writing to a segment inherited across fork().
+                self._open()
+            self.file.write(line)
+            self.file.flush()
+            if self.flusher_pid != os.getpid():
+                self.flusher_pid = os.getpid()
+                threading.Thread(
+                    target=self._run, name="progress-flusher", daemon=True
+                ).start()
+
+    def _open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.pid = os.getpid()
+        name = f"progress-{self.pid}-{time.time_ns()}{ACTIVE_SUFFIX}"
+        self.path = self.directory / name
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def seal(self):
+        with self.lock:
+            if self.file is None or self.pid != os.getpid():
+                return
+            self.file.close()
+            os.rename(self.path, self.path.with_suffix(SEALED_SUFFIX))
+            self.file = self.path = None
+
+    def flush(self):
+        """Seal the active segment and apply everything that is ready"""
+        sealed_lessons = set(self.pending_lessons)
+        self.seal()
+        applied = drain(self.directory)
+        self.pending_lessons -= sealed_lessons
+        return applied
+
+    def _run(self):
+        while self.flusher_pid == os.getpid():
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                # The segments stay on disk and are retried on the next tick.
+                logger.exception("Flushing buffered lesson progress failed")
+
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def get_log():
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = ProgressLog(_log_dir(), settings.PROGRESS_FLUSH_INTERVAL)
+            atexit.register(_log.flush)
+    return _log
+
+
+def record_completion(enrollment, lesson):
+    """Buffer a lesson completion and project the enrollment's new progress"""
+    log = get_log()
+    log.append(
+        {
+            "enrollment": enrollment.pk,
+            "lesson": lesson.pk,
+            "at": timezone.now().isoformat(),
+        }
+    )
+    counts = Lesson.objects.filter(course_id=lesson.course_id).aggregate(
+        total=Count("pk"),
+        completed=Count(
+            "pk", filter=Q(is_completed=True) | Q(pk__in=set(log.pending_lessons))
+        ),
+    )
+    if counts["total"]:
+        enrollment.set_progress(counts["total"], counts["completed"])
@@ -0,0 +1,225 @@
+"""
+Draft and published versions of courses.
+
+Admin and instructor edits change the Course and Lesson rows, which are
+the draft. Publishing builds a denormalized JSON document of everything the
+course detail and lessons pages show (course fields, category and
+instructor card, ordered lessons with rendered content and media URLs, and
+counts) and stores it as the course's CoursePublication. Those pages then
+render from one row; later edits reach readers only when the course is
+published again, all at once.
+
+A document is never edited in place: each publish and media refresh writes
+a new version, so a reader sees one whole version or the next.
+"""
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.utils import timezone
+
+from . import rendering
+from .models import Course, CoursePublication, CourseStats, Lesson
+
+FORMAT_VERSION = 1
+
+
+def _url(field):
+    return field.url if field else ""
+
+
+def _storage_url(name):
+    return default_storage.url(name) if name else ""
+
+
+def lesson_entry(lesson):
+    """The published form of a lesson; reads only fields, not properties"""
+    minutes = lesson.duration
+    if lesson.lesson_type == "text" and lesson.reading_minutes:
+        minutes = lesson.reading_minutes
+    return {
+        "id": lesson.pk,
+        "title": lesson.title,
+        "slug": lesson.slug,
+        "lesson_type": lesson.lesson_type,
+        "order": lesson.order,
+        "duration": lesson.duration,
+        "minutes": minutes,
+        "reading_minutes": lesson.reading_minutes,
+        "word_count": lesson.word_count,
+        "is_preview": lesson.is_preview,
+        "content_html": lesson.content_html,
+        **media_fields(lesson),
+    }
+
+
+def media_fields(lesson):
+    """Fields of a lesson entry set by file processing jobs"""
+    ready = Lesson.READY
+    return {
+        "file_url": _url(lesson.content_file),
+        "hls_url": _storage_url(
+            lesson.hls_playlist if lesson.video_status == ready else ""
+        ),
+        "pdf_preview_url": _storage_url(
+            lesson.pdf_preview if lesson.pdf_status == ready else ""
+        ),
+        "page_count": lesson.page_count,
+    }
+
+
+def build_document(course, lessons):
+    """The published document of ``course`` with its ordered ``lessons``"""
+    instructor = course.instructor
+    entries = [lesson_entry(lesson) for lesson in lessons]
+    by_type = {}
+    for entry in entries:
+        by_type[entry["lesson_type"]] = by_type.get(entry["lesson_type"], 0) + 1
+    return {
+        "format": FORMAT_VERSION,
+        "course": {
+            "id": course.pk,
+            "title": course.title,
+            "slug": course.slug,
+            "description": course.description,
+            "short_description": course.short_description,
+            "level": course.level,
+            "duration": course.duration,
+            "price": str(course.price),
+            "is_free": not course.price,
+            "thumbnail_url": _url(course.thumbnail),
+            "category": {"name": course.category.name, "slug": course.category.slug},
+            "instructor": {
+                "id": instructor.pk,
+                "first_name": instructor.first_name,
+                "last_name": instructor.last_name,
+                "user_type": instructor.user_type,
+                "bio": instructor.bio,
+                "profile_picture_url": _url(instructor.profile_picture),
+            },
+        },
+        "lessons": entries,
+        "counts": {
+            "lessons": len(entries),
+            "previews": sum(entry["is_preview"] for entry in entries),
+            "minutes": sum(entry["minutes"] for entry in entries),
+            "by_type": by_type,
+        },
+    }
+
+
+def _set_published(course, published):
+    # A real save, so the post_save handlers refresh the catalog facets, the
+    # autocomplete index and the dashboards.
+    course.is_published = published
+    course.save(update_fields=["is_published", "updated_at"])
+
+
+def publish(course, user=None):
+    """Publish the current draft of ``course``; returns the publication"""
+    with transaction.atomic():
+        # Serializes concurrent publishes of one course.
+        course = (
+            Course.objects.select_for_update()
+            .select_related("category", "instructor")
+            .get(pk=course.pk)
+        )
+        lessons = rendering.refresh_stale(list(course.lessons.order_by("order", "pk")))
+        document = build_document(course, lessons)
+        if not course.is_published:
+            _set_published(course, True)
+        previous = CoursePublication.objects.filter(pk=course.pk).first()
+        # After the course save, so its updated_at isn't an unpublished change.
+        now = timezone.now()
+        publication = CoursePublication(
+            course=course,
+            slug=course.slug,
+            version=previous.version + 1 if previous else 1,
+            document=document,
+            published_at=now,
+            updated_at=now,
+            published_by=user,
+        )
+        publication.save(force_insert=previous is None)
+    return publication
+
+
+def unpublish(course):
+    with transaction.atomic():
+        course = Course.objects.select_for_update().get(pk=course.pk)
+        CoursePublication.objects.filter(pk=course.pk).delete()
+        if course.is_published:
+            _set_published(course, False)
+
+
+def refresh_media(lesson_id):
+    """
+    Copy a lesson's processed media (HLS playlist, PDF preview and page
+    count) into its course's published document. Processing jobs delete the
+    outputs they replace, so published URLs must follow the live lesson.
+    """
+    lesson = Lesson.objects.filter(pk=lesson_id).first()
+    if lesson is None:
+        return False
+    with transaction.atomic():
+        publication = (
+            CoursePublication.objects.select_for_update()
+            .filter(pk=lesson.course_id)
+            .first()
+        )
+        if publication is None:
+            return False
+        document = publication.document
+        for entry in document["lessons"]:
+            if entry["id"] == lesson.pk:
+                entry.update(media_fields(lesson))
+                break
+        else:
+            # Not published yet; it gets its media when it is.
+            return False
+        CoursePublication.objects.filter(pk=publication.pk).update(
+            document=document,
+            version=publication.version + 1,
+            updated_at=timezone.now(),
+        )
+    return True
+
+
+def has_unpublished_changes(course, publication):
+    """Whether the course or its lessons were edited after ``publication``"""
+    if publication is None:
+        return True
+    if course.updated_at > publication.published_at:
+        return True
+    row = course.lessons.aggregate(latest=Max("updated_at"), count=Count("pk"))
+    if row["latest"] is not None and row["latest"] > publication.published_at:
+        return True
+    # Deleted lessons leave no updated_at behind.
+    return row["count"] != publication.document["counts"]["lessons"]
+
+
+def get_publication(**lookup):
+    """
+    The publication matching ``lookup`` (``slug=`` or ``pk=``) with the live
+    student count, in one query; None if the course is not published.
+    """
+    return (
+        CoursePublication.objects.filter(**lookup)
+        .annotate(
+            students=Subquery(
+                CourseStats.objects.filter(course=OuterRef("pk")).values("enrollments")[
+                    :1
+                ]
+            )
+        )
+        .first()
+    )
+
+
+def for_request(request, **lookup):
+    """``get_publication`` memoized on the request for its validators and view"""
+    memo = request.__dict__.setdefault("_publications", {})
+    key = tuple(sorted(lookup.items()))
+    if key not in memo:
+        memo[key] = get_publication(**lookup)
+    return memo[key]
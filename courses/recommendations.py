@@ -0,0 +1,132 @@
+"""
+Item-to-item "courses you may like" recommendations.
+
+``rebuild`` computes cosine similarity between courses from co-enrollments
+with sparse matrix math and stores the top-K neighbours of every course in
+CourseRecommendation. Serving a student (``recommend_for``) is then a single
+query over those precomputed rows, keyed by the courses they are enrolled in.
+
+NumPy and SciPy are only needed for the offline rebuild.
+"""
+
+from array import array
+
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import Course, CourseRecommendation, Enrollment
+
+READ_CHUNK_SIZE = 50000
+WRITE_BATCH_SIZE = 5000
+
+
+def _load_enrollments():
+    """Read (student, course) pairs into two compact int64 arrays"""
+    students, courses = array("q"), array("q")
+    pairs = Enrollment.objects.values_list("student_id", "course_id")
+    for student_id, course_id in pairs.iterator(chunk_size=READ_CHUNK_SIZE):
+        students.append(student_id)
+        courses.append(course_id)
+    return students, courses
+
+
+def compute_neighbors(students, courses, top_k):
+    """
+    Return ``(course_ids, neighbor_ids, scores)`` arrays: for every course
+    with co-enrollments, up to ``top_k`` most similar courses by cosine
+    similarity of their student sets.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    students = np.frombuffer(students, dtype=np.int64)
+    courses = np.frombuffer(courses, dtype=np.int64)
+    empty = np.empty(0, dtype=np.int64)
+    if not len(courses):
+        return empty, empty, np.empty(0)
+
+    student_ids, student_idx = np.unique(students, return_inverse=True)
+    course_ids, course_idx = np.unique(courses, return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(courses), dtype=np.float32), (student_idx, course_idx)),
+        shape=(len(student_ids), len(course_ids)),
+    )
+    matrix.data[:] = 1  # collapse any duplicate pairs
+
+    co_enrollments = (matrix.T @ matrix).tocsr()
+    co_enrollments.setdiag(0)
+    co_enrollments.eliminate_zeros()
+
+    norms = np.sqrt(np.asarray(matrix.sum(axis=0)).ravel())
+    inverse = sparse.diags(1 / norms)
+    similarity = (inverse @ co_enrollments @ inverse).tocsr()
+
+    sources, targets, scores = [], [], []
+    for row in range(similarity.shape[0]):
+        start, end = similarity.indptr[row], similarity.indptr[row + 1]
+        if start == end:
+            continue
+        row_scores = similarity.data[start:end]
+        row_targets = similarity.indices[start:end]
+        if len(row_scores) > top_k:
+            keep = np.argpartition(-row_scores, top_k - 1)[:top_k]
+            row_scores, row_targets = row_scores[keep], row_targets[keep]
+        order = np.argsort(-row_scores, kind="stable")
+        sources.append(np.full(len(order), row))
+        targets.append(row_targets[order])
+        scores.append(row_scores[order])
+
+    if not sources:
+        return empty, empty, np.empty(0)
+    return (
+        course_ids[np.concatenate(sources)],
+        course_ids[np.concatenate(targets)],
+        np.concatenate(scores),
+    )
+
+
+def rebuild(top_k=20):
+    """Recompute and replace all stored recommendations; returns the row count"""
+    students, courses = _load_enrollments()
+    sources, targets, scores = compute_neighbors(students, courses, top_k)
+
+    def rows():
+        rank, previous = 0, None
+        for source, target, score in zip(
+            sources.tolist(), targets.tolist(), scores.tolist()
+        ):
+            rank = rank + 1 if source == previous else 1
+            previous = source
+            yield CourseRecommendation(
+                course_id=source, recommended_id=target, score=score, rank=rank
+            )
+
+    with transaction.atomic():
+        CourseRecommendation.objects.all().delete()
+        batch = []
+        for row in rows():
+            batch.append(row)
+            if len(batch) >= WRITE_BATCH_SIZE:
+                CourseRecommendation.objects.bulk_create(batch)
+                batch = []
+        CourseRecommendation.objects.bulk_create(batch)
+    return len(sources)
+
+
+def recommend_for(student, limit=6):
+    """
+    Published courses most similar to the student's enrollments, excluding
+    courses they already take, best first.
+    """
+    enrolled = Enrollment.objects.filter(student=student).values("course_id")
+    picks = (
+        CourseRecommendation.objects.filter(course_id__in=enrolled)
+        .exclude(recommended_id__in=enrolled)
+        .filter(recommended__is_published=True)
+        .values("recommended_id")
+        .annotate(total=Sum("score"))
+        .order_by("-total")[:limit]
+    )
+    ids = [row["recommended_id"] for row in picks]
+    courses = Course.objects.select_related("instructor").in_bulk(ids)
+    return [courses[pk] for pk in ids if pk in courses]
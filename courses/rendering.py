@@ -0,0 +1,82 @@
+"""
+Rendering of text lesson content.
+
+``content_text`` is converted to sanitized HTML once, when a lesson is
+saved, and stored on the lesson with its word count and reading time. The
+stored ``content_hash`` covers both the source text and RENDERER_VERSION, so
+bumping the version (or installing the optional Markdown dependencies)
+makes every stored rendering stale; stale lessons are re-rendered lazily
+when shown, or all at once with ``manage.py rerender_lessons``.
+
+Markdown is rendered when both ``markdown`` and ``nh3`` (the sanitizer) are
+installed. Otherwise the text is escaped and split into paragraphs.
+"""
+
+import hashlib
+import math
+from importlib.util import find_spec
+
+from django.utils.html import linebreaks, strip_tags
+
+# Checked without importing them: they are only loaded when text is rendered.
+MARKDOWN = find_spec("markdown") is not None and find_spec("nh3") is not None
+
+RENDERER_VERSION = "1-markdown" if MARKDOWN else "1-plain"
+WORDS_PER_MINUTE = 200
+
+MARKDOWN_EXTENSIONS = ["extra", "sane_lists"]
+ALLOWED_TAGS = {
+    "a", "abbr", "b", "blockquote", "br", "code", "dd", "del", "dl", "dt", "em",
+    "h1", "h2", "h3", "h4", "h5", "h6", "hr", "i", "img", "li", "ol", "p", "pre",
+    "strong", "sub", "sup", "table", "tbody", "td", "th", "thead", "tr", "ul",
+}  # fmt: skip
+ALLOWED_ATTRIBUTES = {
+    "a": {"href", "title"},
+    "abbr": {"title"},
+    "img": {"src", "alt", "title"},
+    "th": {"align"},
+    "td": {"align"},
+}
+
+
+def content_hash(text):
+    source = f"{RENDERER_VERSION}\0{text or ''}"
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def render(text):
+    """Return ``(html, word_count, reading_minutes)`` for lesson text"""
+    text = text or ""
+    if MARKDOWN:
+        import markdown
+        import nh3
+
+        html = markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+        html = nh3.clean(html, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES)
+    else:
+        html = linebreaks(text, autoescape=True)
+    words = len(strip_tags(html).split())
+    return html, words, math.ceil(words / WORDS_PER_MINUTE)
+
+
+def apply(lesson):
+    """Render ``lesson`` into its cached fields if they are stale"""
+    digest = content_hash(lesson.content_text)
+    if lesson.content_hash == digest:
+        return False
+    lesson.content_html, lesson.word_count, lesson.reading_minutes = render(
+        lesson.content_text
+    )
+    lesson.content_hash = digest
+    return True
+
+
+RENDERED_FIELDS = ["content_html", "word_count", "reading_minutes", "content_hash"]
+
+
+def refresh_stale(lessons):
+    """Re-render stale lessons in place and store them in one bulk update"""
+    stale = [lesson for lesson in lessons if apply(lesson)]
+    if stale:
+        type(stale[0]).objects.bulk_update(stale, RENDERED_FIELDS)
+    return lessons
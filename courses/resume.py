@@ -0,0 +1,104 @@
+"""
+Resume positions: the last lesson a student opened in a course and how far
+into it they got.
+
+The lessons page sends a heartbeat beacon while a video plays. Each one
+only overwrites a cache entry per student and course; at most once every
+RESUME_PERSIST_INTERVAL seconds (and on the final beacon sent when the
+player pauses, ends or the page is hidden) the latest position is written
+to the enrollment with a single UPDATE. Reads prefer the cached entry, so
+"continue" links are current even between writes.
+
+Coalescing needs the cache shared by every process (see
+elearning/caching.py); a private per-process cache would keep one gate per
+worker and lose the positions it holds on restart. With one, every beacon
+is written and reads use the enrollment.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from elearning import caching
+
+from . import dashboard
+from .models import Enrollment, Lesson
+
+# Long enough to outlive any gap between the final beacon and the next visit.
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def cache_key(student_id, course_id):
+    return f"resume:{student_id}:{course_id}"
+
+
+def _persist_gate_key(student_id, course_id):
+    return f"resume-persisted:{student_id}:{course_id}"
+
+
+def record(student_id, course_id, lesson_id, position, final=False):
+    """
+    Note a heartbeat at ``position`` seconds into ``lesson_id``.
+
+    Returns whether it was written to the database. Unknown lessons and
+    students not enrolled in the course are never written.
+    """
+    position = max(0, int(position))
+    if not caching.is_shared():
+        return persist(student_id, course_id, lesson_id, position)
+    cache.set(
+        cache_key(student_id, course_id),
+        {"lesson_id": lesson_id, "position": position, "at": time.time()},
+        CACHE_TIMEOUT,
+    )
+    # add() only succeeds once per interval for every process sharing the cache.
+    gate = _persist_gate_key(student_id, course_id)
+    if not cache.add(gate, 1, settings.RESUME_PERSIST_INTERVAL):
+        if not final:
+            return False
+        cache.set(gate, 1, settings.RESUME_PERSIST_INTERVAL)
+    return persist(student_id, course_id, lesson_id, position)
+
+
+def persist(student_id, course_id, lesson_id, position):
+    if not Lesson.objects.filter(pk=lesson_id, course_id=course_id).exists():
+        return False
+    updated = Enrollment.objects.filter(
+        student_id=student_id, course_id=course_id
+    ).update(
+        last_lesson_id=lesson_id,
+        last_position=position,
+        last_activity_at=timezone.now(),
+    )
+    if updated:
+        dashboard.invalidate_student(student_id)
+    return bool(updated)
+
+
+def timestamp(seconds):
+    """``seconds`` as a player shows them, e.g. 4:07 or 1:02:09"""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02}:{seconds:02}"
+    return f"{minutes}:{seconds:02}"
+
+
+def position_for(enrollment):
+    """``{"lesson_id", "position", "timestamp"}`` to resume ``enrollment`` at, or None"""
+    entry = None
+    if caching.is_shared():
+        entry = cache.get(cache_key(enrollment.student_id, enrollment.course_id))
+    if entry is not None:
+        lesson_id, position = entry["lesson_id"], entry["position"]
+    elif enrollment.last_lesson_id:
+        lesson_id, position = enrollment.last_lesson_id, enrollment.last_position
+    else:
+        return None
+    return {
+        "lesson_id": lesson_id,
+        "position": position,
+        "timestamp": timestamp(position),
+    }
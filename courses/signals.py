@@ -0,0 +1,168 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import analytics, autocomplete, catalog, dashboard, events, exams
+from .models import (
+    Announcement,
+    Answer,
+    Category,
+    Course,
+    Enrollment,
+    Lesson,
+    Question,
+    Quiz,
+    QuizAttempt,
+)
+
+
+@receiver(post_init, sender=Enrollment)
+def remember_enrollment_state(sender, instance, **kwargs):
+    """Keep the loaded progress so post_save can compute a delta without a query"""
+    instance._analytics_state = (
+        instance.__dict__.get("progress"),
+        instance.__dict__.get("is_completed"),
+    )
+
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        analytics.record_enrollment(instance)
+    else:
+        old_progress, old_completed = instance._analytics_state
+        if old_progress is not None and old_completed is not None:
+            analytics.record_progress(instance, old_progress, old_completed)
+        if (old_progress, old_completed) != (
+            instance.progress,
+            instance.is_completed,
+        ):
+            events.publish_on_commit(
+                events.student_channel(instance.student_id),
+                "progress",
+                {
+                    "course": instance.course_id,
+                    "progress": instance.progress,
+                    "completed": instance.is_completed,
+                },
+            )
+    remember_enrollment_state(sender, instance)
+    dashboard.invalidate_student(instance.student_id)
+
+
+@receiver(post_delete, sender=Enrollment)
+def enrollment_deleted(sender, instance, **kwargs):
+    old_progress, old_completed = instance._analytics_state
+    if old_progress is not None and old_completed is not None:
+        analytics.record_unenrollment(instance, old_progress, old_completed)
+    dashboard.invalidate_student(instance.student_id)
+
+
+@receiver(post_init, sender=QuizAttempt)
+def remember_attempt_state(sender, instance, **kwargs):
+    instance._analytics_state = (
+        instance.__dict__.get("completed_at"),
+        instance.__dict__.get("is_passed"),
+    )
+
+
+@receiver(post_save, sender=QuizAttempt)
+def quiz_attempt_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or instance.completed_at is None:
+        remember_attempt_state(sender, instance)
+        return
+
+    old_completed_at, old_passed = instance._analytics_state
+    course_id = (
+        Enrollment.objects.filter(pk=instance.enrollment_id)
+        .values_list("course_id", flat=True)
+        .first()
+    )
+    if course_id is not None:
+        if created or old_completed_at is None:
+            analytics.record_quiz_attempt(instance, course_id)
+        elif old_passed is not None:
+            passed_delta = int(instance.is_passed) - int(old_passed)
+            analytics.record_quiz_attempt(instance, course_id, passed_delta)
+    remember_attempt_state(sender, instance)
+
+
+@receiver(post_init, sender=Course)
+def remember_course_state(sender, instance, **kwargs):
+    instance._was_published = instance.__dict__.get("is_published")
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, **kwargs):
+    """Published catalog content changed, so cached facet counts are stale"""
+    if instance.is_published or instance._was_published:
+        catalog.invalidate()
+        autocomplete.course_changed(instance)
+    instance._was_published = instance.is_published
+    dashboard.invalidate_courses([instance.pk])
+
+
+@receiver(post_delete, sender=Course)
+def course_deleted(sender, instance, **kwargs):
+    catalog.invalidate()
+    autocomplete.course_removed(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def catalog_changed(sender, **kwargs):
+    catalog.invalidate()
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def lesson_changed(sender, instance, raw=False, **kwargs):
+    """Next lessons and remaining time on the course's dashboards are stale"""
+    if not raw:
+        dashboard.invalidate_courses([instance.course_id])
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def quiz_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        exams.invalidate_paper(instance.pk)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        exams.invalidate_paper(instance.quiz_id)
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def answer_changed(sender, instance, raw=False, **kwargs):
+    """Answers change a quiz's marking key; its cached paper is stale"""
+    if raw:
+        return
+    quiz_id = (
+        Question.objects.filter(pk=instance.question_id)
+        .values_list("quiz_id", flat=True)
+        .first()
+    )
+    if quiz_id is not None:
+        exams.invalidate_paper(quiz_id)
+
+
+@receiver(post_save, sender=Announcement)
+def announcement_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        events.publish_on_commit(
+            events.course_channel(instance.course_id),
+            "announcement",
+            {
+                "id": instance.pk,
+                "course": instance.course_id,
+                "title": instance.title,
+                "message": instance.message,
+                "created_at": instance.created_at.isoformat(),
+            },
+        )
@@ -1,3 +1,1530 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+
+from django.db import connection, connections
+from django.http import HttpResponse, QueryDict
+from django.middleware.csrf import get_token
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from elearning import middleware
+from . import (
+    autocomplete,
+    cards,
+    catalog,
+    dashboard,
+    events,
+    exams,
+    files,
+    jobs,
+    progress,
+    publishing,
+    recommendations,
+    rendering,
+)
+from .admin import EstimatedCountPaginator
+from .enrollments import enroll
+from .packages import PackageError, export_course, import_course
+from .models import (
+    Answer,
+    Category,
+    Course,
+    CourseDailyStats,
+    CourseRecommendation,
+    CourseStats,
+    Enrollment,
+    InstructorStats,
+    Lesson,
+    Question,
+    Quiz,
+    QuizAnswer,
+    QuizAttempt,
+)
+
+PLAIN_STATIC = "django.contrib.staticfiles.storage.StaticFilesStorage"
+# A cache every process can see, unlike the default local-memory one
+SHARED_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(tempfile.gettempdir(), "elearning-test-cache"),
+    }
+}
+
+
+@override_settings(STATICFILES_STORAGE=PLAIN_STATIC)
+class AdminChangelistQueryTests(TestCase):
+    """Changelist pages must cost a constant number of queries per page"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            "root", "root@example.com", "pass", user_type="admin"
+        )
+        cls.instructor = User.objects.create_user(
+            "teacher", password="pass", user_type="instructor"
+        )
+        cls.category = Category.objects.create(name="Testing")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        start = Course.objects.count()
+        for i in range(start, start + count):
+            course = Course.objects.create(
+                title=f"Course {i}",
+                description="d",
+                category=self.category,
+                instructor=self.instructor,
+            )
+            student = User.objects.create_user(f"student{i}", user_type="student")
+            enrollment = Enrollment.objects.create(student=student, course=course)
+            quiz = Quiz.objects.create(course=course, title=f"Quiz {i}")
+            question = Question.objects.create(
+                quiz=quiz, text=f"Question {i}", question_type="mcq"
+            )
+            answer = Answer.objects.create(question=question, text="A")
+            attempt = QuizAttempt.objects.create(
+                enrollment=enrollment, quiz=quiz, completed_at=timezone.now()
+            )
+            QuizAnswer.objects.create(
+                attempt=attempt, question=question, selected_answer=answer
+            )
+
+    def changelist_queries(self, model_name):
+        url = reverse(f"admin:courses_{model_name}_changelist")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        for model_name in (
+            "enrollment",
+            "quizattempt",
+            "quizanswer",
+            "answer",
+            "question",
+            "lesson",
+            "quiz",
+            "course",
+        ):
+            with self.subTest(model_name):
+                self.add_rows(2)
+                small = self.changelist_queries(model_name)
+                self.add_rows(10)
+                large = self.changelist_queries(model_name)
+                self.assertEqual(small, large)
+                self.assertLessEqual(large, 10)
+
+    def test_related_id_filter(self):
+        self.add_rows(3)
+        quiz = Quiz.objects.first()
+        url = reverse("admin:courses_quizattempt_changelist")
+        response = self.client.get(url, {"quiz__id__exact": quiz.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["cl"].result_count, 1)
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def test_small_tables_are_counted_exactly(self):
+        category = Category.objects.create(name="Testing")
+        Course.objects.create(
+            title="Only",
+            description="d",
+            category=category,
+            instructor=User.objects.create_user("t", user_type="instructor"),
+        )
+        paginator = EstimatedCountPaginator(Course.objects.all(), 20)
+        self.assertEqual(paginator.count, 1)
+
+    def test_large_unfiltered_tables_use_estimate(self):
+        paginator = EstimatedCountPaginator(Category.objects.all(), 20)
+        paginator.exact_count_threshold = 0
+        paginator._estimate = lambda model: 123456
+        self.assertEqual(paginator.count, 123456)
+        filtered = EstimatedCountPaginator(Category.objects.filter(pk=1), 20)
+        filtered._estimate = lambda model: 123456
+        self.assertEqual(filtered.count, 0)
+
+
+def _enroll_all(course_id, student_ids):
+    """Stress worker: enroll each student, returning (created, errors)"""
+    created, errors = 0, []
+    course = Course(pk=course_id)
+    try:
+        for student_id in student_ids:
+            try:
+                created += enroll(User(pk=student_id), course)[1]
+            except Exception as e:
+                errors.append(repr(e))
+    finally:
+        connections.close_all()
+    return created, errors
+
+
+class CoursePackageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user(
+            "package_teacher", user_type="instructor"
+        )
+        cls.course = Course.objects.create(
+            title="Packed",
+            description="d",
+            category=Category.objects.create(name="Packing"),
+            instructor=cls.instructor,
+            level="advanced",
+            price="49.50",
+        )
+        lesson = Lesson.objects.create(
+            course=cls.course,
+            title="Reading",
+            lesson_type="text",
+            content_text="Some *text*",
+            order=1,
+        )
+        quiz = Quiz.objects.create(course=cls.course, lesson=lesson, title="Check")
+        question = Question.objects.create(quiz=quiz, text="Sure?", question_type="mcq")
+        Answer.objects.create(question=question, text="Yes", is_correct=True)
+        Answer.objects.create(question=question, text="No")
+
+    def records(self):
+        return [json.loads(line) for line in export_course(self.course)]
+
+    def load(self, records):
+        return import_course([json.dumps(r) for r in records], self.instructor)
+
+    def test_export_then_import_copies_the_course(self):
+        course, counts = self.load(self.records())
+        self.assertEqual(counts, {"lesson": 1, "quiz": 1, "question": 1, "answer": 2})
+        self.assertNotEqual(course.slug, self.course.slug)
+        self.assertFalse(course.is_published)
+        self.assertEqual((course.level, str(course.price)), ("advanced", "49.50"))
+        lesson = course.lessons.get()
+        self.assertEqual(lesson.content_text, "Some *text*")
+        self.assertTrue(lesson.content_html)
+        question = Question.objects.get(quiz__course=course)
+        self.assertEqual(question.quiz.lesson, lesson)
+        self.assertEqual(
+            sorted(question.answers.values_list("text", "is_correct")),
+            [("No", False), ("Yes", True)],
+        )
+
+    def test_malformed_packages_are_package_errors(self):
+        def lesson_with(**changes):
+            records = self.records()
+            records[1].update(changes)
+            return records
+
+        missing_category = self.records()
+        del missing_category[0]["category"]
+        wrong_level = self.records()
+        wrong_level[0]["level"] = "wizard"
+        bad_file = lesson_with(content_file="a.pdf")
+        bad_file.insert(2, {"type": "file", "lesson": 1, "data": "!!", "last": True})
+        cases = {
+            "missing category": missing_category,
+            "unknown level": wrong_level,
+            "unknown lesson type": lesson_with(lesson_type="hologram"),
+            "wrong value type": lesson_with(order=["first"]),
+            "bad base64": bad_file,
+            "not an object": [[1, 2]],
+        }
+        for name, records in cases.items():
+            with self.subTest(name), self.assertRaises(PackageError):
+                self.load(records)
+        self.assertEqual(Course.objects.count(), 1)
+
+    def test_imported_file_lessons_are_queued_for_processing(self):
+        records = self.records()
+        data = base64.b64encode(b"%PDF-1.4 stub").decode()
+        records[2:2] = [
+            {
+                "type": "lesson",
+                "ref": 2,
+                "title": "Slides",
+                "lesson_type": "pdf",
+                "content_file": "slides.pdf",
+            },
+            {"type": "file", "lesson": 2, "data": data, "last": True},
+        ]
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            course, counts = self.load(records)
+            lesson = course.lessons.get(lesson_type="pdf")
+            self.assertTrue(lesson.content_file.name.endswith(".pdf"))
+            self.assertEqual(lesson.pdf_source, lesson.content_file.name)
+            self.assertEqual(lesson.pdf_status, Lesson.PENDING)
+            self.assertEqual((lesson.video_source, lesson.video_status), ("", ""))
+            self.assertEqual(counts["lesson"], 2)
+
+
+class LessonQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(
+            title="Queued",
+            description="d",
+            category=Category.objects.create(name="Queueing"),
+            instructor=User.objects.create_user("queue_teacher"),
+        )
+        cls.lesson = Lesson.objects.create(course=course, title="Doc", order=1)
+
+    def setUp(self):
+        self.queue = jobs.LessonQueue("pdf")
+        self.set_source("first.pdf")
+
+    def set_source(self, source):
+        Lesson.objects.filter(pk=self.lesson.pk).update(
+            pdf_source=source, pdf_status=Lesson.PENDING
+        )
+
+    def status(self):
+        return Lesson.objects.values_list("pdf_status", "pdf_error").get(
+            pk=self.lesson.pk
+        )
+
+    def test_claim_takes_each_pending_lesson_once(self):
+        claimed = self.queue.claim(10)
+        self.assertEqual(
+            claimed, [(self.lesson.pk, self.lesson.course_id, "first.pdf")]
+        )
+        self.assertEqual(self.status(), (Lesson.PROCESSING, ""))
+        self.assertEqual(self.queue.claim(10), [])
+
+    def test_results_for_a_replaced_source_are_dropped(self):
+        ((pk, _, source),) = self.queue.claim(10)
+        self.set_source("second.pdf")
+        self.assertFalse(self.queue.complete(pk, source, pdf_text="stale"))
+        self.queue.fail(pk, source, "boom")
+        self.assertEqual(self.status(), (Lesson.PENDING, ""))
+        self.assertEqual([c[2] for c in self.queue.claim(10)], ["second.pdf"])
+        self.assertTrue(self.queue.complete(pk, "second.pdf"))
+        self.assertEqual(self.status(), (Lesson.READY, ""))
+
+    def test_fail_records_the_error(self):
+        ((pk, _, source),) = self.queue.claim(10)
+        self.queue.fail(pk, source, "broken file")
+        self.assertEqual(self.status(), (Lesson.FAILED, "broken file"))
+
+
+class ByteRangeTests(SimpleTestCase):
+    def test_parse_range(self):
+        cases = {
+            "bytes=0-9": (0, 9),
+            "bytes=90-": (90, 99),
+            "bytes=95-200": (95, 99),
+            "bytes=-10": (90, 99),
+            "bytes=-500": (0, 99),
+            "bytes=-0": False,
+            "bytes=100-": False,
+            "bytes=150-160": False,
+            "bytes=9-5": False,
+            "bytes=0-9,20-29": None,
+            "items=0-9": None,
+            "bytes=-": None,
+            "": None,
+            None: None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header):
+                self.assertEqual(files.parse_range(header, 100), expected)
+
+    def test_ranged_file_response(self):
+        factory = RequestFactory()
+        with tempfile.TemporaryDirectory() as root:
+            storage = FileSystemStorage(location=root)
+            name = storage.save("doc.pdf", ContentFile(bytes(range(100))))
+
+            def get(**headers):
+                request = factory.get("/", headers=headers)
+                response = files.ranged_file_response(
+                    request, storage, name, "application/pdf"
+                )
+                body = b"".join(getattr(response, "streaming_content", []))
+                return response, body
+
+            response, body = get(Range="bytes=-10")
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response["Content-Range"], "bytes 90-99/100")
+            self.assertEqual(body, bytes(range(90, 100)))
+            etag = response["ETag"]
+
+            response, _ = get(Range="bytes=100-")
+            self.assertEqual(response.status_code, 416)
+            self.assertEqual(response["Content-Range"], "bytes */100")
+
+            for headers in (
+                {"Range": "bytes=0-9,20-29"},
+                {"Range": "bytes=0-9", "If-Range": '"replaced"'},
+            ):
+                with self.subTest(headers):
+                    response, body = get(**headers)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(len(body), 100)
+
+            response, body = get(**{"Range": "bytes=0-9", "If-Range": etag})
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(body, bytes(range(10)))
+
+
+class EnrollTests(TestCase):
+    def test_enrolling_twice_creates_one_enrollment(self):
+        instructor = User.objects.create_user("enroll_teacher", user_type="instructor")
+        student = User.objects.create_user("enroll_student", user_type="student")
+        course = Course.objects.create(
+            title="Once",
+            description="d",
+            category=Category.objects.create(name="Enrolling"),
+            instructor=instructor,
+            is_published=True,
+        )
+        enrollment, created = enroll(student, course)
+        self.assertTrue(created)
+        again, created = enroll(student, course)
+        self.assertFalse(created)
+        self.assertEqual(again.pk, enrollment.pk)
+        self.assertEqual((again.progress, again.last_position), (0, 0))
+        self.assertIsNone(again.last_lesson_id)
+        self.assertEqual(CourseStats.objects.get(course=course).enrollments, 1)
+
+
+class ProgressLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user("log_teacher", user_type="instructor")
+        course = Course.objects.create(
+            title="Logged",
+            description="d",
+            category=Category.objects.create(name="Logging"),
+            instructor=instructor,
+        )
+        cls.lessons = [
+            Lesson.objects.create(course=course, title=f"Part {n}", order=n)
+            for n in (1, 2)
+        ]
+        cls.enrollment = Enrollment.objects.create(
+            student=User.objects.create_user("log_student"), course=course
+        )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = Path(directory.name)
+        self.at = timezone.now().isoformat()
+
+    def dead_pid(self):
+        child = subprocess.Popen([sys.executable, "-c", ""])
+        child.wait()
+        return child.pid
+
+    def write_segment(self, name):
+        event = {
+            "enrollment": self.enrollment.pk,
+            "lesson": self.lessons[0].pk,
+            "at": self.at,
+        }
+        (self.dir / name).write_text(json.dumps(event) + "\n")
+
+    def assertHalfDone(self):
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.progress, 50)
+        self.assertFalse(self.enrollment.is_completed)
+        self.lessons[0].refresh_from_db()
+        self.assertTrue(self.lessons[0].is_completed)
+
+    def test_drain_replays_a_segment_claimed_by_a_dead_process(self):
+        pid = self.dead_pid()
+        self.write_segment(f"progress-{pid}-1{progress.CLAIMED_SUFFIX}-{pid}")
+        self.assertEqual(progress.drain(self.dir), 1)
+        self.assertHalfDone()
+        self.assertEqual(list(self.dir.iterdir()), [])
+
+    def test_drain_leaves_live_segments_alone(self):
+        self.write_segment(f"progress-{os.getpid()}-1{progress.ACTIVE_SUFFIX}")
+        self.assertEqual(progress.drain(self.dir), 0)
+        self.assertEqual(len(list(self.dir.iterdir())), 1)
+
+    def test_replaying_a_segment_twice_counts_it_once(self):
+        for _ in range(2):
+            self.write_segment(f"progress-{os.getpid()}-1{progress.SEALED_SUFFIX}")
+            self.assertEqual(progress.drain(self.dir), 1)
+            self.assertHalfDone()
+
+    def test_drain_without_segments_does_nothing(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(progress.drain(self.dir), 0)
+            self.assertEqual(progress.drain(self.dir / "missing"), 0)
+
+    def test_flush_applies_the_active_segment(self):
+        log = progress.ProgressLog(self.dir, interval=3600)
+        log.append(
+            {
+                "enrollment": self.enrollment.pk,
+                "lesson": self.lessons[0].pk,
+                "at": timezone.now().isoformat(),
+            }
+        )
+        self.assertEqual(log.pending_lessons, {self.lessons[0].pk})
+        self.assertEqual(log.flush(), 1)
+        self.assertEqual(log.pending_lessons, set())
+        self.assertHalfDone()
+        log.flusher_pid = None  # stop the flusher thread
+
+
+class EnrollmentConcurrencyTests(TransactionTestCase):
+    """
+    Duplicate enrollments fired in parallel at one course stay exact. Needs
+    a test database other threads and processes can open, so it is skipped
+    on an in-memory SQLite test database.
+    """
+
+    STUDENTS = 200
+    REPEATS = 10
+    WORKERS = 8
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("in-memory SQLite test database")
+        instructor = User.objects.create_user("teacher", user_type="instructor")
+        self.course = Course.objects.create(
+            title="Launch",
+            description="d",
+            category=Category.objects.create(name="Testing"),
+            instructor=instructor,
+            is_published=True,
+        )
+        User.objects.bulk_create(
+            User(username=f"student{i}", user_type="student")
+            for i in range(self.STUDENTS)
+        )
+        student_ids = list(
+            User.objects.filter(user_type="student").values_list("pk", flat=True)
+        )
+        attempts = student_ids * self.REPEATS
+        self.chunks = [attempts[i :: self.WORKERS] for i in range(self.WORKERS)]
+
+    def assert_enrolled_once(self, results):
+        created = sum(result[0] for result in results)
+        errors = [error for result in results for error in result[1]]
+        self.assertEqual(errors, [])
+        self.assertEqual(created, self.STUDENTS)
+        self.assertEqual(
+            Enrollment.objects.filter(course=self.course).count(), self.STUDENTS
+        )
+        self.assertEqual(
+            CourseStats.objects.get(course=self.course).enrollments, self.STUDENTS
+        )
+
+    def test_threads(self):
+        with ThreadPoolExecutor(self.WORKERS) as pool:
+            results = list(
+                pool.map(_enroll_all, [self.course.pk] * self.WORKERS, self.chunks)
+            )
+        self.assert_enrolled_once(results)
+
+    def test_processes(self):
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        with context.Pool(self.WORKERS) as pool:
+            results = pool.starmap(
+                _enroll_all, [(self.course.pk, chunk) for chunk in self.chunks]
+            )
+        self.assert_enrolled_once(results)
+
+
+@override_settings(STATICFILES_STORAGE=PLAIN_STATIC)
+class AnalyticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user(
+            "stats_teacher", user_type="instructor"
+        )
+        cls.course = Course.objects.create(
+            title="Counted course",
+            description="d",
+            category=Category.objects.create(name="Counting"),
+            instructor=cls.instructor,
+            is_published=True,
+        )
+        cls.quiz = Quiz.objects.create(course=cls.course, title="Check")
+
+    def enroll(self, username, progress=0):
+        student = User.objects.create_user(username, user_type="student")
+        return Enrollment.objects.create(
+            student=student, course=self.course, progress=progress
+        )
+
+    def counters(self):
+        stats = CourseStats.objects.get(course=self.course)
+        return (
+            stats.enrollments,
+            stats.completions,
+            stats.progress_sum,
+            stats.quiz_attempts,
+            stats.quiz_passes,
+        )
+
+    def test_events_keep_the_counters_up_to_date(self):
+        first = self.enroll("stats_first")
+        second = self.enroll("stats_second", progress=40)
+        first.progress, first.is_completed = 100, True
+        first.save()
+        QuizAttempt.objects.create(
+            enrollment=first,
+            quiz=self.quiz,
+            completed_at=timezone.now(),
+            is_passed=True,
+        )
+        QuizAttempt.objects.create(
+            enrollment=first,
+            quiz=Quiz.objects.create(course=self.course, title="Retry"),
+            completed_at=timezone.now(),
+        )
+        self.assertEqual(self.counters(), (2, 1, 140, 2, 1))
+        daily = CourseDailyStats.objects.get(course=self.course)
+        self.assertEqual(daily.date, timezone.localdate())
+        self.assertEqual(
+            (daily.new_enrollments, daily.completions, daily.course_average_progress),
+            (2, 1, 70),
+        )
+        self.assertEqual(
+            InstructorStats.objects.get(instructor=self.instructor).enrollments, 2
+        )
+
+        second.delete()
+        self.assertEqual(self.counters(), (1, 1, 100, 2, 1))
+        rebuilt_from = self.counters()
+        call_command("rebuild_analytics", stdout=StringIO())
+        self.assertEqual(self.counters(), rebuilt_from)
+
+    def test_dashboard_reads_the_counters(self):
+        self.enroll("stats_done", progress=100)
+        self.enroll("stats_started", progress=50)
+        self.client.force_login(self.instructor)
+        response = self.client.get(reverse("instructor_dashboard"))
+        self.assertContains(response, "Counted course")
+        self.assertEqual(response.context["totals"].enrollments, 2)
+        self.assertEqual(response.context["totals"].average_progress, 75)
+        (stats,) = response.context["course_stats"]
+        self.assertEqual((stats.course, stats.enrollments), (self.course, 2))
+        (today,) = response.context["daily"]
+        self.assertEqual(today["new_enrollments"], 2)
+
+    def test_dashboard_is_for_instructors(self):
+        self.client.force_login(self.enroll("stats_peek").student)
+        response = self.client.get(reverse("instructor_dashboard"))
+        self.assertRedirects(response, reverse("home"), fetch_redirect_response=False)
+
+
+class CsvExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Exporting")
+        cls.instructor = User.objects.create_user(
+            "export_teacher", user_type="instructor"
+        )
+        cls.course, other = [
+            Course.objects.create(
+                title=title, description="d", category=category, instructor=instructor
+            )
+            for title, instructor in (
+                ("Mine, exported", cls.instructor),
+                ("Theirs", User.objects.create_user("other_teacher")),
+            )
+        ]
+        cls.student = User.objects.create_user(
+            "export_student", email="s@example.com", user_type="student"
+        )
+        enrollment = Enrollment.objects.create(
+            student=cls.student, course=cls.course, progress=30
+        )
+        Enrollment.objects.create(student=cls.student, course=other)
+        QuizAttempt.objects.create(
+            enrollment=enrollment,
+            quiz=Quiz.objects.create(course=cls.course, title="Final"),
+            completed_at=timezone.now(),
+            score=8,
+            total_marks=10,
+            is_passed=True,
+        )
+
+    def download(self, name, **params):
+        self.client.force_login(self.instructor)
+        response = self.client.get(reverse(name), params)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        content = b"".join(response.streaming_content).decode()
+        return list(csv.DictReader(content.splitlines()))
+
+    def test_instructors_export_their_own_enrollments(self):
+        (row,) = self.download("export_enrollments")
+        self.assertEqual(row["course"], "Mine, exported")
+        self.assertEqual(
+            (row["student"], row["email"], row["progress"]),
+            ("export_student", "s@example.com", "30"),
+        )
+
+    def test_quiz_results_can_be_filtered_by_course(self):
+        (row,) = self.download("export_quiz_results", course=self.course.pk)
+        self.assertEqual(
+            (row["quiz"], row["score"], row["is_passed"]), ("Final", "8.0", "True")
+        )
+        self.assertEqual(
+            self.download("export_quiz_results", course=self.course.pk + 1), []
+        )
+
+    def test_students_cannot_export(self):
+        self.client.force_login(self.student)
+        response = self.client.get(reverse("export_enrollments"))
+        self.assertRedirects(response, reverse("home"), fetch_redirect_response=False)
+
+
+@skipUnless(
+    find_spec("numpy") and find_spec("scipy"), "numpy and scipy are not installed"
+)
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Recommending")
+        instructor = User.objects.create_user("rec_teacher", user_type="instructor")
+        cls.python, cls.django, cls.drawing = [
+            Course.objects.create(
+                title=title,
+                description="d",
+                category=category,
+                instructor=instructor,
+                is_published=True,
+            )
+            for title in ("Python", "Django", "Drawing")
+        ]
+        cls.students = [User.objects.create_user(f"rec_{n}") for n in range(3)]
+        taken = [
+            (cls.python, cls.django),
+            (cls.python, cls.django),
+            (cls.python, cls.drawing),
+        ]
+        for student, courses in zip(cls.students, taken):
+            for course in courses:
+                Enrollment.objects.create(student=student, course=course)
+
+    def test_compute_neighbors_keeps_the_top_k_by_cosine(self):
+        pairs = [(1, 10), (1, 20), (2, 10), (2, 20), (3, 10), (3, 30), (3, 30)]
+        students = array("q", [student for student, _ in pairs])
+        courses = array("q", [course for _, course in pairs])
+        sources, targets, scores = recommendations.compute_neighbors(
+            students, courses, top_k=1
+        )
+        self.assertEqual(sources.tolist(), [10, 20, 30])
+        self.assertEqual(targets.tolist(), [20, 10, 10])
+        expected = [2 / (3**0.5 * 2**0.5), 2 / (3**0.5 * 2**0.5), 1 / 3**0.5]
+        for score, value in zip(scores.tolist(), expected):
+            self.assertAlmostEqual(score, value, places=5)
+
+        sources, _, _ = recommendations.compute_neighbors(array("q"), array("q"), 5)
+        self.assertEqual(len(sources), 0)
+
+    def test_recommendations_skip_taken_and_unpublished_courses(self):
+        self.assertEqual(recommendations.rebuild(top_k=5), 4)
+        ranked = CourseRecommendation.objects.filter(course=self.python)
+        self.assertEqual(
+            list(ranked.order_by("rank").values_list("recommended", flat=True)),
+            [self.django.pk, self.drawing.pk],
+        )
+        self.assertEqual(recommendations.recommend_for(self.students[2]), [self.django])
+        self.assertEqual(
+            recommendations.recommend_for(self.students[0]), [self.drawing]
+        )
+        Course.objects.filter(pk=self.drawing.pk).update(is_published=False)
+        self.assertEqual(recommendations.recommend_for(self.students[0]), [])
+
+
+class PrefixIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = autocomplete.PrefixIndex()
+        self.index.load(
+            [
+                (n, label, weight, label)
+                for n, (label, weight) in enumerate(
+                    [
+                        ("Python for Data Science", 30),
+                        ("Practical Python", 50),
+                        ("Pottery basics", 5),
+                        ("Café French", 1),
+                    ]
+                )
+            ]
+        )
+
+    def test_prefixes_match_whole_words_best_first(self):
+        search = self.index.search
+        self.assertEqual(
+            search("p"),
+            ["Practical Python", "Python for Data Science", "Pottery basics"],
+        )
+        self.assertEqual(
+            search("pyth"), ["Practical Python", "Python for Data Science"]
+        )
+        self.assertEqual(search("DATA pyt"), ["Python for Data Science"])
+        self.assertEqual(search("cafe"), ["Café French"])
+        self.assertEqual(search("thon"), [])
+        self.assertEqual(search("  "), [])
+
+    def test_add_and_remove_update_short_prefixes(self):
+        self.index.search("po")
+        self.index.add(9, "Portuguese", 99, "Portuguese")
+        self.assertEqual(self.index.search("po"), ["Portuguese", "Pottery basics"])
+        self.index.remove(9)
+        self.index.remove(2)
+        self.assertEqual(self.index.search("po"), [])
+        self.assertEqual(self.index.search("pr"), ["Practical Python"])
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(
+            title="Watercolour",
+            description="d",
+            category=Category.objects.create(name="Painting"),
+            instructor=User.objects.create_user("auto_teacher"),
+            is_published=True,
+        )
+
+    def setUp(self):
+        patcher = mock.patch.multiple(
+            autocomplete, _index=None, _generation=None, _checked_at=0.0
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def labels(self, query):
+        response = self.client.get(reverse("search_autocomplete"), {"q": query})
+        return [result["label"] for result in response.json()["results"]]
+
+    def test_saves_in_this_process_patch_the_index(self):
+        self.assertEqual(self.labels("water"), ["Watercolour"])
+        self.assertEqual(self.labels("paint"), ["Painting"])
+        self.course.title = "Oil painting"
+        self.course.save()
+        self.assertEqual(self.labels("water"), [])
+        self.assertEqual(self.labels("oil"), ["Oil painting"])
+
+    def test_a_new_generation_rebuilds_the_index(self):
+        self.assertEqual(self.labels("water"), ["Watercolour"])
+        # Another process renamed the course and bumped the generation.
+        Course.objects.filter(pk=self.course.pk).update(title="Gouache")
+        catalog.invalidate()
+        self.assertEqual(self.labels("gou"), [])  # not checked again yet
+        autocomplete._checked_at = 0.0
+        self.assertEqual(self.labels("gou"), ["Gouache"])
+        self.assertEqual(self.labels("water"), [])
+
+
+@override_settings(STATICFILES_STORAGE=PLAIN_STATIC)
+class CourseCardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(
+            title="Knitting",
+            description="d",
+            category=Category.objects.create(name="Crafts"),
+            instructor=User.objects.create_user("card_teacher", first_name="Ada"),
+            is_published=True,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self):
+        course = Course.objects.select_related("instructor").get(pk=self.course.pk)
+        with mock.patch(
+            "courses.cards.render_to_string", wraps=cards.render_to_string
+        ) as rendered:
+            (html,) = cards.render_cards([course])
+        return html, rendered.call_count
+
+    def test_cards_are_rendered_once_per_version_of_the_course(self):
+        html, renders = self.render()
+        self.assertIn("Knitting", html)
+        self.assertIn("Ada", html)
+        self.assertEqual(renders, 1)
+        self.assertEqual(self.render(), (html, 0))
+
+        self.course.title = "Crochet"
+        self.course.save()
+        html, renders = self.render()
+        self.assertIn("Crochet", html)
+        self.assertEqual(renders, 1)
+
+    def test_catalog_shows_the_edited_card(self):
+        self.assertContains(self.client.get(reverse("course_list")), "Knitting")
+        self.course.title = "Crochet"
+        self.course.save()
+        response = self.client.get(reverse("course_list"))
+        self.assertContains(response, "Crochet")
+        self.assertNotContains(response, "Knitting")
+
+
+class LessonRenderingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.course = Course.objects.create(
+            title="Rendered",
+            description="d",
+            category=Category.objects.create(name="Rendering"),
+            instructor=User.objects.create_user("render_teacher"),
+        )
+
+    def stored(self, lesson):
+        return Lesson.objects.values_list(*rendering.RENDERED_FIELDS).get(pk=lesson.pk)
+
+    def test_text_is_rendered_and_sanitized_on_save(self):
+        lesson = Lesson.objects.create(
+            course=self.course,
+            title="Intro",
+            content_text="Hello <script>alert(1)</script> there\n\n" + "word " * 250,
+            order=1,
+        )
+        html, words, minutes, digest = self.stored(lesson)
+        self.assertIn("Hello", html)
+        self.assertNotIn("<script>", html)
+        self.assertGreaterEqual(words, 252)
+        self.assertEqual(minutes, 2)
+        self.assertEqual(digest, rendering.content_hash(lesson.content_text))
+
+    def test_update_fields_saves_include_the_rendering(self):
+        lesson = Lesson.objects.create(
+            course=self.course, title="Intro", content_text="Old", order=1
+        )
+        lesson.content_text = "New text"
+        lesson.save(update_fields=["content_text"])
+        self.assertIn("New text", self.stored(lesson)[0])
+
+    def test_unchanged_text_is_not_rendered_again(self):
+        lesson = Lesson.objects.create(
+            course=self.course, title="Intro", content_text="Same", order=1
+        )
+        with mock.patch.object(rendering, "render") as render:
+            lesson.title = "Renamed"
+            lesson.save()
+        render.assert_not_called()
+
+    def test_a_new_renderer_version_makes_lessons_stale(self):
+        lesson = Lesson.objects.create(
+            course=self.course, title="Intro", content_text="Text", order=1
+        )
+        with mock.patch.object(rendering, "RENDERER_VERSION", "2-test"):
+            rendering.refresh_stale([Lesson.objects.get(pk=lesson.pk)])
+            self.assertEqual(self.stored(lesson)[3], rendering.content_hash("Text"))
+        self.assertNotEqual(self.stored(lesson)[3], rendering.content_hash("Text"))
+
+
+@override_settings(STATICFILES_STORAGE=PLAIN_STATIC)
+class StudentDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user("dash_teacher", user_type="instructor")
+        cls.student = User.objects.create_user("dash_student", user_type="student")
+        category = Category.objects.create(name="Dashboards")
+        for i in range(3):
+            course = Course.objects.create(
+                title=f"Dashboard course {i}",
+                description="d",
+                category=category,
+                instructor=instructor,
+                is_published=True,
+            )
+            for order in range(3):
+                Lesson.objects.create(
+                    course=course, title=f"Lesson {order}", order=order, duration=10
+                )
+            Enrollment.objects.create(student=cls.student, course=course)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.student)
+
+    def dashboard_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("my_courses"))
+        self.assertEqual(response.status_code, 200)
+        return response, [
+            query["sql"] for query in ctx if "courses_enrollment" in query["sql"]
+        ]
+
+    def test_two_queries_then_cached_until_progress(self):
+        # The course ids (to read their versions), then the dashboard rows
+        response, queries = self.dashboard_queries()
+        self.assertEqual(len(queries), 2)
+        self.assertContains(response, "Next: Lesson 0")
+        self.assertContains(response, "30 min left", count=3)
+
+        self.assertEqual(self.dashboard_queries()[1], [])
+
+        lesson = Lesson.objects.get(course__title="Dashboard course 1", order=0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("update_lesson_progress", args=[lesson.pk]))
+        response, queries = self.dashboard_queries()
+        self.assertEqual(len(queries), 2)
+        self.assertContains(response, "Next: Lesson 1")
+        self.assertContains(response, "20 min left", count=1)
+
+    def test_course_edits_bump_a_version_instead_of_deleting_entries(self):
+        self.dashboard_queries()
+        lesson = Lesson.objects.get(course__title="Dashboard course 2", order=0)
+        lesson.title = "Renamed first lesson"
+        with CaptureQueriesContext(connection) as ctx:
+            with self.captureOnCommitCallbacks(execute=True):
+                lesson.save()
+        self.assertFalse([q for q in ctx if "courses_enrollment" in q["sql"]])
+        self.assertIsNotNone(cache.get(dashboard.cache_key(self.student.pk)))
+        response, queries = self.dashboard_queries()
+        self.assertEqual(len(queries), 2)
+        self.assertContains(response, "Next: Renamed first lesson")
+        self.assertEqual(self.dashboard_queries()[1], [])
+
+
+@override_settings(
+    STATICFILES_STORAGE=PLAIN_STATIC, RESUME_PERSIST_INTERVAL=60, CACHES=SHARED_CACHES
+)
+class ResumePositionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user("resume_teacher", user_type="instructor")
+        cls.student = User.objects.create_user("resume_student", user_type="student")
+        cls.course = Course.objects.create(
+            title="Resumable",
+            description="d",
+            category=Category.objects.create(name="Resuming"),
+            instructor=instructor,
+            is_published=True,
+        )
+        cls.lesson = Lesson.objects.create(
+            course=cls.course, title="Long video", lesson_type="video", order=1
+        )
+        publishing.publish(cls.course)
+        cls.enrollment = Enrollment.objects.create(
+            student=cls.student, course=cls.course
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.student)
+
+    def beat(self, position, **extra):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                reverse("record_resume_position", args=[self.course.pk]),
+                {"lesson": self.lesson.pk, "position": position, **extra},
+            )
+        self.assertEqual(response.status_code, 204)
+        return [query["sql"] for query in ctx if "courses_" in query["sql"]]
+
+    def test_heartbeats_are_coalesced_between_writes(self):
+        self.assertTrue(any("UPDATE" in sql for sql in self.beat(15)))
+        self.assertEqual(self.beat(30), [])
+        self.assertEqual(self.beat(45.5), [])
+
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.last_position, 15)
+        response = self.client.get(reverse("course_lessons", args=[self.course.pk]))
+        self.assertContains(response, "<strong>Long video</strong> at 0:45")
+
+        self.assertTrue(any("UPDATE" in sql for sql in self.beat(50, final="1")))
+        self.enrollment.refresh_from_db()
+        self.assertEqual(
+            (self.enrollment.last_lesson, self.enrollment.last_position),
+            (self.lesson, 50),
+        )
+
+    @override_settings(CACHES=settings.CACHES)
+    def test_a_process_local_cache_writes_every_heartbeat(self):
+        for position in (15, 30):
+            self.assertTrue(any("UPDATE" in sql for sql in self.beat(position)))
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.last_position, 30)
+
+    def test_enrolling_through_the_view_starts_with_no_resume_position(self):
+        newcomer = User.objects.create_user("resume_newcomer", user_type="student")
+        self.client.force_login(newcomer)
+        response = self.client.post(reverse("enroll_course", args=[self.course.pk]))
+        self.assertRedirects(
+            response,
+            reverse("course_detail", args=[self.course.slug]),
+            fetch_redirect_response=False,
+        )
+        enrollment = Enrollment.objects.get(student=newcomer)
+        self.assertEqual((enrollment.last_lesson, enrollment.last_position), (None, 0))
+
+    def test_other_courses_lessons_are_not_saved(self):
+        other = Course.objects.create(
+            title="Elsewhere",
+            description="d",
+            category=self.course.category,
+            instructor=self.course.instructor,
+        )
+        response = self.client.post(
+            reverse("record_resume_position", args=[other.pk]),
+            {"lesson": self.lesson.pk, "position": 10, "final": "1"},
+        )
+        self.assertEqual(response.status_code, 204)
+        self.enrollment.refresh_from_db()
+        self.assertIsNone(self.enrollment.last_lesson)
+
+
+@override_settings(STATICFILES_STORAGE=PLAIN_STATIC)
+class PublishingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user(
+            "pub_teacher", first_name="Ada", user_type="instructor"
+        )
+        cls.course = Course.objects.create(
+            title="Drafted",
+            description="d",
+            category=Category.objects.create(name="Publishing"),
+            instructor=cls.instructor,
+        )
+        for order, title in enumerate(["Intro", "Basics"], 1):
+            Lesson.objects.create(
+                course=cls.course, title=title, lesson_type="text", order=order
+            )
+
+    def detail(self):
+        return self.client.get(reverse("course_detail", args=[self.course.slug]))
+
+    def test_readers_see_only_published_versions(self):
+        self.assertEqual(self.detail().status_code, 404)
+
+        publishing.publish(self.course, self.instructor)
+        self.course.refresh_from_db()
+        self.assertTrue(self.course.is_published)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.detail()
+        self.assertContains(response, "Drafted")
+        self.assertContains(response, "Ada")
+        course_queries = [q["sql"] for q in queries if "courses_" in q["sql"]]
+        self.assertEqual(len(course_queries), 1)
+        self.assertIn("courses_coursepublication", course_queries[0])
+
+        self.course.title = "Half edited"
+        self.course.save()
+        Lesson.objects.create(course=self.course, title="Draft", lesson_type="text")
+        self.assertContains(self.detail(), "Drafted")
+        publication = publishing.get_publication(pk=self.course.pk)
+        self.assertTrue(publishing.has_unpublished_changes(self.course, publication))
+
+        self.client.force_login(self.instructor)
+        self.client.post(reverse("publish_course", args=[self.course.pk]))
+        publication = publishing.get_publication(pk=self.course.pk)
+        self.assertEqual(publication.version, 2)
+        self.assertEqual(
+            [lesson["title"] for lesson in publication.document["lessons"]],
+            ["Draft", "Intro", "Basics"],
+        )
+        self.assertContains(self.detail(), "Half edited")
+
+    def test_unpublishing_withdraws_the_pages(self):
+        publishing.publish(self.course)
+        publishing.unpublish(self.course)
+        self.assertEqual(self.detail().status_code, 404)
+        self.course.refresh_from_db()
+        self.assertFalse(self.course.is_published)
+
+    @override_settings(STATICFILES_STORAGE=PLAIN_STATIC)
+    def test_admin_actions_refresh_the_catalog_and_autocomplete(self):
+        patcher = mock.patch.multiple(
+            autocomplete, _index=None, _generation=None, _checked_at=0.0
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        filters, search = catalog.parse_filters(QueryDict())
+        category = str(self.course.category_id)
+
+        def listed():
+            (facet,) = [
+                f
+                for f in catalog.facet_counts(filters, search)
+                if f["name"] == "category"
+            ]
+            counts = {option["value"]: option["count"] for option in facet["options"]}
+            labels = [result["label"] for result in autocomplete.search("drafted")]
+            return counts.get(category, 0), labels
+
+        self.client.force_login(
+            User.objects.create_superuser(
+                "pub_admin", "pub@example.com", "pass", user_type="admin"
+            )
+        )
+
+        def run(action):
+            self.client.post(
+                reverse("admin:courses_course_changelist"),
+                {"action": action, "_selected_action": [self.course.pk]},
+            )
+
+        self.assertEqual(listed(), (0, []))  # cached and indexed as a draft
+        run("publish_courses")
+        self.assertEqual(listed(), (1, ["Drafted"]))
+        self.course.refresh_from_db()
+        publication = publishing.get_publication(pk=self.course.pk)
+        self.assertFalse(publishing.has_unpublished_changes(self.course, publication))
+        run("unpublish_courses")
+        self.assertEqual(listed(), (0, []))
+
+
+@override_settings(STATICFILES_STORAGE=PLAIN_STATIC)
+class ManageLessonsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user(
+            "order_teacher", user_type="instructor"
+        )
+        cls.course = Course.objects.create(
+            title="Ordered",
+            description="d",
+            category=Category.objects.create(name="Ordering"),
+            instructor=cls.instructor,
+        )
+        Lesson.objects.bulk_create(
+            Lesson(course=cls.course, title=f"L{i}", lesson_type="text", order=i)
+            for i in range(1, 31)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.instructor)
+        self.url = reverse("manage_lessons", args=[self.course.pk])
+
+    def submit(self, lessons, titles=None):
+        """POST the page's formset with ``lessons`` in the new order"""
+        formset = self.client.get(self.url).context["formset"]
+        by_id = {form.instance.pk: form for form in formset}
+        data = {
+            f"form-{key}": value
+            for key, value in formset.management_form.initial.items()
+        }
+        for position, lesson in enumerate(lessons, 1):
+            form = by_id[lesson.pk]
+            data[f"{form.prefix}-id"] = lesson.pk
+            data[f"{form.prefix}-title"] = (titles or {}).get(lesson.pk, lesson.title)
+            data[f"{form.prefix}-duration"] = lesson.duration
+            data[f"{form.prefix}-ORDER"] = position
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, data)
+        updates = [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+        return response, updates
+
+    def current(self):
+        return list(self.course.lessons.order_by("order", "pk"))
+
+    def test_moving_one_lesson_updates_one_row_in_one_query(self):
+        lessons = self.current()
+        moved = lessons[-1]
+        response, updates = self.submit(
+            [moved, *lessons[:-1]], titles={lessons[3].pk: "Renamed"}
+        )
+        self.assertRedirects(response, self.url)
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(updates[0].count("WHEN"), 2 * 3)  # 2 rows x 3 fields
+
+        titles = [lesson.title for lesson in self.current()]
+        self.assertEqual(titles[:5], ["L30", "L1", "L2", "L3", "Renamed"])
+
+    def test_stale_lesson_lists_are_rejected(self):
+        lessons = self.current()
+        Lesson.objects.create(course=self.course, title="New", lesson_type="text")
+        response, updates = self.submit(lessons)
+        self.assertEqual(updates, [])
+        self.assertContains(response, "Lessons were added or removed")
+
+
+@override_settings(
+    STATICFILES_STORAGE=PLAIN_STATIC, QUIZ_FLUSH_INTERVAL=60, CACHES=SHARED_CACHES
+)
+class TimedQuizTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user("exam_teacher", user_type="instructor")
+        cls.course = Course.objects.create(
+            title="Examined",
+            description="d",
+            category=Category.objects.create(name="Exams"),
+            instructor=instructor,
+            is_published=True,
+        )
+        cls.quiz = Quiz.objects.create(
+            course=cls.course, title="Final", time_limit=20, is_published=True
+        )
+        cls.right, cls.wrong = [], []
+        for order in range(2):
+            question = Question.objects.create(
+                quiz=cls.quiz, text=f"Q{order}", question_type="mcq", order=order
+            )
+            cls.right.append(
+                Answer.objects.create(question=question, text="Yes", is_correct=True)
+            )
+            cls.wrong.append(Answer.objects.create(question=question, text="No"))
+        cls.students = [
+            User.objects.create_user(f"examinee{i}", user_type="student")
+            for i in range(3)
+        ]
+        cls.enrollments = [
+            Enrollment.objects.create(student=student, course=cls.course)
+            for student in cls.students
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def answers(self, *chosen):
+        return {f"q{answer.question_id}": answer.pk for answer in chosen}
+
+    def test_answers_autosave_to_the_cache_and_are_graded_on_submit(self):
+        self.client.force_login(self.students[0])
+        publishing.publish(self.course)
+        self.assertContains(
+            self.client.get(reverse("course_lessons", args=[self.course.pk])),
+            reverse("start_quiz", args=[self.quiz.pk]),
+        )
+        response = self.client.post(reverse("start_quiz", args=[self.quiz.pk]))
+        attempt = QuizAttempt.objects.get()
+        self.assertRedirects(response, reverse("take_quiz", args=[attempt.pk]))
+        self.assertEqual(attempt.status, QuizAttempt.IN_PROGRESS)
+        self.assertAlmostEqual(
+            (attempt.deadline - attempt.started_at).total_seconds(), 20 * 60, delta=5
+        )
+        # Starting again returns to the open attempt.
+        self.client.post(reverse("start_quiz", args=[self.quiz.pk]))
+        self.assertEqual(QuizAttempt.objects.count(), 1)
+
+        save_url = reverse("autosave_quiz", args=[attempt.pk])
+        self.client.post(save_url, self.answers(self.right[0]))
+        self.assertEqual(QuizAnswer.objects.get().selected_answer, self.right[0])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(save_url, self.answers(self.wrong[1]))
+        self.assertEqual(response.json()["saved"], 2)
+        self.assertFalse([q for q in queries if "courses_quizanswer" in q["sql"]])
+        self.assertContains(
+            self.client.get(reverse("take_quiz", args=[attempt.pk])),
+            f'value="{self.wrong[1].pk}" checked',
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("submit_quiz", args=[attempt.pk]))
+        self.assertRedirects(response, reverse("quiz_result", args=[attempt.pk]))
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.status, QuizAttempt.SUBMITTED)
+        self.assertEqual((attempt.score, attempt.total_marks), (1, 2))
+        self.assertTrue(attempt.is_passed)
+        self.assertEqual(
+            sorted(attempt.answers.values_list("is_correct", flat=True)),
+            [False, True],
+        )
+        self.assertEqual(CourseStats.objects.get(course=self.course).quiz_attempts, 1)
+        self.assertEqual(self.client.post(save_url).status_code, 409)
+
+    def test_sweeper_grades_expired_attempts_in_one_batch(self):
+        attempts = [
+            exams.start(enrollment, self.quiz) for enrollment in self.enrollments
+        ]
+        exams.autosave(
+            attempts[0].pk,
+            self.students[0].pk,
+            {self.right[0].question_id: self.right[0].pk},
+        )
+        exams.autosave(
+            attempts[1].pk,
+            self.students[1].pk,
+            {answer.question_id: answer.pk for answer in self.right},
+            flush=False,
+        )
+        self.assertEqual(exams.sweep(), 0)
+
+        later = timezone.now() + timezone.timedelta(minutes=21)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(exams.sweep(now=later), 3)
+        attempt_updates = [
+            q for q in queries if q["sql"].startswith('UPDATE "courses_quizattempt"')
+        ]
+        self.assertEqual(len(attempt_updates), 1)
+
+        graded = {a.pk: a for a in QuizAttempt.objects.all()}
+        self.assertEqual([graded[a.pk].score for a in attempts], [1, 2, 0])
+        self.assertEqual({a.status for a in graded.values()}, {QuizAttempt.EXPIRED})
+        stats = CourseStats.objects.get(course=self.course)
+        self.assertEqual((stats.quiz_attempts, stats.quiz_passes), (3, 2))
+        self.assertEqual(exams.sweep(now=later), 0)
+
+    @override_settings(CACHES=settings.CACHES)
+    def test_a_process_local_cache_writes_every_answer_through(self):
+        attempt = exams.start(self.enrollments[0], self.quiz)
+        for answer in (self.right[0], self.wrong[1]):
+            exams.autosave(
+                attempt.pk, self.students[0].pk, {answer.question_id: answer.pk}
+            )
+        self.assertEqual(
+            set(attempt.answers.values_list("selected_answer", flat=True)),
+            {self.right[0].pk, self.wrong[1].pk},
+        )
+        # Another process, like the sweeper, grades from the database alone.
+        cache.clear()
+        later = timezone.now() + timezone.timedelta(minutes=21)
+        self.assertEqual(exams.sweep(now=later), 1)
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.score, 1)
+
+
+@override_settings(EVENTS_BROKER="")
+class LiveEventsTests(TransactionTestCase):
+    def setUp(self):
+        instructor = User.objects.create_user("live_teacher", user_type="instructor")
+        student = User.objects.create_user("live_student", user_type="student")
+        self.course = Course.objects.create(
+            title="Live",
+            description="d",
+            category=Category.objects.create(name="Live"),
+            instructor=instructor,
+            is_published=True,
+        )
+        self.enrollment = Enrollment.objects.create(student=student, course=self.course)
+        self.client.force_login(student)
+        self.cookie = (
+            f"{settings.SESSION_COOKIE_NAME}={self.client.session.session_key}"
+        )
+
+    async def open_stream(self, cookie):
+        sent, inbox = asyncio.Queue(), asyncio.Queue()
+        scope = {
+            "type": "http",
+            "path": "/events/",
+            "headers": [(b"cookie", cookie.encode())],
+        }
+        task = asyncio.ensure_future(events.stream(scope, inbox.get, sent.put))
+        start = await asyncio.wait_for(sent.get(), 5)
+        return task, start["status"], sent, inbox
+
+    async def test_stream_delivers_its_channels_until_disconnect(self):
+        task, status, sent, inbox = await self.open_stream(self.cookie)
+        self.assertEqual(status, 200)
+        self.assertTrue((await sent.get())["body"].startswith(b"retry:"))
+
+        events.publish(events.course_channel(self.course.pk + 1), "announcement", {})
+        events.publish(events.course_channel(self.course.pk), "announcement", {"a": 1})
+        message = await asyncio.wait_for(sent.get(), 5)
+        self.assertEqual(message["body"], b'event: announcement\ndata: {"a":1}\n\n')
+
+        await inbox.put({"type": "http.disconnect"})
+        await asyncio.wait_for(task, 5)
+        self.assertEqual(dict(events.hub.subscriptions), {})
+
+    async def test_signed_out_clients_are_told_not_to_retry(self):
+        task, status, _, _ = await self.open_stream("sessionid=nope")
+        await task
+        self.assertEqual(status, 204)
+
+    def test_progress_changes_and_announcements_are_published(self):
+        with mock.patch.object(events, "publish") as publish:
+            self.enrollment.progress = 50
+            self.enrollment.save()
+            self.enrollment.save()
+            self.client.force_login(self.course.instructor)
+            self.client.post(
+                reverse("post_announcement", args=[self.course.pk]),
+                {"title": "Exam moved", "message": "To Friday"},
+            )
+        self.assertEqual(
+            [call.args[:2] for call in publish.call_args_list],
+            [
+                (f"student:{self.enrollment.student_id}", "progress"),
+                (f"course:{self.course.pk}", "announcement"),
+            ],
+        )
+
+
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+print(json.dumps([time.perf_counter() - started, sorted(sys.modules)]))
+"""
+
+
+class StartupTests(SimpleTestCase):
+    # Cold django.setup() takes about 0.25s; the budget leaves room for slow
+    # machines while catching a heavy import sneaking into the boot path.
+    BUDGET = 1.0
+    LAZY_MODULES = {"django_heroku", "dj_database_url", "django.test", "markdown"}
+
+    def _cold_setup(self):
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "elearning.settings",
+            "DJANGO_ENV": "development",
+        }
+        env.pop("DATABASE_URL", None)
+        result = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        seconds, modules = json.loads(result.stdout)
+        return seconds, set(modules)
+
+    def test_setup_is_fast_and_skips_lazy_modules(self):
+        runs = [self._cold_setup() for _ in range(3)]
+        self.assertLess(min(seconds for seconds, _ in runs), self.BUDGET)
+        self.assertFalse(self.LAZY_MODULES & runs[0][1])
+
+
+@skipUnless(middleware.brotli, "brotli is not installed")
+class CompressionMiddlewareTests(SimpleTestCase):
+    PAGE = "<html><body>" + "<p>Course catalog</p>" * 50 + "</body></html>"
+
+    def compress(self, with_token):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip, br")
+        if with_token:
+            get_token(request)
+        response = HttpResponse(self.PAGE)
+        return middleware.CompressionMiddleware(lambda r: response)(request)
+
+    def test_pages_without_a_csrf_token_use_brotli(self):
+        self.assertEqual(self.compress(False)["Content-Encoding"], "br")
+
+    def test_pages_with_a_csrf_token_get_padded_gzip(self):
+        responses = [self.compress(True) for _ in range(10)]
+        self.assertEqual({r["Content-Encoding"] for r in responses}, {"gzip"})
+        # Random padding makes the same page compress to different lengths.
+        self.assertGreater(len({len(r.content) for r in responses}), 1)
@@ -4,16 +4,77 @@ from . import views
 urlpatterns = [
     path("", views.home, name="home"),
     path("courses/", views.course_list, name="course_list"),
+    path(
+        "api/autocomplete/",
+        views.search_autocomplete,
+        name="search_autocomplete",
+    ),
     path("course/<slug:slug>/", views.course_detail, name="course_detail"),
     path("enroll/<int:course_id>/", views.enroll_course, name="enroll_course"),
     path("my-courses/", views.my_courses, name="my_courses"),
     path(
         "course/<int:course_id>/lessons/", views.course_lessons, name="course_lessons"
     ),
+    path(
+        "course/<int:course_id>/lessons/manage/",
+        views.manage_lessons,
+        name="manage_lessons",
+    ),
+    path("lesson/<int:lesson_id>/pdf/", views.lesson_pdf, name="lesson_pdf"),
+    path(
+        "resume/<int:course_id>/",
+        views.record_resume_position,
+        name="record_resume_position",
+    ),
+    path("quiz/<int:quiz_id>/start/", views.start_quiz, name="start_quiz"),
+    path("quiz/attempt/<int:attempt_id>/", views.take_quiz, name="take_quiz"),
+    path(
+        "quiz/attempt/<int:attempt_id>/save/",
+        views.autosave_quiz,
+        name="autosave_quiz",
+    ),
+    path(
+        "quiz/attempt/<int:attempt_id>/submit/",
+        views.submit_quiz,
+        name="submit_quiz",
+    ),
+    path(
+        "quiz/attempt/<int:attempt_id>/result/",
+        views.quiz_result,
+        name="quiz_result",
+    ),
+    path(
+        "announce/<int:course_id>/",
+        views.post_announcement,
+        name="post_announcement",
+    ),
+    path("events/", views.events_unavailable, name="events"),
+    path("publish/<int:course_id>/", views.publish_course, name="publish_course"),
     path("course/create/", views.create_course, name="create_course"),
     path(
         "update-progress/<int:lesson_id>/",
         views.update_lesson_progress,
         name="update_lesson_progress",
     ),
+    path(
+        "instructor/dashboard/",
+        views.instructor_dashboard,
+        name="instructor_dashboard",
+    ),
+    path(
+        "course/<int:course_id>/export/",
+        views.export_course_package,
+        name="export_course_package",
+    ),
+    path(
+        "exports/enrollments.csv",
+        views.export_enrollments,
+        name="export_enrollments",
+    ),
+    path(
+        "exports/quiz-results.csv",
+        views.export_quiz_results,
+        name="export_quiz_results",
+    ),
+    path("courses/import/", views.import_course_package, name="import_course_package"),
 ]
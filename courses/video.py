@@ -0,0 +1,160 @@
+"""
+HLS transcoding of video lessons.
+
+Saving a video lesson with a new ``content_file`` marks it ``pending``.
+``manage.py transcode_videos`` claims pending lessons and runs ffmpeg in a
+pool of worker processes: each job probes the source, encodes the
+renditions of RENDITIONS that don't exceed the source height in a single
+ffmpeg pass, segments them for HLS with a master playlist, and uploads the
+result to default storage under ``lessons/<course>/hls/<lesson>/``. The
+lesson page then plays the master playlist, falling back to the original
+file where the browser can't play HLS.
+
+Status is tracked by the lesson job queue in courses/jobs.py, so a file
+replaced while it is being transcoded is simply queued again.
+"""
+
+import os
+import re
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import jobs, publishing
+from .models import Lesson
+
+# (height, video kbps, audio kbps), lowest first
+RENDITIONS = [(360, 800, 96), (540, 1400, 96), (720, 2800, 128), (1080, 5000, 160)]
+SEGMENT_SECONDS = 6
+TIMEOUT = 3 * 60 * 60
+MASTER_PLAYLIST = "master.m3u8"
+
+
+class TranscodeError(Exception):
+    pass
+
+
+def _ffmpeg():
+    return getattr(settings, "FFMPEG_BINARY", "ffmpeg")
+
+
+def probe(path):
+    """Return ``(height, has_audio)`` of a video file"""
+    result = subprocess.run(
+        [_ffmpeg(), "-hide_banner", "-i", path],
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    # Without an output file ffmpeg exits non-zero; the stream info is on stderr.
+    match = re.search(r"Stream #.*?Video:.*?(\d{2,5})x(\d{2,5})", result.stderr)
+    if not match:
+        raise TranscodeError(f"No video stream found in {os.path.basename(path)}")
+    has_audio = re.search(r"Stream #.*?Audio:", result.stderr) is not None
+    return int(match.group(2)), has_audio
+
+
+def renditions_for(height):
+    ladder = [rendition for rendition in RENDITIONS if rendition[0] <= height]
+    if not ladder:
+        _, video_kbps, audio_kbps = RENDITIONS[0]
+        ladder = [(height - height % 2, video_kbps, audio_kbps)]
+    return ladder
+
+
+def build_command(source, output_dir, renditions, has_audio):
+    count = len(renditions)
+    splits = "".join(f"[v{i}]" for i in range(count))
+    filters = [f"[0:v]split={count}{splits}"] + [
+        f"[v{i}]scale=-2:{height}[v{i}out]"
+        for i, (height, _, _) in enumerate(renditions)
+    ]
+    command = [_ffmpeg(), "-hide_banner", "-loglevel", "error", "-y", "-i", source]
+    command += ["-filter_complex", ";".join(filters)]
+    stream_map = []
+    for i, (height, video_kbps, audio_kbps) in enumerate(renditions):
+        command += [
+            "-map", f"[v{i}out]",
+            f"-c:v:{i}", "libx264",
+            f"-b:v:{i}", f"{video_kbps}k",
+            f"-maxrate:v:{i}", f"{int(video_kbps * 1.07)}k",
+            f"-bufsize:v:{i}", f"{int(video_kbps * 1.5)}k",
+        ]  # fmt: skip
+        if has_audio:
+            command += [
+                "-map", "a:0",
+                f"-c:a:{i}", "aac",
+                f"-b:a:{i}", f"{audio_kbps}k",
+            ]  # fmt: skip
+            stream_map.append(f"v:{i},a:{i},name:{height}p")
+        else:
+            stream_map.append(f"v:{i},name:{height}p")
+    command += [
+        "-preset", "veryfast",
+        "-pix_fmt", "yuv420p",
+        # Keyframes on segment boundaries so every rendition switches cleanly.
+        "-force_key_frames", f"expr:gte(t,n_forced*{SEGMENT_SECONDS})",
+        "-sc_threshold", "0",
+    ]  # fmt: skip
+    if has_audio:
+        command += ["-ac", "2"]
+    command += [
+        "-f", "hls",
+        "-hls_time", str(SEGMENT_SECONDS),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_filename", os.path.join(output_dir, "%v", "segment%05d.ts"),
+        "-master_pl_name", MASTER_PLAYLIST,
+        "-var_stream_map", " ".join(stream_map),
+        os.path.join(output_dir, "%v", "index.m3u8"),
+    ]  # fmt: skip
+    return command
+
+
+def transcode(source, prefix):
+    """
+    Transcode the stored file ``source`` into HLS under the storage
+    directory ``prefix``; returns the master playlist's storage name. Runs
+    in a worker process and doesn't touch the database.
+    """
+    with tempfile.TemporaryDirectory(prefix="hls-") as workdir:
+        local_source = jobs.local_copy(source, workdir)
+        height, has_audio = probe(local_source)
+        output_dir = os.path.join(workdir, "hls")
+        command = build_command(
+            local_source, output_dir, renditions_for(height), has_audio
+        )
+        result = subprocess.run(
+            command, capture_output=True, text=True, timeout=TIMEOUT
+        )
+        if result.returncode:
+            raise TranscodeError(result.stderr.strip()[-1000:] or "ffmpeg failed")
+        jobs.upload_tree(output_dir, prefix)
+    return prefix + MASTER_PLAYLIST
+
+
+queue = jobs.LessonQueue("video")
+
+
+def prepare(lesson_id, course_id, source):
+    return source, jobs.output_prefix("hls", lesson_id, course_id, source)
+
+
+def finish(lesson_id, source, playlist):
+    """Publish a finished transcode unless the lesson's file changed meanwhile"""
+    previous = (
+        Lesson.objects.filter(pk=lesson_id)
+        .values_list("hls_playlist", flat=True)
+        .first()
+    )
+    updated = queue.complete(
+        lesson_id, source, hls_playlist=playlist, updated_at=timezone.now()
+    )
+    if not updated:
+        jobs.delete_tree(jobs.directory_of(playlist))
+    else:
+        publishing.refresh_media(lesson_id)
+        if previous and previous != playlist:
+            jobs.delete_tree(jobs.directory_of(previous))
+    return updated
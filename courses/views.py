@@ -1,72 +1,125 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
+from django.http import Http404, JsonResponse, HttpResponse, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
-from django.db.models import Q
-from .models import Course, Enrollment, Lesson, Category
-from .forms import CourseForm, LessonForm
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from datetime import timedelta
+from .models import (
+    Announcement,
+    Course,
+    Enrollment,
+    Lesson,
+    Category,
+    Quiz,
+    QuizAttempt,
+    CourseStats,
+    CourseDailyStats,
+    InstructorStats,
+)
+from .forms import (
+    AnnouncementForm,
+    CourseForm,
+    LessonForm,
+    LessonOrderFormSet,
+    CoursePackageForm,
+)
+from .packages import PackageError, export_course, import_course
+from .enrollments import enroll
+from .exports import enrollments_csv, quiz_results_csv
+from .recommendations import recommend_for
+from . import (
+    autocomplete,
+    catalog,
+    dashboard,
+    exams,
+    ordering,
+    pdfs,
+    progress,
+    publishing,
+    resume,
+)
+from .files import ranged_file_response
+from .cards import render_cards
+from .freshness import (
+    conditional_page,
+    course_detail_validators,
+    course_list_validators,
+)
 
 
 def home(request):
-    """Home page with featured courses"""
-    featured_courses = Course.objects.filter(is_published=True)[:6]
+    """Home page with featured courses, personalised for enrolled students"""
+    featured_courses = []
+    if request.user.is_authenticated and request.user.user_type == "student":
+        featured_courses = recommend_for(request.user, limit=6)
+    recommended = bool(featured_courses)
+    if not recommended:
+        featured_courses = Course.objects.filter(is_published=True).select_related(
+            "instructor"
+        )[:6]
     categories = Category.objects.all()[:8]
 
     context = {
-        "featured_courses": featured_courses,
+        "featured_cards": render_cards(featured_courses, "home"),
+        "recommended": recommended,
         "categories": categories,
     }
     return render(request, "courses/home.html", context)
 
 
+@conditional_page(course_list_validators)
 def course_list(request):
-    """List all published courses with filtering and pagination"""
-    courses = Course.objects.filter(is_published=True)
-
-    # Filtering
-    category_id = request.GET.get("category")
-    if category_id:
-        courses = courses.filter(category_id=category_id)
-
-    level = request.GET.get("level")
-    if level:
-        courses = courses.filter(level=level)
-
-    search = request.GET.get("search")
-    if search:
-        courses = courses.filter(
-            Q(title__icontains=search) | Q(description__icontains=search)
-        )
+    """List published courses with faceted filtering and pagination"""
+    filters, search = catalog.parse_filters(request.GET)
+    courses = catalog.filter_courses(
+        Course.objects.filter(is_published=True).select_related("instructor"),
+        filters,
+        search,
+    )
 
     # Pagination
     paginator = Paginator(courses, 9)
     page_number = request.GET.get("page")
     courses_page = paginator.get_page(page_number)
 
+    querystring = request.GET.copy()
+    querystring.pop("page", None)
+
     context = {
         "courses": courses_page,
-        "categories": Category.objects.all(),
+        "cards": render_cards(courses_page),
+        "facets": catalog.facet_counts(filters, search),
+        "search": search,
+        "querystring": querystring.urlencode(),
     }
     return render(request, "courses/course_list.html", context)
 
 
+@conditional_page(course_detail_validators)
 def course_detail(request, slug):
-    """Course detail page"""
-    course = get_object_or_404(Course, slug=slug, is_published=True)
+    """Course detail page, rendered from the published version"""
+    publication = publishing.for_request(request, slug=slug)
+    if publication is None:
+        raise Http404("No published course matches this address")
 
     # Check enrollment for students
     enrollment = None
     if request.user.is_authenticated and request.user.user_type == "student":
         enrollment = Enrollment.objects.filter(
-            student=request.user, course=course
+            student=request.user, course_id=publication.pk
         ).first()
 
+    document = publication.document
     context = {
-        "course": course,
+        "course": document["course"],
+        "counts": document["counts"],
+        "lessons": document["lessons"],
+        "students": publication.students or 0,
         "enrollment": enrollment,
-        "lessons": course.lessons.all(),
     }
     return render(request, "courses/course_detail.html", context)
 
@@ -81,9 +134,7 @@ def enroll_course(request, course_id):
 
     course = get_object_or_404(Course, id=course_id, is_published=True)
 
-    enrollment, created = Enrollment.objects.get_or_create(
-        student=request.user, course=course
-    )
+    enrollment, created = enroll(request.user, course)
 
     if created:
         messages.success(request, f'Successfully enrolled in "{course.title}"!')
@@ -100,38 +151,88 @@ def my_courses(request):
         messages.error(request, "Only students can view their courses.")
         return redirect("home")
 
-    enrollments = Enrollment.objects.filter(student=request.user).select_related(
-        "course"
-    )
-    context = {"enrollments": enrollments}
+    context = {"enrollments": dashboard.student_dashboard(request.user)}
     return render(request, "courses/my_courses.html", context)
 
 
 @login_required
 def course_lessons(request, course_id):
     """View course lessons for enrolled students or instructors"""
-    course = get_object_or_404(Course, id=course_id, is_published=True)
+    publication = publishing.for_request(request, pk=course_id)
+    if publication is None:
+        raise Http404("No published course matches this address")
+    course = publication.document["course"]
+    is_instructor = request.user.pk == course["instructor"]["id"]
 
+    enrollment = None
     if request.user.user_type == "student":
         enrollment = Enrollment.objects.filter(
-            student=request.user, course=course
+            student=request.user, course_id=course_id
         ).first()
         if not enrollment:
             messages.error(request, "You need to enroll in this course first.")
-            return redirect("course_detail", slug=course.slug)
-    elif request.user != course.instructor and request.user.user_type != "admin":
+            return redirect("course_detail", slug=course["slug"])
+    elif not is_instructor and request.user.user_type != "admin":
         messages.error(request, "Access denied.")
         return redirect("home")
 
-    lessons = course.lessons.all()
+    lessons = publication.document["lessons"]
+    resume_at = resume.position_for(enrollment) if enrollment else None
+    resume_lesson = None
+    if resume_at:
+        resume_lesson = next(
+            (lesson for lesson in lessons if lesson["id"] == resume_at["lesson_id"]),
+            None,
+        )
+        if resume_lesson is None:
+            resume_at = None
     context = {
         "course": course,
         "lessons": lessons,
-        "enrollment": getattr(request.user, "enrollment", None),
+        "enrollment": enrollment,
+        "resume_at": resume_at,
+        "resume_lesson": resume_lesson,
+        "announcements": Announcement.objects.filter(course_id=course_id)[:5],
     }
+    if enrollment:
+        context["quizzes"] = Quiz.objects.filter(
+            course_id=course_id, is_published=True
+        ).order_by("created_at")
+    if is_instructor:
+        context["announcement_form"] = AnnouncementForm()
+        context["publication"] = publication
+        context["unpublished_changes"] = publishing.has_unpublished_changes(
+            Course.objects.get(pk=course_id), publication
+        )
     return render(request, "courses/course_lessions.html", context)
 
 
+@login_required
+@require_http_methods(["GET", "HEAD"])
+def lesson_pdf(request, lesson_id):
+    """Serve a PDF lesson with byte-range support"""
+    lesson = get_object_or_404(
+        Lesson.objects.select_related("course"), id=lesson_id, lesson_type="pdf"
+    )
+    course = lesson.course
+    if request.user != course.instructor and request.user.user_type != "admin":
+        enrolled = Enrollment.objects.filter(
+            student=request.user, course=course
+        ).exists()
+        if not course.is_published or not (enrolled or lesson.is_preview):
+            return HttpResponse(status=403)
+    if not lesson.content_file:
+        raise Http404("This lesson has no document")
+
+    return ranged_file_response(
+        request,
+        lesson.content_file.storage,
+        pdfs.served_file(lesson),
+        "application/pdf",
+        filename=f"{course.slug}-{lesson.order}.pdf",
+    )
+
+
 @login_required
 @require_http_methods(["GET", "POST"])
 def create_course(request):
@@ -146,6 +247,8 @@ def create_course(request):
             course = form.save(commit=False)
             course.instructor = request.user
             course.save()
+            if course.is_published:
+                publishing.publish(course, request.user)
             messages.success(request, "Course created successfully!")
             return redirect("course_detail", slug=course.slug)
     else:
@@ -165,18 +268,22 @@ def update_lesson_progress(request, lesson_id):
 
     lesson = get_object_or_404(Lesson, id=lesson_id)
     enrollment = Enrollment.objects.filter(
-        student=request.user, course=lesson.course
+        student=request.user, course_id=lesson.course_id
     ).first()
 
     if not enrollment:
         return JsonResponse({"error": "Not enrolled"}, status=403)
 
-    # Mark lesson as completed
-    lesson.is_completed = True
-    lesson.save()
+    if progress.write_behind_enabled():
+        # Buffered; the flusher applies it and the response is a projection.
+        progress.record_completion(enrollment, lesson)
+    else:
+        # Mark lesson as completed
+        lesson.is_completed = True
+        lesson.save()
 
-    # Update enrollment progress
-    enrollment.update_progress()
+        # Update enrollment progress
+        enrollment.update_progress()
 
     return JsonResponse(
         {
@@ -185,3 +292,313 @@ def update_lesson_progress(request, lesson_id):
             "completed": enrollment.is_completed,
         }
     )
+
+
+@login_required
+@require_http_methods(["POST"])
+def record_resume_position(request, course_id):
+    """Playback heartbeat beacon; see courses/resume.py"""
+    if request.user.user_type != "student":
+        return HttpResponse(status=403)
+    try:
+        lesson_id = int(request.POST["lesson"])
+        position = float(request.POST.get("position", 0))
+    except (KeyError, ValueError):
+        return HttpResponse(status=400)
+    if not 0 <= position < 60 * 60 * 24:
+        return HttpResponse(status=400)
+
+    resume.record(
+        request.user.pk,
+        course_id,
+        lesson_id,
+        position,
+        final=request.POST.get("final") == "1",
+    )
+    # Beacons ignore the response; there is nothing to send back.
+    return HttpResponse(status=204)
+
+
+@login_required
+@require_http_methods(["POST"])
+def start_quiz(request, quiz_id):
+    """Start a timed attempt at a quiz, or return to the open one"""
+    quiz = get_object_or_404(Quiz, id=quiz_id, is_published=True)
+    enrollment = Enrollment.objects.filter(
+        student=request.user, course_id=quiz.course_id
+    ).first()
+    if not enrollment:
+        messages.error(request, "You need to enroll in this course first.")
+        return redirect("home")
+    attempt = exams.start(enrollment, quiz)
+    return redirect("take_quiz", attempt_id=attempt.id)
+
+
+def _submitted_answers(data):
+    """``{question_id: answer_id}`` from the quiz form's ``q<question id>`` fields"""
+    answers = {}
+    for name, value in data.items():
+        if name.startswith("q") and name[1:].isdigit() and value.isdigit():
+            answers[int(name[1:])] = int(value)
+    return answers
+
+
+@login_required
+def take_quiz(request, attempt_id):
+    """An open attempt's questions with a countdown; answers autosave"""
+    entry = exams.entry(attempt_id)
+    if entry is None or entry["student"] != request.user.pk:
+        attempt = get_object_or_404(
+            QuizAttempt, id=attempt_id, enrollment__student=request.user
+        )
+        return redirect("quiz_result", attempt_id=attempt.id)
+    seconds_left = exams.seconds_left(entry)
+    if seconds_left == 0:
+        exams.submit(attempt_id, request.user.pk)
+        return redirect("quiz_result", attempt_id=attempt_id)
+
+    paper = exams.paper(entry["quiz"])
+    questions = [
+        {**question, "selected": entry["answers"].get(question["id"])}
+        for question in paper["questions"]
+    ]
+    return render(
+        request,
+        "courses/quiz_take.html",
+        {
+            "attempt_id": attempt_id,
+            "paper": paper,
+            "questions": questions,
+            "seconds_left": seconds_left,
+        },
+    )
+
+
+@login_required
+@require_http_methods(["POST"])
+def autosave_quiz(request, attempt_id):
+    """Answers sent by the quiz page as they change; see courses/exams.py"""
+    try:
+        entry = exams.autosave(
+            attempt_id, request.user.pk, _submitted_answers(request.POST)
+        )
+    except QuizAttempt.DoesNotExist:
+        raise Http404("No quiz attempt matches this address")
+    except exams.AttemptClosed:
+        return JsonResponse({"closed": True}, status=409)
+    return JsonResponse(
+        {"saved": len(entry["answers"]), "seconds_left": exams.seconds_left(entry)}
+    )
+
+
+@login_required
+@require_http_methods(["POST"])
+def submit_quiz(request, attempt_id):
+    """Grade an attempt with the answers on the submitted form"""
+    try:
+        exams.autosave(
+            attempt_id, request.user.pk, _submitted_answers(request.POST), flush=False
+        )
+    except QuizAttempt.DoesNotExist:
+        raise Http404("No quiz attempt matches this address")
+    except exams.AttemptClosed:
+        # Too late to change answers; it is graded on those saved in time.
+        pass
+    exams.submit(attempt_id, request.user.pk)
+    return redirect("quiz_result", attempt_id=attempt_id)
+
+
+@login_required
+def quiz_result(request, attempt_id):
+    attempt = get_object_or_404(
+        QuizAttempt.objects.select_related("quiz"),
+        id=attempt_id,
+        enrollment__student=request.user,
+    )
+    if attempt.status == QuizAttempt.IN_PROGRESS:
+        return redirect("take_quiz", attempt_id=attempt.id)
+    return render(request, "courses/quiz_result.html", {"attempt": attempt})
+
+
+@login_required
+@require_http_methods(["POST"])
+def post_announcement(request, course_id):
+    """Announce something to a course's students; pushed to open pages live"""
+    course = get_object_or_404(Course, id=course_id, instructor=request.user)
+    form = AnnouncementForm(request.POST)
+    if form.is_valid():
+        announcement = form.save(commit=False)
+        announcement.course = course
+        announcement.author = request.user
+        announcement.save()
+        messages.success(request, "Announcement posted.")
+    else:
+        messages.error(request, "An announcement needs a title and a message.")
+    return redirect("course_lessons", course_id=course.id)
+
+
+@login_required
+def manage_lessons(request, course_id):
+    """Reorder and edit all of a course's lessons in one submission"""
+    course = get_object_or_404(Course, id=course_id, instructor=request.user)
+    lessons = course.lessons.order_by("order", "pk")
+    if request.method == "POST":
+        with transaction.atomic():
+            formset = LessonOrderFormSet(
+                request.POST, queryset=lessons.select_for_update()
+            )
+            if formset.is_valid():
+                changed = ordering.save_formset(formset)
+                if changed:
+                    dashboard.invalidate_courses([course.id])
+                messages.success(
+                    request,
+                    f"Saved {len(changed)} changed lesson(s). Publish the course "
+                    "to show the changes to students.",
+                )
+                return redirect("manage_lessons", course_id=course.id)
+    else:
+        formset = LessonOrderFormSet(queryset=lessons)
+    return render(
+        request,
+        "courses/lesson_manage.html",
+        {"course": course, "formset": formset},
+    )
+
+
+@login_required
+@require_http_methods(["POST"])
+def publish_course(request, course_id):
+    """Publish the instructor's current draft of a course"""
+    course = get_object_or_404(Course, id=course_id, instructor=request.user)
+    publication = publishing.publish(course, request.user)
+    messages.success(request, f"Published version {publication.version}.")
+    return redirect("course_lessons", course_id=course.id)
+
+
+def events_unavailable(request):
+    """
+    The live event stream is answered by elearning/asgi.py; a server running
+    the WSGI application gets here instead, and 204 stops browsers retrying.
+    """
+    return HttpResponse(status=204)
+
+
+@login_required
+def instructor_dashboard(request):
+    """Instructor reporting, read only from the materialized analytics tables"""
+    if request.user.user_type != "instructor":
+        messages.error(request, "Only instructors can view the dashboard.")
+        return redirect("home")
+
+    totals = InstructorStats.objects.filter(instructor=request.user).first()
+    course_stats = (
+        CourseStats.objects.filter(course__instructor=request.user)
+        .select_related("course")
+        .order_by("-enrollments")
+    )
+    since = timezone.localdate() - timedelta(days=29)
+    daily = (
+        CourseDailyStats.objects.filter(
+            course__instructor=request.user, date__gte=since
+        )
+        .values("date")
+        .annotate(
+            new_enrollments=Sum("new_enrollments"),
+            completions=Sum("completions"),
+            quiz_attempts=Sum("quiz_attempts"),
+            quiz_passes=Sum("quiz_passes"),
+        )
+        .order_by("-date")
+    )
+
+    context = {
+        "totals": totals or InstructorStats(instructor=request.user),
+        "course_stats": course_stats,
+        "daily": daily,
+    }
+    return render(request, "courses/instructor_dashboard.html", context)
+
+
+@login_required
+def export_course_package(request, course_id):
+    """Stream a course with its lessons, files and quizzes as JSON Lines"""
+    course = get_object_or_404(Course.objects.select_related("category"), id=course_id)
+    if request.user != course.instructor and request.user.user_type != "admin":
+        messages.error(request, "Access denied.")
+        return redirect("home")
+
+    response = StreamingHttpResponse(
+        export_course(course), content_type="application/x-ndjson"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{course.slug}.jsonl"'
+    return response
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def import_course_package(request):
+    """Create a draft course from an uploaded course package"""
+    if request.user.user_type != "instructor":
+        messages.error(request, "Only instructors can import courses.")
+        return redirect("home")
+
+    if request.method == "POST":
+        form = CoursePackageForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                course, counts = import_course(
+                    form.cleaned_data["package"], request.user
+                )
+            except PackageError as e:
+                form.add_error("package", str(e))
+            else:
+                messages.success(
+                    request,
+                    f'Imported "{course.title}" with {counts["lesson"]} lessons and '
+                    f'{counts["quiz"]} quizzes. It is saved as a draft.',
+                )
+                return redirect("instructor_dashboard")
+    else:
+        form = CoursePackageForm()
+
+    return render(request, "courses/course_import.html", {"form": form})
+
+
+def _export_scope(request, queryset, course_field):
+    """Restrict an export queryset to what the requesting user may see"""
+    if request.user.user_type == "instructor":
+        queryset = queryset.filter(**{f"{course_field}__instructor": request.user})
+    elif request.user.user_type != "admin" and not request.user.is_staff:
+        return None
+
+    course_id = request.GET.get("course")
+    if course_id and course_id.isdigit():
+        queryset = queryset.filter(**{f"{course_field}_id": course_id})
+    return queryset
+
+
+@login_required
+def export_enrollments(request):
+    """Stream enrollments as CSV (instructors get their own courses only)"""
+    enrollments = _export_scope(request, Enrollment.objects.all(), "course")
+    if enrollments is None:
+        messages.error(request, "Access denied.")
+        return redirect("home")
+    return enrollments_csv(enrollments)
+
+
+@login_required
+def export_quiz_results(request):
+    """Stream quiz attempts as CSV (instructors get their own courses only)"""
+    attempts = _export_scope(request, QuizAttempt.objects.all(), "enrollment__course")
+    if attempts is None:
+        messages.error(request, "Access denied.")
+        return redirect("home")
+    return quiz_results_csv(attempts)
+
+
+def search_autocomplete(request):
+    """Search-as-you-type suggestions served from the in-memory prefix index"""
+    query = request.GET.get("q", "")[:100]
+    return JsonResponse({"results": autocomplete.search(query)})
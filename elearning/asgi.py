@@ -3,6 +3,11 @@ ASGI config for elearning project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Requests for the live event stream are answered by courses.events.stream
+directly, without Django's request handling, so an idle stream holds no
+thread; everything else goes to Django. Serve it with an ASGI server, e.g.
+``uvicorn elearning.asgi:application``.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -13,4 +18,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "elearning.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from django.urls import reverse  # noqa: E402
+
+from courses import events  # noqa: E402
+
+EVENTS_PATH = reverse("events")
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "http" and scope["path"] == EVENTS_PATH:
+        return await events.stream(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,30 @@
+"""
+Whether the default cache is shared between processes.
+
+Sign-in throttling, quiz autosaves, resume positions and the catalog,
+dashboard and card invalidation keys all rely on every process seeing the
+same cache. A local-memory (or dummy) cache is private to one process, which
+is only right for a single development server; ``require_shared`` lets a
+multi-process entry point refuse to start on one.
+"""
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+PROCESS_LOCAL_BACKENDS = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+def is_shared(alias="default"):
+    return settings.CACHES[alias]["BACKEND"] not in PROCESS_LOCAL_BACKENDS
+
+
+def require_shared(alias="default"):
+    if not is_shared(alias):
+        raise ImproperlyConfigured(
+            f"The {alias!r} cache ({settings.CACHES[alias]['BACKEND']}) is private "
+            "to each process. Set CACHE_URL to a Redis or Memcached server shared "
+            "by every process."
+        )
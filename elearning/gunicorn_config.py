@@ -0,0 +1,94 @@
+"""
+Production server profile for gunicorn:
+
+    gunicorn -c python:elearning.gunicorn_config elearning.wsgi
+
+The app is imported and warmed (see elearning/warmup.py) once in the master
+process and workers are forked from it, so each starts with URL patterns,
+templates and in-process caches already loaded and shares those memory pages
+copy-on-write with the master. Boot time is logged once the server is ready
+and every worker logs its memory use after it starts.
+
+Workers are separate processes, so the profile refuses to start unless the
+default cache is shared between them (CACHE_URL; see elearning/caching.py).
+That is also where the warm-up's cache entries (course cards, facet counts)
+go, rather than into a local-memory cache copied into every worker and
+never invalidated across them.
+"""
+
+import gc
+import os
+import time
+
+import decouple
+
+_started = time.monotonic()
+
+bind = f"0.0.0.0:{decouple.config('PORT', default='8000')}"
+workers = decouple.config(
+    "WEB_CONCURRENCY", default=2 * (os.cpu_count() or 1) + 1, cast=int
+)
+threads = decouple.config("GUNICORN_THREADS", default=1, cast=int)
+timeout = decouple.config("GUNICORN_TIMEOUT", default=30, cast=int)
+# Recycled workers are forked from the warm master, so restarts are cheap.
+max_requests = decouple.config("GUNICORN_MAX_REQUESTS", default=1000, cast=int)
+max_requests_jitter = max_requests // 10
+preload_app = True
+accesslog = "-"
+
+
+def on_starting(server):
+    # Runs in the master after the preloaded app is imported, before forking.
+    from django.db import connections
+
+    from elearning import caching, warmup
+
+    caching.require_shared()
+    loaded = time.monotonic()
+    timings = warmup.warm()
+    # Workers must not inherit the master's database connections.
+    connections.close_all()
+    # Keep the cyclic GC from writing to (and so copying) preloaded objects.
+    gc.collect()
+    gc.freeze()
+    steps = ", ".join(
+        f"{name} {seconds * 1000:.0f}ms" for name, seconds in timings.items()
+    )
+    server.log.info(
+        "App loaded in %.2fs, warmed in %.2fs (%s)",
+        loaded - _started,
+        time.monotonic() - loaded,
+        steps,
+    )
+
+
+def when_ready(server):
+    server.log.info(
+        "Ready in %.2fs with %d workers",
+        time.monotonic() - _started,
+        server.num_workers,
+    )
+
+
+def post_worker_init(worker):
+    worker.log.info("Worker %d memory: %s", worker.pid, _memory())
+
+
+def _memory():
+    """Resident, proportional (shared pages split between sharers) and private memory"""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return f"peak rss {peak // 1024} MiB"
+
+    def mib(*names):
+        return sum(int(fields[name].split()[0]) for name in names) / 1024
+
+    return (
+        f"rss {mib('Rss'):.1f} MiB, pss {mib('Pss'):.1f} MiB, "
+        f"private {mib('Private_Clean', 'Private_Dirty'):.1f} MiB"
+    )
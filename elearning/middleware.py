@@ -0,0 +1,85 @@
+"""
+Response compression.
+
+Brotli is used when the client accepts it and the ``brotli`` package is
+installed; otherwise this falls back to Django's GZipMiddleware. Both paths
+compress streaming responses chunk by chunk, skip bodies below
+``COMPRESSION_MIN_LENGTH`` and leave partial content and already-compressed
+media types alone.
+
+Pages that render a CSRF token always go through GZipMiddleware: against
+BREACH it pads each response with a random-length gzip header field, and
+Brotli's format has nowhere to put such padding.
+"""
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+
+INCOMPRESSIBLE_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "application/zip",
+    # Served with byte ranges; compressing would break the offsets.
+    "application/pdf",
+)
+
+
+def compress_sequence_brotli(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for item in sequence:
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def process_response(self, request, response):
+        min_length = getattr(settings, "COMPRESSION_MIN_LENGTH", 200)
+        if not response.streaming and len(response.content) < min_length:
+            return response
+        if response.status_code == 206 or response.has_header("Content-Range"):
+            return response
+        if response.get("Content-Type", "").startswith(INCOMPRESSIBLE_TYPES):
+            return response
+
+        accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        if (
+            brotli is None
+            or not re_accepts_brotli.search(accept_encoding)
+            # get_token() sets this whenever a page includes the token.
+            or request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+            or response.has_header("Content-Encoding")
+            or (response.streaming and response.is_async)
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        quality = getattr(settings, "BROTLI_QUALITY", 5)
+        if response.streaming:
+            response.streaming_content = compress_sequence_brotli(
+                response.streaming_content, quality
+            )
+            del response.headers["Content-Length"]
+        else:
+            compressed_content = brotli.compress(response.content, quality=quality)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers["Content-Length"] = str(len(response.content))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
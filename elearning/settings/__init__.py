@@ -0,0 +1,15 @@
+"""
+Settings entry point for DJANGO_SETTINGS_MODULE=elearning.settings.
+
+DJANGO_ENV picks the environment module: "production" (the default on
+Heroku, where DYNO is set) or "development" (the default elsewhere).
+"""
+
+import os
+
+_default_env = "production" if "DYNO" in os.environ else "development"
+
+if os.environ.get("DJANGO_ENV", _default_env) == "production":
+    from .production import *  # noqa: F401,F403
+else:
+    from .development import *  # noqa: F401,F403
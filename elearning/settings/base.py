@@ -0,0 +1,256 @@
+"""
+Django settings for elearning project, shared by every environment.
+
+Generated by 'django-admin startproject' using Django 4.2.16. The
+environment-specific modules next to this one (development, production)
+build on it; elearning/settings/__init__.py picks one from DJANGO_ENV.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/4.2/ref/settings/
+"""
+
+from .config import BASE_DIR, config
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = "django-insecure-*7=im99+5a-w1*gyp7d7fqtgf5j6+3xkosol3s)5ex)*52&=zl"
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = []
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+    "crispy_forms",
+    "crispy_bootstrap5",
+    "accounts",
+    "courses",
+]
+
+MIDDLEWARE = [
+    "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "elearning.middleware.CompressionMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+ROOT_URLCONF = "elearning.urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [BASE_DIR / "templates"],
+        "OPTIONS": {
+            # Parsed templates are kept in memory; in DEBUG the autoreloader
+            # still resets this cache when a template file changes.
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
+            "context_processors": [
+                "django.template.context_processors.debug",
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = "elearning.wsgi.application"
+
+
+# Database
+# https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.sqlite3",
+        # A file rather than in-memory, so tests can share the test database
+        # with other threads and processes (see EnrollmentConcurrencyTests).
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
+    }
+}
+
+
+# Password validation
+# https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
+    },
+]
+
+# Password hashing. New passwords are hashed with the PASSWORD_HASHER profile;
+# the others only verify existing hashes, which are upgraded on next login.
+# "argon2" needs argon2-cffi. "fast" (salted MD5 without a work factor) is for
+# tests and seed data only.
+PASSWORD_HASHER_PROFILES = {
+    "scrypt": "accounts.hashers.ScryptPasswordHasher",
+    "argon2": "accounts.hashers.Argon2PasswordHasher",
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "pbkdf2_sha1": "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "fast": "django.contrib.auth.hashers.MD5PasswordHasher",
+}
+PASSWORD_HASHER = config("PASSWORD_HASHER", default="scrypt")
+PASSWORD_HASHERS = [PASSWORD_HASHER_PROFILES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_PROFILES.items() if name != PASSWORD_HASHER
+]
+SCRYPT_WORK_FACTOR = config("SCRYPT_WORK_FACTOR", default=2**14, cast=int)
+ARGON2_TIME_COST = config("ARGON2_TIME_COST", default=2, cast=int)
+ARGON2_MEMORY_COST = config("ARGON2_MEMORY_COST", default=102400, cast=int)  # KiB
+ARGON2_PARALLELISM = config("ARGON2_PARALLELISM", default=8, cast=int)
+
+# Sign in with a username or email; failed sign-ins are throttled per client
+# IP and per account (see accounts/throttling.py)
+AUTHENTICATION_BACKENDS = ["accounts.backends.UsernameOrEmailBackend"]
+LOGIN_FAILURES_PER_IP = config("LOGIN_FAILURES_PER_IP", default=30, cast=int)
+LOGIN_FAILURES_PER_ACCOUNT = config("LOGIN_FAILURES_PER_ACCOUNT", default=5, cast=int)
+LOGIN_FAILURE_WINDOW = 15 * 60  # seconds
+# Proxies in front of the app that append to X-Forwarded-For (1 on Heroku)
+TRUSTED_PROXY_HOPS = config("TRUSTED_PROXY_HOPS", default=0, cast=int)
+
+# Tests hash passwords with the fast profile
+TEST_RUNNER = "elearning.test_runner.TestRunner"
+
+# Internationalization
+# https://docs.djangoproject.com/en/4.2/topics/i18n/
+
+LANGUAGE_CODE = "en-us"
+
+TIME_ZONE = "UTC"
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/4.2/howto/static-files/
+
+STATIC_URL = "/static/"
+STATICFILES_DIRS = [BASE_DIR / "static"]
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# collectstatic minifies, content-hashes and pre-compresses (gzip/brotli) every
+# asset; WhiteNoise serves the hashed names with an immutable, far-future
+# Cache-Control header. Third-party CSS/JS is vendored under static/vendor/.
+STATICFILES_STORAGE = "elearning.storage.MinifiedManifestStaticFilesStorage"
+
+MEDIA_URL = "/media/"
+MEDIA_ROOT = BASE_DIR / "media"
+
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Custom User Model
+AUTH_USER_MODEL = "accounts.User"
+
+# Cache
+# Sign-in throttling counters, quiz autosaves, resume positions and the
+# catalog, dashboard and card invalidation keys live in the default cache,
+# so every process serving the site must share it. CACHE_URL (or Heroku's
+# REDIS_URL) is "redis://host:6379/0" (needs the redis package) or
+# "memcached://host:11211" (needs pymemcache). Without one each process gets
+# a private local-memory cache, which only suits a single development
+# server; production settings and the gunicorn profile refuse to start on it
+# (see elearning/caching.py).
+CACHE_URL = config("CACHE_URL", default=config("REDIS_URL", default=""))
+if CACHE_URL.startswith("memcached://"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.memcached.PyMemcacheCache",
+            "LOCATION": CACHE_URL[len("memcached://") :],
+        }
+    }
+elif CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# Authentication
+LOGIN_REDIRECT_URL = "/"
+LOGOUT_REDIRECT_URL = "/"
+LOGIN_URL = "/accounts/login/"
+
+# Crispy Forms
+CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
+CRISPY_TEMPLATE_PACK = "bootstrap5"
+
+# Lesson progress write-behind: buffer completions in per-process log
+# segments and apply them in batches (see courses/progress.py)
+PROGRESS_WRITE_BEHIND = config("PROGRESS_WRITE_BEHIND", default=False, cast=bool)
+PROGRESS_LOG_DIR = BASE_DIR / "var" / "progress"
+PROGRESS_FLUSH_INTERVAL = 2  # seconds
+
+# Playback heartbeats are coalesced in the cache and written to the
+# enrollment at most this often (see courses/resume.py)
+RESUME_PERSIST_INTERVAL = config("RESUME_PERSIST_INTERVAL", default=30, cast=int)
+
+# Server-sent events for progress and announcements, served under ASGI
+# (see courses/events.py). EVENTS_BROKER is "host:port" or "unix:/path" of
+# "manage.py event_broker" when more than one process publishes or streams.
+EVENTS_BROKER = config("EVENTS_BROKER", default="")
+EVENTS_KEEPALIVE = 15  # seconds
+EVENTS_STREAM_LIFETIME = 5 * 60  # seconds; clients then reconnect
+EVENTS_RETRY_MS = 3000
+
+# Timed quizzes (see courses/exams.py): answers autosave to the shared cache
+# and are written to QuizAnswer at most every QUIZ_FLUSH_INTERVAL seconds
+# (on every save with a process-local cache); attempts
+# still open QUIZ_GRACE_SECONDS after their deadline are submitted by
+# "manage.py sweep_quiz_attempts".
+QUIZ_FLUSH_INTERVAL = config("QUIZ_FLUSH_INTERVAL", default=30, cast=int)
+QUIZ_GRACE_SECONDS = 15
+QUIZ_PASS_PERCENT = 50
+
+# Video lessons are transcoded to HLS by "manage.py transcode_videos", which
+# needs an ffmpeg binary (not a Python package). PDF lessons are processed by
+# "manage.py process_pdfs", which needs the pypdfium2 package; pikepdf is
+# optional and adds linearized copies. "manage.py rebuild_recommendations"
+# needs numpy and scipy. None of these is needed to run the site.
+FFMPEG_BINARY = config("FFMPEG_BINARY", default="ffmpeg")
+
+# File Upload Settings
+FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
+DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
@@ -0,0 +1,46 @@
+"""
+Environment lookups for the settings modules.
+
+``config`` reads settings from the environment with the same signature and
+casting as python-decouple's. Decouple itself is only imported when the
+project has a ``.env`` or ``settings.ini`` file for it to read.
+"""
+
+import os
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+TRUE_VALUES = {"y", "yes", "t", "true", "on", "1"}
+FALSE_VALUES = {"n", "no", "f", "false", "off", "0"}
+
+_undefined = object()
+
+
+def _cast_boolean(value):
+    value = str(value).lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f"Not a boolean: {value}")
+
+
+def _environ_config(name, default=_undefined, cast=_undefined):
+    if name in os.environ:
+        value = os.environ[name]
+    elif default is not _undefined:
+        value = default
+    else:
+        raise KeyError(f"{name} not found. Declare it as an environment variable.")
+    if cast is _undefined:
+        return value
+    if cast is bool:
+        return _cast_boolean(value)
+    return cast(value)
+
+
+if (BASE_DIR / ".env").exists() or (BASE_DIR / "settings.ini").exists():
+    from decouple import config
+else:
+    config = _environ_config
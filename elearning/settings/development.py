@@ -0,0 +1,18 @@
+"""
+Local development settings: DEBUG on and the SQLite database in the project
+directory, or DATABASE_URL when it is set.
+"""
+
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import DATABASES
+
+DEBUG = True
+
+ALLOWED_HOSTS = ["*"]
+
+if "DATABASE_URL" in os.environ:
+    import dj_database_url
+
+    DATABASES["default"] = dj_database_url.config(conn_max_age=600)
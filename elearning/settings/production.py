@@ -0,0 +1,20 @@
+"""
+Production settings for Heroku. django-heroku fills in DATABASE_URL,
+ALLOWED_HOSTS, SECRET_KEY and logging from the environment; it is only
+imported here because it pulls in the test runner and database URL parsing.
+"""
+
+import django_heroku
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import CACHE_URL
+from .config import config
+
+DEBUG = config("DEBUG", default=False, cast=bool)
+
+if not CACHE_URL:
+    # Every dyno and worker process must see the same cache; see base.py.
+    raise ImproperlyConfigured("Production needs a shared cache: set CACHE_URL")
+
+django_heroku.settings(locals(), staticfiles=False)
@@ -0,0 +1,17 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from accounts.hashers import preferring
+
+
+class TestRunner(DiscoverRunner):
+    """Runs the tests with the fast password hasher profile"""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._fast_hashing = override_settings(PASSWORD_HASHERS=preferring("fast"))
+        self._fast_hashing.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._fast_hashing.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,95 @@
+"""
+Boot-time warmup.
+
+``warm()`` does up front what the first requests to a fresh process would
+otherwise do lazily: populate the URL resolver (importing every view),
+compile all project templates into the cached loader, load the static
+files manifest, the password hashers and validators, render the home and
+catalog pages (filling the course card and facet caches) and build the
+autocomplete index. The gunicorn profile in elearning/gunicorn_config.py
+runs it once in the master process so forked workers start warm.
+"""
+
+import logging
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def _urls():
+    from django.urls import get_resolver, reverse
+
+    get_resolver().resolve(reverse("home"))
+
+
+def _templates():
+    from django.template import engines
+    from django.template.utils import get_app_template_dirs
+
+    engine = engines["django"]
+    directories = [*engine.dirs, *get_app_template_dirs("templates")]
+    for directory in directories:
+        for path in Path(directory).rglob("*.html"):
+            engine.get_template(path.relative_to(directory).as_posix())
+
+
+def _static_manifest():
+    from django.contrib.staticfiles.storage import staticfiles_storage
+
+    # The manifest is read when the lazy storage object is first set up.
+    staticfiles_storage.base_location
+
+
+def _auth():
+    from django.contrib.auth.hashers import get_hashers
+    from django.contrib.auth.password_validation import (
+        get_default_password_validators,
+    )
+
+    get_hashers()
+    get_default_password_validators()
+
+
+def _pages():
+    from django.contrib.auth.models import AnonymousUser
+    from django.test import RequestFactory
+
+    from courses import views
+
+    factory = RequestFactory()
+    for view, path in ((views.home, "/"), (views.course_list, "/courses/")):
+        request = factory.get(path)
+        request.user = AnonymousUser()
+        view(request)
+
+
+def _autocomplete():
+    from courses import autocomplete
+
+    autocomplete.get_index()
+
+
+STEPS = [
+    ("urls", _urls),
+    ("templates", _templates),
+    ("static manifest", _static_manifest),
+    ("auth", _auth),
+    ("pages", _pages),
+    ("autocomplete", _autocomplete),
+]
+
+
+def warm():
+    """Run every warmup step; returns ``{step: seconds}`` for the ones that worked"""
+    timings = {}
+    for name, step in STEPS:
+        started = time.monotonic()
+        try:
+            step()
+        except Exception:
+            # A cold cache only costs the first request; never block a boot.
+            logger.exception("Warmup step %r failed", name)
+            continue
+        timings[name] = time.monotonic() - started
+    return timings
@@ -0,0 +1,47 @@
+// Live progress and announcements from the server-sent event stream
+// (courses/events.py). Pages opt in by loading this script with
+// data-events-url and marking up what to update:
+//   [data-course-progress="<course id>"]  .progress-bar and [data-progress]
+//   [data-announcements="<course id>"]    announcements are prepended here
+(function () {
+    const script = document.currentScript;
+    if (!window.EventSource || !script || !script.dataset.eventsUrl) {
+        return;
+    }
+    const source = new EventSource(script.dataset.eventsUrl);
+
+    source.addEventListener('progress', event => {
+        const data = JSON.parse(event.data);
+        document.querySelectorAll(`[data-course-progress="${data.course}"]`).forEach(element => {
+            const bar = element.querySelector('.progress-bar');
+            if (bar) {
+                bar.style.width = data.progress + '%';
+                bar.setAttribute('aria-valuenow', data.progress);
+            }
+            element.querySelectorAll('[data-progress]').forEach(label => {
+                label.textContent = data.progress + '%';
+            });
+        });
+    });
+
+    source.addEventListener('announcement', event => {
+        const data = JSON.parse(event.data);
+        document.querySelectorAll(`[data-announcements="${data.course}"]`).forEach(list => {
+            if (list.querySelector(`[data-announcement-id="${data.id}"]`)) {
+                return;
+            }
+            const item = document.createElement('div');
+            item.className = 'list-group-item px-4 py-3';
+            item.dataset.announcementId = data.id;
+            const title = document.createElement('h6');
+            title.className = 'fw-semibold mb-1';
+            title.textContent = data.title;
+            const message = document.createElement('p');
+            message.className = 'mb-0 small';
+            message.textContent = data.message;
+            item.append(title, message);
+            list.prepend(item);
+            list.closest('[hidden]')?.removeAttribute('hidden');
+        });
+    });
+})();